@@ -0,0 +1,211 @@
+"""
+Mesure les points chauds du jeu pour plusieurs tailles de grille et nombres d'unités.
+
+Exemples
+--------
+    python bench.py
+    python bench.py --sizes 8 64 512 --units 10 1000 --output avant.json
+    python bench.py --output apres.json --compare avant.json
+
+Les résultats sont écrits en JSON (un enregistrement par mesure) pour
+pouvoir comparer deux commits.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+
+from engine import *
+
+# Les grandes cartes sont générées une fois puis relues depuis le disque
+MAP_CACHE = MapCache()
+
+
+def make_engine(size, units, seed=0):
+    """
+    Construit un moteur avec une grille générée et `units` unités
+    (un dixième pour le joueur, le reste pour l'adversaire) sur des cases libres.
+    """
+    grid = generate_map(size, seed, cache=MAP_CACHE)
+    free = np.argwhere(grid.terrain == TRAVERSABLE)
+    rng = np.random.default_rng(seed)
+    cells = free[rng.choice(len(free), size=min(units, len(free)), replace=False)]
+    players = max(1, len(cells) // 10)
+    player_units = [Unit(int(x), int(y), 10, 2, 'player') for x, y in cells[:players]]
+    enemy_units = [Unit(int(x), int(y), 8, 1, 'enemy') for x, y in cells[players:]]
+    return Engine(grid=grid, player_units=player_units, enemy_units=enemy_units, seed=seed)
+
+
+def measure(function, setup=None, repeat=5, min_time=0.05):
+    """
+    Mesure la durée d'un appel de `function`.
+
+    `setup` est appelé (hors chronométrage) avant chaque série et son
+    résultat passé à `function`. Chaque série enchaîne assez d'appels pour
+    durer au moins `min_time` secondes, sauf si `setup` est fourni : on ne
+    fait alors qu'un appel par série, l'état étant consommé, après un appel
+    d'échauffement non mesuré.
+
+    Retourne
+    --------
+    dict
+        Durées par appel : meilleure, médiane, et nombre d'appels par série.
+    """
+    number = 1
+    if setup is not None:
+        function(setup())  # Échauffement : caches et imports paresseux
+    else:
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                function(None)
+            if time.perf_counter() - start >= min_time or number >= 1 << 20:
+                break
+            number *= 2
+    timings = []
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        start = time.perf_counter()
+        for _ in range(number):
+            function(state)
+        timings.append((time.perf_counter() - start) / number)
+    return {"best": min(timings), "median": statistics.median(timings), "number": number}
+
+
+def bench_engine(size, units, repeat):
+    """Mesure les fonctions du moteur pour une taille de grille et un nombre d'unités."""
+    engine = make_engine(size, units)
+    unit = engine.player_units[0]
+    skill = unit.skills[2]
+    results = {}
+
+    def accessible_cold(_):
+        engine.occupancy_version += 1  # Invalide le cache d'accessibilité
+        engine.get_accessible_cells(unit)
+
+    results["get_accessible_cells[cold]"] = measure(accessible_cold, repeat=repeat)
+    results["get_accessible_cells[cached]"] = measure(lambda _: engine.get_accessible_cells(unit), repeat=repeat)
+    results["get_targetable_cells"] = measure(lambda _: engine.get_targetable_cells(unit, skill), repeat=repeat)
+
+    def skill_setup():
+        fresh = make_engine(size, units)
+        shooter = fresh.player_units[0]
+        return fresh, shooter, fresh.get_targetable_cells(shooter, skill)
+
+    def skill_batch(state):
+        fresh, shooter, cells = state
+        for x, y in cells:
+            fresh.apply_skill_effect(shooter, x, y, skill)
+
+    timing = measure(skill_batch, setup=skill_setup, repeat=repeat)
+    cells = max(1, len(skill_setup()[2]))
+    results["apply_skill_effect"] = {key: value / cells if key != "number" else value
+                                     for key, value in timing.items()}
+    results["handle_enemy_turn"] = measure(lambda state: state.handle_enemy_turn(),
+                                           setup=lambda: make_engine(size, units), repeat=repeat)
+    return results
+
+
+def bench_render(size, units, repeat):
+    """
+    Mesure l'affichage sous le pilote vidéo factice, dans une fenêtre de
+    taille fixe : image complète, image sans changement et défilement
+    d'une case par image (morceaux de terrain rendus au fil du parcours).
+    """
+    import pygame
+
+    from game import Game
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    game = Game(screen, make_engine(size, units))
+    unit = game.player_units[0]
+    game.camera.center_on(unit.x, unit.y)
+    game.flip_display()
+
+    def full_frame(_):
+        game.renderer.invalidate()
+        game.flip_display()
+
+    def scroll_frame(_):
+        camera = game.camera
+        if camera.left + camera.width >= camera.world_size * camera.cell_size:
+            camera.left = 0
+        camera.pan(camera.cell_size, 0)
+        game.flip_display()
+
+    results = {
+        "flip_display[full]": measure(full_frame, repeat=repeat),
+        "flip_display[idle]": measure(lambda _: game.flip_display(), repeat=repeat),
+        "flip_display[scroll]": measure(scroll_frame, repeat=repeat),
+    }
+    pygame.display.quit()
+    return results
+
+
+def git_revision():
+    """Retourne le commit courant, ou None hors d'un dépôt git."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, reference_path):
+    """Affiche le rapport entre les mesures et celles d'un fichier de référence."""
+    with open(reference_path) as f:
+        reference = {(r["name"], r["size"], r["units"]): r for r in json.load(f)["results"]}
+    print(f"\nComparaison avec {reference_path} (rapport > 1 : plus lent)")
+    for r in results:
+        old = reference.get((r["name"], r["size"], r["units"]))
+        if old is not None and old["best"] > 0:
+            print(f"{r['name']:32} size={r['size']:<5} units={r['units']:<6} x{r['best'] / old['best']:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 32, 128, 512, 1024])
+    parser.add_argument("--units", type=int, nargs="+", default=[4, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="fichier de résultats d'un autre commit")
+    parser.add_argument("--no-render", action="store_true", help="ne pas mesurer l'affichage")
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        for units in args.units:
+            if units > size * size // 2:
+                continue
+            measures = bench_engine(size, units, args.repeat)
+            if not args.no_render:
+                measures.update(bench_render(size, units, args.repeat))
+            for name, timing in measures.items():
+                results.append({"name": name, "size": size, "units": units, **timing})
+                print(f"{name:32} size={size:<5} units={units:<6} {timing['best'] * 1e6:12.1f} us")
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "results": results,
+        }, f, indent=1)
+    print(f"\nRésultats écrits dans {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
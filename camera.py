@@ -0,0 +1,218 @@
+from collections import OrderedDict
+
+import pygame
+
+from fonts import surface_bytes
+from render import *
+from unit import *
+
+# Côté d'un morceau de terrain pré-rendu, en cases
+CHUNK_CELLS = 16
+
+# Bornes du zoom (taille d'une case = CELL_SIZE * zoom)
+MIN_ZOOM = 0.125
+MAX_ZOOM = 2.0
+
+
+class Camera:
+    """
+    Fenêtre de vue sur une carte plus grande que l'écran.
+
+    La caméra convertit les coordonnées de cases en pixels d'écran selon
+    son décalage et son zoom. Toute modification incrémente `version`,
+    ce qui permet à l'affichage de savoir quand tout redessiner.
+
+    Attributs
+    ---------
+    width, height : int
+        Taille de la vue en pixels.
+    world_size : int
+        Taille de la carte en cases.
+    zoom : float
+        Facteur de zoom.
+    left, top : int
+        Pixel de la carte (au zoom courant) affiché en haut à gauche.
+    version : int
+        Incrémenté à chaque déplacement ou zoom.
+    """
+
+    def __init__(self, width, height, world_size, zoom=1.0):
+        self.width = width
+        self.height = height
+        self.world_size = world_size
+        self.zoom = zoom
+        self.left = 0
+        self.top = 0
+        self.version = 0
+        self.clamp()
+
+    @property
+    def cell_size(self):
+        """Taille d'une case à l'écran, en pixels."""
+        return max(1, round(CELL_SIZE * self.zoom))
+
+    def clamp(self):
+        """Garde la vue à l'intérieur de la carte (ou centrée si la carte est plus petite)."""
+        world = self.world_size * self.cell_size
+        self.left = (world - self.width) // 2 if world < self.width else min(max(self.left, 0), world - self.width)
+        self.top = (world - self.height) // 2 if world < self.height else min(max(self.top, 0), world - self.height)
+
+    def pan(self, dx, dy):
+        """Déplace la vue de (dx, dy) pixels."""
+        self.left += dx
+        self.top += dy
+        self.clamp()
+        self.version += 1
+
+    def set_zoom(self, zoom, anchor=None):
+        """
+        Change le zoom en gardant immobile le point d'écran `anchor` (le centre par défaut).
+
+        Paramètres
+        ----------
+        zoom : float
+            Nouveau facteur de zoom, borné entre MIN_ZOOM et MAX_ZOOM.
+        anchor : tuple[int, int], optionnel
+            Point de l'écran qui reste fixe.
+        """
+        if anchor is None:
+            anchor = (self.width // 2, self.height // 2)
+        old_size = self.cell_size
+        world_x = (self.left + anchor[0]) / old_size
+        world_y = (self.top + anchor[1]) / old_size
+        self.zoom = min(max(zoom, MIN_ZOOM), MAX_ZOOM)
+        self.left = round(world_x * self.cell_size) - anchor[0]
+        self.top = round(world_y * self.cell_size) - anchor[1]
+        self.clamp()
+        self.version += 1
+
+    def center_on(self, x, y):
+        """Centre la vue sur la case (x, y)."""
+        size = self.cell_size
+        self.left = x * size + size // 2 - self.width // 2
+        self.top = y * size + size // 2 - self.height // 2
+        self.clamp()
+        self.version += 1
+
+    def ensure_visible(self, x, y, margin=1):
+        """Fait défiler la vue au minimum pour que la case (x, y) soit visible."""
+        size = self.cell_size
+        left, top = self.left, self.top
+        self.left = min(self.left, (x - margin) * size)
+        self.left = max(self.left, (x + 1 + margin) * size - self.width)
+        self.top = min(self.top, (y - margin) * size)
+        self.top = max(self.top, (y + 1 + margin) * size - self.height)
+        self.clamp()
+        if (self.left, self.top) != (left, top):
+            self.version += 1
+
+    def to_screen(self, x, y):
+        """Retourne la position à l'écran du coin de la case (x, y) (coordonnées réelles acceptées)."""
+        size = self.cell_size
+        return round(x * size) - self.left, round(y * size) - self.top
+
+    def cell_rect(self, x, y):
+        """Retourne le rectangle à l'écran de la case (x, y)."""
+        size = self.cell_size
+        return pygame.Rect(x * size - self.left, y * size - self.top, size, size)
+
+    def visible_cells(self):
+        """
+        Retourne les cases visibles, même partiellement.
+
+        Retourne
+        --------
+        tuple[int, int, int, int]
+            (x0, x1, y0, y1), utilisables en tranches [x0:x1, y0:y1].
+        """
+        size = self.cell_size
+        return (max(self.left // size, 0),
+                min(-(-(self.left + self.width) // size), self.world_size),
+                max(self.top // size, 0),
+                min(-(-(self.top + self.height) // size), self.world_size))
+
+    def is_visible(self, x, y):
+        """Indique si la case (x, y) est visible."""
+        x0, x1, y0, y1 = self.visible_cells()
+        return x0 <= x < x1 and y0 <= y < y1
+
+
+class ChunkCache:
+    """
+    Morceaux de terrain pré-rendus, gardés dans un cache LRU.
+
+    La carte est découpée en carrés de CHUNK_CELLS cases ; seuls ceux qui
+    touchent la vue sont rendus et dessinés. Un morceau est identifié par sa
+    position, la taille des cases et la version de la grille : un zoom ou
+    une modification du terrain produit de nouveaux morceaux, et les
+    anciens finissent évincés. Le cache est borné en mémoire et non en
+    nombre de morceaux, qui pèsent 225 fois plus au zoom maximal qu'au zoom
+    1/8 ; la borne par défaut garde de quoi couvrir un écran au zoom maximal.
+
+    Attributs
+    ---------
+    max_bytes : int
+        Mémoire maximale occupée par les morceaux en cache.
+    size_bytes : int
+        Mémoire occupée actuellement.
+    hits, misses, evictions : int
+        Statistiques cumulées du cache.
+    """
+
+    def __init__(self, max_bytes=128 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._chunks = OrderedDict()
+
+    def __len__(self):
+        return len(self._chunks)
+
+    def chunk(self, grid, cx, cy, cell_size):
+        """Retourne le morceau (cx, cy) rendu avec des cases de `cell_size` pixels."""
+        key = (cx, cy, cell_size, grid.version)
+        surface = self._chunks.get(key)
+        if surface is not None:
+            self._chunks.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        x0, y0 = cx * CHUNK_CELLS, cy * CHUNK_CELLS
+        surface = render_terrain(grid, cell_size, (x0, min(x0 + CHUNK_CELLS, grid.size),
+                                                   y0, min(y0 + CHUNK_CELLS, grid.size)))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        self._chunks[key] = surface
+        self.size_bytes += surface_bytes(surface)
+        while self.size_bytes > self.max_bytes and len(self._chunks) > 1:
+            _, evicted = self._chunks.popitem(last=False)
+            self.size_bytes -= surface_bytes(evicted)
+            self.evictions += 1
+        return surface
+
+    def draw(self, surface, grid, camera, area):
+        """
+        Dessine le terrain visible dans la zone `area` de l'écran.
+
+        Paramètres
+        ----------
+        surface : pygame.Surface
+            L'écran.
+        grid : Grid
+            La grille à dessiner.
+        camera : Camera
+            La vue.
+        area : pygame.Rect
+            La zone de l'écran à couvrir.
+        """
+        size = camera.cell_size
+        chunk_px = CHUNK_CELLS * size
+        left, top = camera.left + area.left, camera.top + area.top
+        cx0, cy0 = max(left // chunk_px, 0), max(top // chunk_px, 0)
+        cx1 = min((left + area.width - 1) // chunk_px, (grid.size - 1) // CHUNK_CELLS)
+        cy1 = min((top + area.height - 1) // chunk_px, (grid.size - 1) // CHUNK_CELLS)
+        blits = [(self.chunk(grid, cx, cy, size), (cx * chunk_px - camera.left, cy * chunk_px - camera.top))
+                 for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)]
+        surface.blits(blits, doreturn=False)
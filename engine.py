@@ -0,0 +1,768 @@
+import random
+
+import numpy as np
+
+from grid import *
+from mapgen import *
+from occupancy import *
+from pathfinding import *
+from targeting import *
+from unit import *
+from visibility import *
+from zobrist import *
+
+
+# Code d'occupation de la grille (TEAM_CODES) de chaque équipe de la table des unités
+GRID_TEAM_CODES = np.array([TEAM_CODES[team] for team in TEAMS], dtype=np.uint8)
+
+
+class MoveAction:
+    """
+    Action de déplacement d'une unité vers une case.
+
+    Attributs
+    ---------
+    unit : Unit
+        L'unité à déplacer.
+    x : int
+        Coordonnée x de la case cible.
+    y : int
+        Coordonnée y de la case cible.
+    """
+
+    __slots__ = ("unit", "x", "y")
+
+    def __init__(self, unit, x, y):
+        self.unit = unit
+        self.x = x
+        self.y = y
+
+    def apply(self, engine):
+        return engine.move_unit(self.unit, self.x, self.y)
+
+
+class SkillAction:
+    """
+    Action d'utilisation d'une compétence sur une case.
+
+    Attributs
+    ---------
+    unit : Unit
+        L'unité qui utilise la compétence.
+    skill : Skill
+        La compétence utilisée.
+    x : int
+        Coordonnée x de la cible.
+    y : int
+        Coordonnée y de la cible.
+    """
+
+    __slots__ = ("unit", "skill", "x", "y")
+
+    def __init__(self, unit, skill, x, y):
+        self.unit = unit
+        self.skill = skill
+        self.x = x
+        self.y = y
+
+    def apply(self, engine):
+        if not engine.can_target(self.unit, self.skill, self.x, self.y):
+            return False
+        engine.apply_skill_effect(self.unit, self.x, self.y, self.skill)
+        return True
+
+
+class AttackAction:
+    """
+    Action d'attaque au corps à corps d'une unité sur une autre.
+
+    Attributs
+    ---------
+    unit : Unit
+        L'unité qui attaque.
+    target : Unit
+        L'unité attaquée.
+    """
+
+    __slots__ = ("unit", "target")
+
+    def __init__(self, unit, target):
+        self.unit = unit
+        self.target = target
+
+    def apply(self, engine):
+        return engine.attack(self.unit, self.target)
+
+
+class Engine:
+    """
+    Moteur de jeu sans affichage : contient toutes les règles.
+
+    Le moteur n'importe pas pygame. Il est piloté par des actions
+    (MoveAction, SkillAction, AttackAction) passées à `apply`, ce qui permet
+    de simuler des parties complètes sans fenêtre ni délai.
+
+    Attributs
+    ---------
+    size : int
+        Taille de la grille (size x size).
+    grid : Grid
+        Les couches de terrain, d'occupation et de coût.
+    player_units : list[Unit]
+        La liste des unités du joueur.
+    enemy_units : list[Unit]
+        La liste des unités de l'adversaire.
+    units : UnitTable
+        Les données de toutes les unités, en colonnes.
+    rng : random.Random
+        Générateur aléatoire du moteur (reproductible avec `seed`).
+    occupancy : OccupancyIndex
+        Index des unités par case.
+    occupancy_version : int
+        Incrémenté à chaque déplacement ou retrait d'unité.
+    log : ActionLog | None
+        Journal qui reçoit chaque action passée à `apply`.
+    undo_stack : list[tuple] | None
+        Modifications à défaire, de la plus ancienne à la plus récente ;
+        None tant que `enable_undo` n'a pas été appelé.
+    side : str
+        L'équipe qui a la main ('player' ou 'enemy'), changée par `end_turn`.
+    visibility : VisibilityCache
+        Champs de vision des cases et brouillard de guerre des équipes.
+    """
+
+    def __init__(self, size=GRID_SIZE, grid=None, player_units=None, enemy_units=None, seed=None,
+                 map_cache=None, units=None):
+        """
+        Construit le moteur.
+
+        Paramètres
+        ----------
+        size : int
+            Taille de la grille.
+        grid : Grid | list[list[str]], optionnel
+            Grille, ou types des cases indexés par [x][y]. Générée avec `seed`
+            si absente, les cases des unités restant accessibles.
+        player_units : list[Unit], optionnel
+            Unités du joueur. Deux unités par défaut. Les unités sont recopiées
+            dans la table du moteur et leurs poignées pointent ensuite vers elle.
+        enemy_units : list[Unit], optionnel
+            Unités de l'adversaire. Deux unités par défaut.
+        seed : int, optionnel
+            Graine du générateur aléatoire et de la carte.
+        map_cache : MapCache, optionnel
+            Cache disque des cartes générées.
+        units : UnitTable, optionnel
+            Table à reprendre telle quelle (numéros de lignes compris), par
+            exemple lue dans une sauvegarde. Les équipes sont alors ses
+            unités en vie, sauf si elles sont données.
+        """
+        self.rng = random.Random(seed)
+        self.units = units if units is not None else UnitTable()
+        if units is not None:
+            if player_units is None:
+                player_units = [units.handle(index) for index in units.alive_indices('player').tolist()]
+            if enemy_units is None:
+                enemy_units = [units.handle(index) for index in units.alive_indices('enemy').tolist()]
+        if player_units is None:
+            player_units = [Unit(0, 0, 10, 2, 'player', table=self.units),
+                            Unit(1, 0, 10, 2, 'player', table=self.units)]
+        if enemy_units is None:
+            enemy_units = [Unit(6, 6, 8, 1, 'enemy', table=self.units),
+                           Unit(7, 6, 8, 1, 'enemy', table=self.units)]
+        if grid is None:
+            spawns = [(unit.x, unit.y) for unit in player_units + enemy_units]
+            grid = generate_map(size, seed, spawns=spawns, cache=map_cache)
+        elif not isinstance(grid, Grid):
+            grid = Grid.from_cell_types(grid)
+        self.grid = grid
+        self.size = grid.size
+        for unit in player_units + enemy_units:
+            if unit.table is not self.units:
+                self.units.adopt(unit)
+        self.player_units = list(player_units)
+        self.enemy_units = list(enemy_units)
+        self.occupancy = OccupancyIndex(self.grid)
+        rows = np.array([unit.index for unit in player_units + enemy_units], dtype=np.int64)
+        self.occupancy.add_many(player_units + enemy_units, self.units.x[rows], self.units.y[rows],
+                                GRID_TEAM_CODES[self.units.team[rows]])
+        self.occupancy_version = 0
+        # Cartes d'accessibilité, valables tant que le terrain et les unités ne bougent pas
+        self._reachability = {}
+        self._reachability_version = None
+        self.reachability_hits = 0
+        self.reachability_misses = 0
+        self.visibility = VisibilityCache(self.grid)
+        self.log = None
+        self.undo_stack = None
+        self.side = 'player'
+        # Hachage de Zobrist : la part des unités est tenue à jour à chaque
+        # modification, celle du terrain recalculée quand la grille change
+        self._units_hash = units_hash(self.units)
+        self._terrain_hash = None
+        self._terrain_hash_version = None
+
+    def clone(self):
+        """
+        Retourne une copie indépendante du moteur, pour explorer des coups.
+
+        Le terrain est partagé avec l'original (copie à l'écriture), les
+        colonnes des unités et l'index des cases sont copiés, et le cache
+        d'accessibilité, encore valable, est repris. Les poignées des unités
+        de la copie sont de nouveaux objets, aux mêmes numéros de ligne.
+
+        Retourne
+        --------
+        Engine
+            La copie, sans journal ni pile d'annulation.
+        """
+        clone = Engine.__new__(Engine)  # Sans __init__ : tout est recopié ci-dessous
+        clone.rng = random.Random()
+        clone.rng.setstate(self.rng.getstate())
+        clone.grid = self.grid.copy()
+        clone.size = self.size
+        clone.units = self.units.copy()
+        handle = clone.units.handle
+        clone.player_units = [handle(unit.index) for unit in self.player_units]
+        clone.enemy_units = [handle(unit.index) for unit in self.enemy_units]
+        clone.occupancy = self.occupancy.copy(clone.grid, clone.units)
+        clone.occupancy_version = self.occupancy_version
+        clone._reachability = dict(self._reachability)
+        clone._reachability_version = self._reachability_version
+        clone.reachability_hits = 0
+        clone.reachability_misses = 0
+        clone.visibility = self.visibility.copy(clone.grid)
+        clone.log = None
+        clone.undo_stack = None
+        clone.side = self.side
+        clone._units_hash = self._units_hash
+        clone._terrain_hash = self._terrain_hash
+        clone._terrain_hash_version = self._terrain_hash_version
+        return clone
+
+    @property
+    def zobrist(self):
+        """
+        Hachage de Zobrist de la position : terrain, position et santé des
+        unités en jeu, équipe qui a la main.
+
+        Il est tenu à jour en O(1) par les modifications faites par le moteur
+        (déplacements, dégâts, retraits, annulations) ; deux positions
+        identiques atteintes par des chemins différents ont le même hachage.
+        """
+        if self._terrain_hash_version != self.grid.version:
+            self._terrain_hash = terrain_hash(self.grid)
+            self._terrain_hash_version = self.grid.version
+        return self._units_hash ^ self._terrain_hash ^ (SIDE_KEY if self.side == 'enemy' else 0)
+
+    def end_turn(self):
+        """Passe la main à l'autre équipe."""
+        self.side = 'enemy' if self.side == 'player' else 'player'
+
+    def _set_health(self, unit, health):
+        """Change la santé d'une unité en tenant à jour le hachage."""
+        self._units_hash ^= health_key(unit.index, unit.health) ^ health_key(unit.index, health)
+        unit.health = health
+
+    def enable_undo(self):
+        """
+        Commence à enregistrer les modifications pour pouvoir les défaire.
+
+        Exemple
+        -------
+            engine.enable_undo()
+            checkpoint = engine.checkpoint()
+            engine.apply(action)
+            ...
+            engine.rollback(checkpoint)
+        """
+        if self.undo_stack is None:
+            self.undo_stack = []
+
+    def checkpoint(self):
+        """Retourne un repère de l'état courant pour `rollback`."""
+        return len(self.undo_stack)
+
+    def rollback(self, checkpoint=0):
+        """Défait toutes les modifications faites depuis le repère `checkpoint`."""
+        while len(self.undo_stack) > checkpoint:
+            self._revert(self.undo_stack.pop())
+
+    def undo(self):
+        """
+        Défait la dernière action passée à `apply`.
+
+        Retourne
+        --------
+        bool
+            False s'il n'y avait rien à défaire.
+        """
+        while self.undo_stack:
+            entry = self.undo_stack.pop()
+            if entry[0] == "action":
+                return True
+            self._revert(entry)
+        return False
+
+    def _revert(self, entry):
+        """Défait une modification enregistrée dans la pile d'annulation."""
+        kind = entry[0]
+        if kind == "move":
+            _, unit, x, y = entry
+            self._units_hash ^= position_key(unit.index, unit.x, unit.y) ^ position_key(unit.index, x, y)
+            self.occupancy.move(unit, x, y)
+            self.occupancy_version += 1
+        elif kind == "health":
+            _, unit, health = entry
+            self._set_health(unit, health)
+        elif kind == "remove":
+            _, unit, position, slot = entry
+            team = self.player_units if unit.team == 'player' else self.enemy_units
+            team.insert(position, unit)
+            self.occupancy.restore(unit, slot)
+            self.units.alive[unit.index] = True
+            self._units_hash ^= position_key(unit.index, unit.x, unit.y) ^ health_key(unit.index, unit.health)
+            self.occupancy_version += 1
+
+    def in_bounds(self, x, y):
+        """Indique si (x, y) est sur la grille."""
+        return self.grid.in_bounds(x, y)
+
+    def is_traversable(self, x, y):
+        """Indique si la case (x, y) peut être traversée."""
+        return self.grid.is_traversable(x, y)
+
+    def opponents(self, unit):
+        """Retourne la liste des unités adverses de `unit`."""
+        return self.enemy_units if unit.team == 'player' else self.player_units
+
+    def unit_at(self, x, y):
+        """Retourne l'unité sur la case (x, y), ou None."""
+        return self.occupancy.at(x, y)
+
+    def units_within(self, x, y, radius, metric="chebyshev"):
+        """Retourne les unités à une distance au plus `radius` de (x, y)."""
+        return self.occupancy.within(x, y, radius, metric)
+
+    def remove_unit(self, unit):
+        """Retire une unité morte de son équipe et de l'index des cases."""
+        if unit not in self.occupancy:
+            return
+        team = self.player_units if unit.team == 'player' else self.enemy_units
+        if self.undo_stack is not None:
+            self.undo_stack.append(("remove", unit, team.index(unit), self.occupancy.slot_of(unit)))
+        team.remove(unit)
+        self.occupancy.remove(unit)
+        self.units.alive[unit.index] = False
+        self._units_hash ^= position_key(unit.index, unit.x, unit.y) ^ health_key(unit.index, unit.health)
+        self.occupancy_version += 1
+
+    def apply_unit_states(self, rows, xs, ys, health, alive):
+        """
+        Reprend l'état d'unités calculé par un autre moteur, sans vérifier les règles.
+
+        Sert aux clients d'un serveur de parties, qui appliquent les
+        différences d'état reçues. Les unités qui bougent sont toutes
+        retirées de l'index des cases avant d'être replacées : deux unités
+        qui échangent leurs cases ne se gênent pas.
+
+        Paramètres
+        ----------
+        rows : list[int]
+            Numéros de lignes des unités.
+        xs, ys, health : list[int]
+            Leurs positions et santés.
+        alive : list[bool]
+            False pour les unités mortes, qui sont retirées de leur équipe.
+        """
+        lifted = []
+        for row, x, y, points, live in zip(rows, xs, ys, health, alive):
+            unit = self.units.handle(row)
+            if unit not in self.occupancy:
+                continue
+            if points != unit.health:
+                self._set_health(unit, points)
+            if not live:
+                self.remove_unit(unit)
+            elif (x, y) != (unit.x, unit.y):
+                lifted.append((unit, self.occupancy.slot_of(unit), x, y))
+                self._units_hash ^= position_key(row, unit.x, unit.y) ^ position_key(row, x, y)
+                self.occupancy.remove(unit)
+        for unit, slot, x, y in lifted:
+            unit.x, unit.y = x, y
+            self.occupancy.restore(unit, slot)
+        if lifted:
+            self.occupancy_version += 1
+
+    def winner(self):
+        """
+        Retourne l'équipe gagnante, ou None si la partie continue.
+
+        Retourne
+        --------
+        str | None
+            'player', 'enemy' ou None.
+        """
+        if not self.enemy_units:
+            return 'player'
+        if not self.player_units:
+            return 'enemy'
+        return None
+
+    def apply(self, action):
+        """
+        Applique une action au moteur.
+
+        Paramètres
+        ----------
+        action : MoveAction | SkillAction | AttackAction
+            L'action à appliquer.
+
+        Retourne
+        --------
+        bool
+            True si l'action était légale et a été appliquée.
+        """
+        if self.log is not None:
+            self.log.append(action)
+        if self.undo_stack is not None:
+            self.undo_stack.append(("action",))
+        return action.apply(self)
+
+    def get_reachability(self, unit, max_distance=3):
+        """
+        Retourne la carte des cases atteignables par une unité.
+
+        Le résultat est mis en cache par (position, budget) et n'est recalculé
+        qu'après une modification du terrain ou un déplacement d'unité.
+
+        Paramètres
+        ----------
+        unit : Unit
+            L'unité à déplacer.
+        max_distance : int
+            Budget de déplacement.
+
+        Retourne
+        --------
+        ReachabilityMap
+            Les cases atteignables et leurs prédécesseurs.
+        """
+        version = (self.grid.version, self.occupancy_version)
+        if version != self._reachability_version:
+            self._reachability.clear()
+            self._reachability_version = version
+        key = (unit.x, unit.y, max_distance)
+        reachability = self._reachability.get(key)
+        if reachability is None:
+            self.reachability_misses += 1
+            reachability = reachable_cells(self.grid, (unit.x, unit.y), max_distance)
+            self._reachability[key] = reachability
+        else:
+            self.reachability_hits += 1
+        return reachability
+
+    def get_accessible_cells(self, unit, max_distance=3):
+        """
+        Retourne les cases sur lesquelles une unité peut se déplacer,
+        en contournant les murs et les autres unités.
+
+        Paramètres
+        ----------
+        unit : Unit
+            L'unité à déplacer.
+        max_distance : int
+            Budget de déplacement.
+
+        Retourne
+        --------
+        list[tuple[int, int]]
+            Liste des coordonnées des cases accessibles (à ne pas modifier).
+        """
+        return self.get_reachability(unit, max_distance).cells
+
+    def get_targetable_array(self, unit, skill):
+        """
+        Retourne les cases ciblables sous forme de tableau NumPy, pour l'IA.
+
+        Retourne
+        --------
+        numpy.ndarray
+            Tableau de forme (n, 2) des coordonnées (x, y) ciblables : à
+            portée et en ligne de vue (les murs arrêtent les compétences).
+        """
+        cells = targets_in_range(self.size, unit.x, unit.y, skill.range_min, skill.range_max, skill.metric)
+        return cells[self.visibility.cells_in_sight(unit.x, unit.y, cells[:, 0], cells[:, 1])]
+
+    def get_targetable_cells(self, unit, skill):
+        """
+        Retourne les cases ciblables pour une unité en fonction de la portée de la compétence.
+
+        Paramètres
+        ----------
+        unit : Unit
+            L'unité qui utilise la compétence.
+        skill : Skill
+            La compétence utilisée.
+
+        Retourne
+        --------
+        list[tuple[int, int]]
+            Liste des coordonnées des cases ciblables.
+        """
+        return list(map(tuple, self.get_targetable_array(unit, skill).tolist()))
+
+    def can_target(self, unit, skill, x, y):
+        """Indique si la case (x, y) est sur la grille, à portée de la compétence et en vue."""
+        return (self.in_bounds(x, y)
+                and in_range(skill.range_min, skill.range_max, x - unit.x, y - unit.y, skill.metric)
+                and self.visibility.line_of_sight(unit.x, unit.y, x, y))
+
+    def can_see(self, unit, x, y):
+        """Indique si l'unité voit la case (x, y)."""
+        return self.visibility.is_visible(unit.x, unit.y, x, y)
+
+    def team_visibility(self, team):
+        """
+        Retourne le brouillard de guerre d'une équipe.
+
+        Paramètres
+        ----------
+        team : str
+            'player' ou 'enemy'.
+
+        Retourne
+        --------
+        numpy.ndarray
+            Masque booléen indexé par [x, y] des cases vues par au moins une
+            unité de l'équipe (à ne pas modifier).
+        """
+        units = self.player_units if team == 'player' else self.enemy_units
+        return self.visibility.team_mask(team, units)
+
+    def move_unit(self, unit, target_x, target_y):
+        """
+        Déplace une unité vers une case cible si elle est accessible.
+
+        Paramètres
+        ----------
+        unit : Unit
+            L'unité à déplacer.
+        target_x : int
+            Coordonnée x de la case cible.
+        target_y : int
+            Coordonnée y de la case cible.
+
+        Retourne
+        --------
+        bool
+            True si l'unité a été déplacée.
+        """
+        if (target_x, target_y) not in self.get_reachability(unit):
+            return False
+        if (target_x, target_y) == (unit.x, unit.y):
+            return True
+        if self.undo_stack is not None:
+            self.undo_stack.append(("move", unit, unit.x, unit.y))
+        self._units_hash ^= position_key(unit.index, unit.x, unit.y) ^ position_key(unit.index, target_x, target_y)
+        self.occupancy.move(unit, target_x, target_y)
+        self.occupancy_version += 1
+        return True
+
+    def attack(self, unit, target):
+        """
+        Attaque au corps à corps ; retire la cible si elle meurt.
+
+        Retourne
+        --------
+        bool
+            True si l'attaque était légale : deux unités en jeu d'équipes
+            adverses, au contact.
+        """
+        if (target is unit or target.team == unit.team
+                or unit not in self.occupancy or target not in self.occupancy):
+            return False
+        if abs(unit.x - target.x) > 1 or abs(unit.y - target.y) > 1:
+            return False
+        if self.undo_stack is not None:
+            self.undo_stack.append(("health", target, target.health))
+        self._set_health(target, target.health - unit.attack_power)
+        if target.health <= 0:
+            self.remove_unit(target)
+        return True
+
+    def apply_skill_effect(self, unit, target_x, target_y, skill):
+        """
+        Applique l'effet d'une compétence à sa zone (voir `resolve_skill_effects`).
+
+        Paramètres
+        ----------
+        unit : Unit
+            L'unité qui utilise la compétence.
+        target_x : int
+            Coordonnée x de la cible.
+        target_y : int
+            Coordonnée y de la cible.
+        skill : Skill
+            La compétence utilisée.
+        """
+        self.resolve_skill_effects([(unit, skill, target_x, target_y)])
+
+    def skill_footprint(self, unit, skill, target_x, target_y):
+        """
+        Retourne les cases touchées par une compétence et la variation de santé sur chacune.
+
+        La puissance baisse de `skill.falloff` par case d'éloignement du
+        point d'impact. Les murs arrêtent l'effet : seules les cases vues
+        depuis le centre de la zone (la case visée pour un disque, l'unité
+        pour une ligne ou un cône) sont touchées.
+
+        Retourne
+        --------
+        tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+            Coordonnées x et y des cases, et variation de santé (négative
+            pour des dégâts) ; les cases où l'effet s'est éteint sont omises.
+        """
+        if skill.shape in ("single", "radius"):
+            center_x, center_y = target_x, target_y
+        else:
+            center_x, center_y = unit.x, unit.y
+        cells, distance = footprint(skill.shape, skill.area, target_x - unit.x, target_y - unit.y)
+        if not self.in_bounds(center_x, center_y):
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        xs, ys = cells[:, 0] + center_x, cells[:, 1] + center_y
+        amounts = np.rint(skill.power * np.maximum(1 - skill.falloff * distance, 0)).astype(np.int64)
+        keep = (xs >= 0) & (xs < self.size) & (ys >= 0) & (ys < self.size) & (amounts > 0)
+        xs, ys, amounts = xs[keep], ys[keep], amounts[keep]
+        if skill.shape != "single":  # La case visée seule est toujours vue depuis elle-même
+            keep = self.visibility.cells_in_sight(center_x, center_y, xs, ys)
+            xs, ys, amounts = xs[keep], ys[keep], amounts[keep]
+        return xs, ys, amounts * EFFECTS[skill.effect]
+
+    def resolve_skill_effects(self, casts):
+        """
+        Applique en un lot les effets de plusieurs compétences.
+
+        Les zones de toutes les compétences sont réunies ; les unités
+        touchées sont trouvées par l'index des cases, leurs variations de
+        santé sommées, puis écrites en une opération sur les colonnes de la
+        table (les soins ne dépassent pas la santé maximale). Les unités
+        mortes ne sont retirées qu'après le lot : l'ordre des compétences ne
+        change pas le résultat.
+
+        Paramètres
+        ----------
+        casts : iterable[tuple[Unit, Skill, int, int]]
+            L'unité, la compétence et la case visée de chaque effet.
+
+        Retourne
+        --------
+        list[Unit]
+            Les unités mortes pendant le lot.
+        """
+        parts = []
+        for unit, skill, target_x, target_y in casts:
+            xs, ys, amounts = self.skill_footprint(unit, skill, target_x, target_y)
+            slots = self.occupancy.slots[xs, ys]
+            hit = slots != NO_UNIT
+            if hit.any():
+                # Les soins touchent l'équipe de l'unité, les dégâts ses adversaires
+                parts.append((slots[hit], amounts[hit], TEAM_IDS[unit.team], EFFECTS[skill.effect] > 0))
+        if not parts:
+            return []
+        table = self.units
+        slots = np.concatenate([part[0] for part in parts])
+        amounts = np.concatenate([part[1] for part in parts])
+        teams = np.concatenate([np.full(len(part[0]), part[2]) for part in parts])
+        allies = np.concatenate([np.full(len(part[0]), part[3]) for part in parts])
+        rows = self.occupancy.rows[slots]
+        keep = (table.team[rows] == teams) == allies
+        rows, which = np.unique(rows[keep], return_inverse=True)
+        change = np.bincount(which.ravel(), weights=amounts[keep], minlength=len(rows)).astype(np.int64)
+        old = table.health[rows].astype(np.int64)
+        new = np.minimum(old + change, np.maximum(table.max_health[rows], old))
+        changed = new != old
+        rows, old, new = rows[changed], old[changed], new[changed]
+        if not len(rows):
+            return []
+        if self.undo_stack is not None:
+            self.undo_stack.extend(("health", table.handle(row), health)
+                                   for row, health in zip(rows.tolist(), old.tolist()))
+        table.health[rows] = new
+        self._units_hash ^= xor_all(feature_keys(HEALTH, rows, old)) ^ xor_all(feature_keys(HEALTH, rows, new))
+        dead = [table.handle(row) for row in rows[new <= 0].tolist()]
+        for unit in dead:
+            self.remove_unit(unit)
+        return dead
+
+    def flow_field(self):
+        """
+        Retourne la carte des distances aux unités du joueur, partagée par tous les ennemis.
+
+        Le calcul s'arrête au front qui atteint le dernier ennemi : son coût
+        dépend de la distance entre les équipes, pas de la taille de la carte.
+
+        Retourne
+        --------
+        numpy.ndarray
+            Distances indexées par [x, y] (voir `distance_map`).
+        """
+        return distance_map(self.grid, [(unit.x, unit.y) for unit in self.player_units],
+                            [(unit.x, unit.y) for unit in self.enemy_units])
+
+    def plan_enemy(self, enemy, field, steps=1):
+        """
+        Choisit les actions d'un ennemi pour ce tour.
+
+        L'ennemi descend la carte des distances vers l'unité du joueur la plus
+        proche, puis attaque la plus faible des unités à son contact.
+
+        Paramètres
+        ----------
+        enemy : Unit
+            L'unité ennemie à jouer.
+        field : numpy.ndarray
+            Carte des distances aux unités du joueur.
+        steps : int
+            Nombre maximal de cases parcourues.
+
+        Retourne
+        --------
+        list[MoveAction | AttackAction]
+            Les actions à appliquer dans l'ordre.
+        """
+        actions = []
+        x, y = enemy.x, enemy.y
+        for _ in range(steps):
+            if field[x, y] <= 1:
+                break
+            cell = downhill_step(self.grid, field, x, y)
+            if cell is None:
+                break
+            x, y = cell
+        if (x, y) != (enemy.x, enemy.y):
+            actions.append(MoveAction(enemy, x, y))
+
+        in_reach = [unit for unit in self.units_within(x, y, 1) if unit.team == 'player']
+        if in_reach:
+            target = min(in_reach, key=lambda unit: unit.health)
+            actions.append(AttackAction(enemy, target))
+        return actions
+
+    def handle_enemy_turn(self):
+        """
+        IA des ennemis : une seule carte des distances est calculée pour tout le tour,
+        puis chaque ennemi la descend.
+        """
+        field = self.flow_field()
+        players_left = len(self.player_units)
+        for enemy in list(self.enemy_units):
+            if not self.player_units:
+                return
+            if len(self.player_units) != players_left:
+                # Une unité du joueur est morte : sa case n'est plus une destination
+                field = self.flow_field()
+                players_left = len(self.player_units)
+            for action in self.plan_enemy(enemy, field):
+                self.apply(action)
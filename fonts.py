@@ -0,0 +1,117 @@
+from collections import OrderedDict
+
+import pygame
+
+from unit import *
+
+# Police utilisée par défaut pour le texte de l'interface
+DEFAULT_FONT = ("monospace", 20)
+
+
+class FontRegistry:
+    """
+    Polices chargées une seule fois.
+
+    `pygame.font.SysFont` parcourt les polices du système à chaque appel ;
+    le registre garde chaque police chargée sous la clé (nom, taille).
+    """
+
+    def __init__(self):
+        self._fonts = {}
+
+    def get(self, name, size):
+        """
+        Retourne la police `name` en taille `size`, chargée au premier appel.
+
+        Paramètres
+        ----------
+        name : str
+            Nom de la police système (ex. : "monospace").
+        size : int
+            Taille en points.
+        """
+        key = (name, size)
+        font = self._fonts.get(key)
+        if font is None:
+            font = self._fonts[key] = pygame.font.SysFont(name, size)
+        return font
+
+
+class TextCache:
+    """
+    Cache LRU des surfaces de texte rendues, borné en mémoire.
+
+    Les surfaces sont indexées par (texte, police, couleur, anticrénelage)
+    et les moins récemment utilisées sont libérées dès que le total des
+    pixels dépasse `max_bytes`.
+
+    Attributs
+    ---------
+    fonts : FontRegistry
+        Le registre des polices.
+    max_bytes : int
+        Mémoire maximale occupée par les surfaces en cache.
+    size_bytes : int
+        Mémoire occupée actuellement.
+    hits, misses, evictions : int
+        Statistiques cumulées du cache.
+    """
+
+    def __init__(self, fonts=None, max_bytes=4 * 1024 * 1024):
+        self.fonts = fonts if fonts is not None else FontRegistry()
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._surfaces = OrderedDict()
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    def render(self, text, font=DEFAULT_FONT, color=WHITE, antialias=True):
+        """
+        Retourne la surface du texte, rendue au premier appel seulement.
+
+        Paramètres
+        ----------
+        text : str
+            Le texte à rendre.
+        font : tuple[str, int]
+            Nom et taille de la police.
+        color : tuple[int, int, int]
+            Couleur du texte.
+        antialias : bool
+            Si le texte est anticrénelé.
+
+        Retourne
+        --------
+        pygame.Surface
+            Surface partagée : elle ne doit pas être modifiée.
+        """
+        key = (text, font, color, antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self.fonts.get(*font).render(text, antialias, color)
+        self._surfaces[key] = surface
+        self.size_bytes += surface_bytes(surface)
+        while self.size_bytes > self.max_bytes and len(self._surfaces) > 1:
+            _, evicted = self._surfaces.popitem(last=False)
+            self.size_bytes -= surface_bytes(evicted)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        """Vide le cache."""
+        self._surfaces.clear()
+        self.size_bytes = 0
+
+
+def surface_bytes(surface):
+    """Retourne la mémoire occupée par les pixels d'une surface."""
+    return surface.get_pitch() * surface.get_height()
@@ -1,463 +1,676 @@
-import pygame
-import random
-
-from unit import *
-
-
-# Ajouter un nouveau type de classe pour gérer les cases
-class Cell:
-    def __init__(self, x, y, cell_type):
-        """
-        Initialise une case avec ses coordonnées et son type.
-
-        Paramètres
-        ----------
-        x : int
-            Coordonnée x sur la grille.
-        y : int
-            Coordonnée y sur la grille.
-        cell_type : str
-            Type de la case ("traversable", "non_traversable").
-        """
-        self.x = x
-        self.y = y
-        self.cell_type = cell_type
-
-    def draw(self, screen):
-        """
-        Dessine la case sur l'écran avec des couleurs différentes en fonction de son type.
-        """
-        if self.cell_type == "traversable":
-            color = (144, 238, 144)  # Vert clair
-        elif self.cell_type == "non_traversable":
-            color = (220, 20, 60)  # Rouge foncé
-        else:
-            color = (211, 211, 211)  # Gris clair (par défaut)
-
-        # Dessiner la case
-        pygame.draw.rect(
-            screen,
-            color,
-            (self.x * CELL_SIZE, self.y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-        )
-
-
-# Ajouter une grille au jeu
-class Game:
-    def __init__(self, screen):
-        self.screen = screen
-        self.grid = [
-            [Cell(x, y, "traversable" if random.random() > 0.2 else "non_traversable")
-             for y in range(GRID_SIZE)]
-            for x in range(GRID_SIZE)
-        ]
-        self.player_units = [Unit(0, 0, 10, 2, "player")]
-        self.enemy_units = [Unit(6, 6, 8, 1, "enemy")]
-
-    def flip_display(self):
-        """
-        Met à jour l'affichage du jeu, y compris la grille et les unités.
-        """
-        self.screen.fill(BLACK)
-
-        # Afficher la grille
-        for row in self.grid:
-            for cell in row:
-                cell.draw(self.screen)
-
-        # Afficher les unités
-        for unit in self.player_units + self.enemy_units:
-            unit.draw(self.screen)
-
-        pygame.display.flip()
-
-
-class Game:
-    """
-    Classe pour représenter le jeu.
-
-    ...
-    Attributs
-    ---------
-    screen: pygame.Surface
-        La surface de la fenêtre du jeu.
-    player_units : list[Unit]
-        La liste des unités du joueur.
-    enemy_units : list[Unit]
-        La liste des unités de l'adversaire.
-    """
-
-    def __init__(self, screen):
-
-        self.grid=[
-            [Cell(x,y,"traversable" if random.random()>0.2 else "non_traversable")
-             for y in range (GRID_SIZE)]
-            for x in range(GRID_SIZE)
-        ]
-        """
-        Construit le jeu avec la surface de la fenêtre.
-
-        Paramètres
-        ----------
-        screen : pygame.Surface
-            La surface de la fenêtre du jeu.
-        """
-        self.screen = screen
-        self.player_units = [Unit(0, 0, 10, 2, 'player'),
-                             Unit(1, 0, 10, 2, 'player')]
-
-        self.enemy_units = [Unit(6, 6, 8, 1, 'enemy'),
-                            Unit(7, 6, 8, 1, 'enemy')]
-
-    def handle_player_turn(self):
-        """
-        Gère le tour du joueur.
-        Permet au joueur de déplacer une unité ou d'utiliser une compétence.
-        """
-        for selected_unit in self.player_units:
-            has_acted = False
-            selected_unit.is_selected = True
-
-            # Position initiale du curseur
-            cursor_x, cursor_y = selected_unit.x, selected_unit.y
-
-            while not has_acted:
-                # Afficher la grille et les unités
-                self.flip_display()
-
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        pygame.quit()
-                        exit()
-
-                    # Gestion des touches
-                    if event.type == pygame.KEYDOWN:
-                        # Déplacement du curseur
-                        if event.key == pygame.K_LEFT and cursor_x > 0:
-                            cursor_x -= 1
-                        elif event.key == pygame.K_RIGHT and cursor_x < GRID_SIZE - 1:
-                            cursor_x += 1
-                        elif event.key == pygame.K_UP and cursor_y > 0:
-                            cursor_y -= 1
-                        elif event.key == pygame.K_DOWN and cursor_y < GRID_SIZE - 1:
-                            cursor_y += 1
-
-                        # Validation du déplacement
-                        elif event.key == pygame.K_SPACE:
-                            if (cursor_x, cursor_y) in self.get_accessible_cells(selected_unit):
-                                self.move_unit(selected_unit, cursor_x, cursor_y)
-                                has_acted = True  # Fin du tour
-                                selected_unit.is_selected = False
-
-                        # Gestion des compétences avec des lettres
-                        elif event.key in [pygame.K_a, pygame.K_b, pygame.K_c]:
-                            skill_index = {'a': 0, 'b': 1, 'c': 2}[pygame.key.name(event.key)]
-                            if 0 <= skill_index < len(selected_unit.skills):
-                                selected_skill = selected_unit.skills[skill_index]
-                                self.target_with_skill(selected_unit, selected_skill)
-                                has_acted = True  # Fin du tour
-                                selected_unit.is_selected = False
-
-                    # Dessiner le curseur
-                    pygame.draw.rect(
-                        self.screen,
-                        (0, 0, 255),  # Bleu vif
-                        (cursor_x * CELL_SIZE, cursor_y * CELL_SIZE, CELL_SIZE, CELL_SIZE),
-                        3  # Épaisseur
-                    )
-
-                    pygame.display.flip()
-
-    def target_with_skill(self, unit, skill):
-        """
-        Permet au joueur de cibler une case avec une compétence.
-
-        Paramètres
-        ----------
-        unit : Unit
-            L'unité qui utilise la compétence.
-        skill : Skill
-            La compétence utilisée.
-        """
-        targeting = True
-        cursor_x, cursor_y = unit.x, unit.y
-
-        # Calculer les cases ciblables
-        targetable_cells = self.get_targetable_cells(unit, skill)
-
-        while targeting:
-            self.flip_display()
-
-            # Afficher les cases ciblables en jaune
-            for x, y in targetable_cells:
-                pygame.draw.rect(
-                    self.screen,
-                    (255, 255, 0),  # Jaune
-                    (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE),
-                    3  # Contour épais
-                )
-
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    exit()
-
-                # Déplacer le curseur
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_LEFT and cursor_x > 0:
-                        cursor_x -= 1
-                    elif event.key == pygame.K_RIGHT and cursor_x < GRID_SIZE - 1:
-                        cursor_x += 1
-                    elif event.key == pygame.K_UP and cursor_y > 0:
-                        cursor_y -= 1
-                    elif event.key == pygame.K_DOWN and cursor_y < GRID_SIZE - 1:
-                        cursor_y += 1
-
-                    # Valider la cible
-                    if event.key == pygame.K_SPACE:
-                        if (cursor_x, cursor_y) in targetable_cells:
-                            self.apply_skill_effect(unit, cursor_x, cursor_y, skill)
-                            targeting = False
-
-            # Dessiner le curseur en rouge
-            pygame.draw.rect(
-                self.screen,
-                (255, 0, 0),  # Rouge
-                (cursor_x * CELL_SIZE, cursor_y * CELL_SIZE, CELL_SIZE, CELL_SIZE),
-                3
-            )
-            pygame.display.flip()
-
-    def draw_accessible_cells(self, accessible_cells):
-        """
-        Dessine une surbrillance sur les cases accessibles.
-
-        Paramètres
-        ----------
-        accessible_cells : list[tuple[int, int]]
-            Liste des coordonnées des cases accessibles.
-        """
-        for x, y in accessible_cells:
-            pygame.draw.rect(
-                self.screen,
-                (30, 144, 255),  # Bleu clair pour les cases accessibles
-                (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE),
-                3  # Épaisseur du contour
-            )
-
-    def handle_enemy_turn(self):
-        """IA très simple pour les ennemis."""
-        for enemy in self.enemy_units:
-
-            # Déplacement aléatoire
-            target = random.choice(self.player_units)
-            dx = 1 if enemy.x < target.x else -1 if enemy.x > target.x else 0
-            dy = 1 if enemy.y < target.y else -1 if enemy.y > target.y else 0
-            enemy.move(dx, dy)
-
-            # Attaque si possible
-            if abs(enemy.x - target.x) <= 1 and abs(enemy.y - target.y) <= 1:
-                enemy.attack(target)
-                if target.health <= 0:
-                    self.player_units.remove(target)
-
-
-
-    def get_accessible_cells(self, unit ,max_distance=3):
-        accessible_cells =[]
-        for dx in range(-max_distance, max_distance + 1):
-            for dy in range(-max_distance, max_distance + 1):
-                x, y = unit.x + dx, unit.y + dy
-                if 0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE:
-                    cell = self.grid[x][y]
-                    if cell.cell_type == "traversable":
-                        accessible_cells.append((x, y))
-        return accessible_cells
-
-    def draw_accessible_cells(self, accessible_cells):
-        """
-        Dessine les cases accessibles sur la grille.
-
-        Paramètres
-        ----------
-        accessible_cells : list[tuple[int, int]]
-            Liste des coordonnées des cases accessibles.
-        """
-        for x, y in accessible_cells:
-            pygame.draw.rect(
-                self.screen,
-                (173, 216, 230),  # Couleur bleu pâle
-                (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-            )
-
-    def move_unit(self, unit, target_x, target_y):
-        """
-        Déplace une unité vers une case cible si elle est accessible.
-
-        Paramètres
-        ----------
-        unit : Unit
-            L'unité à déplacer.
-        target_x : int
-            Coordonnée x de la case cible.
-        target_y : int
-            Coordonnée y de la case cible.
-        """
-        # Vérifier les cases accessibles autour de l'unité
-        accessible_cells = self.get_accessible_cells(unit)
-        if (target_x, target_y) in accessible_cells:
-            self.animate_move(unit ,target_x,target_y)
-            unit.x = target_x
-            unit.y = target_y
-            self.flip_display()
-
-    def draw_skills(self, unit):
-        """
-        Affiche les compétences disponibles pour une unité.
-
-        Paramètres
-        ----------
-        unit : Unit
-            L'unité sélectionnée.
-        """
-        font = pygame.font.SysFont("monospace", 20)
-        skill_keys = ['A', 'B', 'C']  # Lettres associées aux compétences
-        for i, skill in enumerate(unit.skills):
-            skill_text = f"{skill_keys[i]}: {skill.name} (Range: {skill.range_min}-{skill.range_max})"
-            text_surface = font.render(skill_text, True, WHITE)
-            self.screen.blit(text_surface, (10, 10 + i * 25))
-
-    def flip_display(self):
-        """
-        Met à jour l'affichage du jeu, y compris la grille, les unités et les compétences.
-        """
-        # Remplir l'écran avec une couleur de fond (noir)
-        self.screen.fill(BLACK)
-
-        # Dessiner la grille
-        for row in self.grid:
-            for cell in row:
-                cell.draw(self.screen)  # Assurez-vous que chaque case est dessinée avec ses propriétés (couleur).
-
-        # Dessiner les unités
-
-
-        if self.player_units:
-            selected_unit = self.player_units[0]  # Exemple : première unité sélectionnée
-            accessible_cells = self.get_accessible_cells(selected_unit)
-            self.draw_accessible_cells(accessible_cells)
-        for unit in self.player_units + self.enemy_units:
-            unit.draw(self.screen)
-
-        # Dessiner les compétences disponibles si une unité est sélectionnée
-
-        if self.player_units:
-            self.draw_skills(self.player_units[0])
-        # Rafraîchir l'écran
-        pygame.display.flip()
-
-    def animate_move(self, unit, target_x, target_y):
-        """
-        Anime le déplacement d'une unité vers une case cible.
-
-        Paramètres
-        ----------
-        unit : Unit
-            L'unité à déplacer.
-        target_x : int
-            Coordonnée x cible (en cases).
-        target_y : int
-            Coordonnée y cible (en cases).
-        """
-        start_x, start_y = unit.x * CELL_SIZE, unit.y * CELL_SIZE
-        end_x, end_y = target_x * CELL_SIZE, target_y * CELL_SIZE
-        steps = 10  # Nombre de frames pour l'animation
-
-        for step in range(steps):
-            # Calculer la position intermédiaire
-            current_x = start_x + (end_x - start_x) * (step + 1) / steps
-            current_y = start_y + (end_y - start_y) * (step + 1) / steps
-
-            # Redessiner la grille et l'unité
-            self.flip_display()
-            pygame.draw.circle(
-                self.screen,
-                (0, 255, 0),  # Vert clair pour l'unité en déplacement
-                (int(current_x + CELL_SIZE // 2), int(current_y + CELL_SIZE // 2)),
-                CELL_SIZE // 3
-            )
-            pygame.display.flip()
-            pygame.time.delay(30)  # Délai entre les frames
-
-        # Mettre à jour la position finale de l'unité
-        unit.x = target_x
-        unit.y = target_y
-
-    def get_targetable_cells(self, unit, skill):
-        """
-        Retourne les cases ciblables pour une unité en fonction de la portée de la compétence.
-
-        Paramètres
-        ----------
-        unit : Unit
-            L'unité qui utilise la compétence.
-        skill : Skill
-            La compétence utilisée.
-
-        Retourne
-        --------
-        list[tuple[int, int]]
-            Liste des coordonnées des cases ciblables.
-        """
-        targetable_cells = []
-        for dx in range(-skill.range_max, skill.range_max + 1):
-            for dy in range(-skill.range_max, skill.range_max + 1):
-                x, y = unit.x + dx, unit.y + dy
-                distance = abs(dx) + abs(dy)  # Distance de Manhattan
-                if 0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE:
-                    if skill.range_min <= distance <= skill.range_max:
-                        targetable_cells.append((x, y))
-        return targetable_cells
-
-    def apply_skill_effect(self, unit, target_x, target_y, skill):
-        """
-        Applique l'effet d'une compétence à la cible.
-
-        Paramètres
-        ----------
-        unit : Unit
-            L'unité qui utilise la compétence.
-        target_x : int
-            Coordonnée x de la cible.
-        target_y : int
-            Coordonnée y de la cible.
-        skill : Skill
-            La compétence utilisée.
-        """
-        for enemy in self.enemy_units:
-            if enemy.x == target_x and enemy.y == target_y:
-                enemy.health -= skill.power
-                if enemy.health <= 0:
-                    self.enemy_units.remove(enemy)  # Retirer l'ennemi s'il n'a plus de santé
-
-
-def main():
-
-    # Initialisation de Pygame
-    pygame.init()
-
-    # Instanciation de la fenêtre
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("Mon jeu de stratégie")
-
-    # Instanciation du jeu
-    game = Game(screen)
-
-    # Boucle principale du jeu
-    while True:
-        game.handle_player_turn()
-        game.handle_enemy_turn()
-
-
-if __name__ == "__main__":
-    main()
+import numpy as np
+import pygame
+
+from camera import *
+from engine import *
+from fonts import *
+from profiler import *
+from render import *
+from sprites import *
+
+# Fichier écrit par la touche F4 quand le profilage est actif
+TRACE_PATH = "game_trace.json"
+
+# Facteur de zoom appliqué par les touches +/- et la molette
+ZOOM_STEP = 1.25
+
+# Voile posé sur les cases hors de vue du joueur (couleur, opacité), et couleur
+# transparente des cases en vue dans la surface du voile
+FOG_COLOR = (20, 20, 40)
+FOG_ALPHA = 150
+FOG_COLORKEY = (255, 0, 255)
+
+
+class MoveTween:
+    """
+    Animation non bloquante du déplacement d'une unité.
+
+    L'unité suit son chemin case par case, à vitesse constante, pour ne pas
+    traverser les murs ni les autres unités.
+
+    Attributs
+    ---------
+    unit : Unit
+        L'unité animée (déjà déplacée dans le moteur).
+    path : list[tuple[int, int]]
+        Les cases du chemin, départ et arrivée compris.
+    duration : int
+        Durée de l'animation en millisecondes.
+    elapsed : int
+        Temps écoulé depuis le début de l'animation.
+    on_done : callable | None
+        Fonction appelée à la fin de l'animation.
+    """
+
+    def __init__(self, unit, path, step_duration=100, on_done=None):
+        self.unit = unit
+        self.path = path
+        self.duration = step_duration * max(len(path) - 1, 1)
+        self.elapsed = 0
+        self.on_done = on_done
+
+    @property
+    def done(self):
+        return self.elapsed >= self.duration
+
+    def update(self, dt):
+        """Avance l'animation de `dt` millisecondes."""
+        self.elapsed = min(self.elapsed + dt, self.duration)
+
+    def position(self):
+        """Retourne la position courante en cases (coordonnées réelles)."""
+        if len(self.path) < 2:
+            return self.path[-1]
+        progress = self.elapsed / self.duration * (len(self.path) - 1)
+        step = min(int(progress), len(self.path) - 2)
+        t = progress - step
+        (x0, y0), (x1, y1) = self.path[step], self.path[step + 1]
+        return x0 + (x1 - x0) * t, y0 + (y1 - y0) * t
+
+
+class Game:
+    """
+    Classe pour représenter le jeu.
+
+    Le jeu n'est qu'une vue pygame au-dessus du moteur : toutes les règles
+    sont dans `Engine`, le jeu se charge de l'affichage et des entrées clavier.
+
+    ...
+    Attributs
+    ---------
+    screen: pygame.Surface
+        La surface de la fenêtre du jeu.
+    engine : Engine
+        Le moteur de jeu sans affichage.
+    grid : Grid
+        La grille du moteur.
+    player_units : list[Unit]
+        La liste des unités du joueur.
+    enemy_units : list[Unit]
+        La liste des unités de l'adversaire.
+    renderer : DirtyRectRenderer
+        Compose l'image par couches et ne pousse que les zones modifiées.
+    cursor : tuple[int, int, tuple] | None
+        Position et couleur du curseur affiché.
+    targetable_cells : list[tuple[int, int]]
+        Cases ciblables surlignées pendant le choix d'une cible.
+    tweens : list[MoveTween]
+        Animations en cours.
+    selected : Unit | None
+        L'unité du joueur qui doit agir.
+    skill : Skill | None
+        La compétence en cours de ciblage, None en mode déplacement.
+    running : bool
+        Passe à False quand la fenêtre est fermée ou que la partie est finie.
+    profiler : Profiler
+        Instrumentation des phases de la boucle (F3 pour l'activer et
+        l'afficher, F4 pour exporter la trace).
+    text_cache : TextCache
+        Surfaces de texte déjà rendues.
+    camera : Camera
+        La partie de la carte affichée dans la fenêtre (flèches pour suivre
+        le curseur, +/- ou molette pour zoomer, clic droit glissé pour défiler).
+    chunks : ChunkCache
+        Morceaux de terrain déjà rendus.
+    atlases : dict[int, SpriteAtlas]
+        Sprites pré-rendus des unités et des barres de vie, par taille de case.
+    controller : MCTSController | None
+        IA qui joue le tour des ennemis ; l'IA par défaut du moteur si None.
+    fog_team : str | None
+        Équipe dont le brouillard de guerre est affiché : les cases qu'elle
+        ne voit pas sont voilées et les adversaires qui s'y trouvent cachés.
+        None pour tout afficher.
+    """
+
+    def __init__(self, screen, engine=None, profiler=None, controller=None):
+        """
+        Construit le jeu avec la surface de la fenêtre.
+
+        Paramètres
+        ----------
+        screen : pygame.Surface
+            La surface de la fenêtre du jeu.
+        engine : Engine, optionnel
+            Le moteur à afficher. Un nouveau moteur est créé si absent.
+        profiler : Profiler, optionnel
+            Le profileur à utiliser. Un profileur désactivé est créé si absent.
+        controller : MCTSController, optionnel
+            IA des ennemis (tout objet avec une méthode `play_turn(engine)`).
+        """
+        self.screen = screen
+        self.engine = engine if engine is not None else Engine()
+        self.controller = controller
+        self.grid = self.engine.grid
+        self.profiler = profiler if profiler is not None else Profiler()
+        self.text_cache = TextCache()
+        self.profiler.track_cache("reach", lambda: (self.engine.reachability_hits,
+                                                    self.engine.reachability_misses))
+        self.profiler.track_cache("text", lambda: (self.text_cache.hits, self.text_cache.misses))
+        self.camera = Camera(screen.get_width(), screen.get_height(), self.engine.size)
+        self.chunks = ChunkCache()
+        self.profiler.track_cache("chunks", lambda: (self.chunks.hits, self.chunks.misses))
+        self.atlases = {}
+        self.renderer = DirtyRectRenderer(screen, self.draw_entries, self.profiler)
+        self.renderer.set_background(self.draw_background)
+        self.view_version = None
+        self.fog_team = 'player'
+        self._fog_shown = None
+        self._fog_surface = None
+        self._fog_key = None
+        self.cursor = None
+        self.targetable_cells = []
+        self.tweens = []
+        self.clock = pygame.time.Clock()
+        self.selected = None
+        self.skill = None
+        self.turn_units = []
+        self.pending_keys = []
+        self.needs_redraw = True
+        self.running = True
+
+    @property
+    def player_units(self):
+        return self.engine.player_units
+
+    @property
+    def enemy_units(self):
+        return self.engine.enemy_units
+
+    @property
+    def sprites(self):
+        """Atlas des sprites à la taille de case courante, rendu au premier usage."""
+        size = self.camera.cell_size
+        atlas = self.atlases.get(size)
+        if atlas is None:
+            atlas = self.atlases[size] = SpriteAtlas(size)
+        return atlas
+
+    def start_player_turn(self):
+        """Commence le tour du joueur : chaque unité du joueur agira une fois."""
+        self.turn_units = list(self.player_units)
+        self.select_next_unit()
+
+    def select_next_unit(self):
+        """
+        Sélectionne la prochaine unité du joueur qui doit agir.
+        Quand toutes ont agi, joue le tour des ennemis puis recommence.
+        """
+        if self.selected is not None:
+            self.selected.is_selected = False
+        self.selected = None
+        self.skill = None
+        self.targetable_cells = []
+        self.needs_redraw = True
+
+        while self.turn_units:
+            unit = self.turn_units.pop(0)
+            if unit in self.player_units:
+                self.selected = unit
+                unit.is_selected = True
+                self.cursor = (unit.x, unit.y, (0, 0, 255))  # Bleu vif
+                self.camera.ensure_visible(unit.x, unit.y)
+                return
+
+        self.handle_enemy_turn()
+        if self.engine.winner() is not None:
+            self.running = False
+            return
+        self.start_player_turn()
+
+    def handle_event(self, event):
+        """
+        Traite un événement pygame.
+
+        Les touches pressées pendant une animation sont mises de côté et
+        traitées à la fin de celle-ci.
+        """
+        if event.type == pygame.QUIT:
+            self.running = False
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            self.profiler.enabled = not self.profiler.enabled
+            self.needs_redraw = True
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+            self.profiler.export_chrome_trace(TRACE_PATH)
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+            self.zoom(ZOOM_STEP)
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            self.zoom(1 / ZOOM_STEP)
+        elif event.type == pygame.MOUSEWHEEL and event.y:
+            self.zoom(ZOOM_STEP ** event.y, pygame.mouse.get_pos())
+        elif event.type == pygame.MOUSEMOTION and event.buttons[2]:
+            self.camera.pan(-event.rel[0], -event.rel[1])
+            self.needs_redraw = True
+        elif event.type == pygame.KEYDOWN:
+            if self.tweens:
+                self.pending_keys.append(event.key)
+            else:
+                self.handle_key(event.key)
+
+    def handle_key(self, key):
+        """
+        Gère une touche pendant le tour du joueur : déplacement du curseur,
+        validation d'un déplacement ou d'une cible, choix d'une compétence.
+        """
+        unit = self.selected
+        if unit is None:
+            return
+        cursor_x, cursor_y, color = self.cursor
+
+        # Déplacement du curseur
+        if key == pygame.K_LEFT and cursor_x > 0:
+            cursor_x -= 1
+        elif key == pygame.K_RIGHT and cursor_x < self.engine.size - 1:
+            cursor_x += 1
+        elif key == pygame.K_UP and cursor_y > 0:
+            cursor_y -= 1
+        elif key == pygame.K_DOWN and cursor_y < self.engine.size - 1:
+            cursor_y += 1
+
+        # Validation du déplacement ou de la cible
+        elif key == pygame.K_SPACE:
+            if self.skill is not None:
+                if (cursor_x, cursor_y) in self.targetable_cells:
+                    self.engine.apply(SkillAction(unit, self.skill, cursor_x, cursor_y))
+                    self.select_next_unit()  # Fin du tour de l'unité
+                return
+            if (cursor_x, cursor_y) in self.engine.get_reachability(unit):
+                self.move_unit(unit, cursor_x, cursor_y)
+            return
+
+        # Gestion des compétences avec des lettres
+        elif key in [pygame.K_a, pygame.K_b, pygame.K_c] and self.skill is None:
+            skill_index = {'a': 0, 'b': 1, 'c': 2}[pygame.key.name(key)]
+            if 0 <= skill_index < len(unit.skills):
+                self.target_with_skill(unit, unit.skills[skill_index])
+            return
+
+        self.cursor = (cursor_x, cursor_y, color)
+        self.camera.ensure_visible(cursor_x, cursor_y)
+        self.needs_redraw = True
+
+    def zoom(self, factor, anchor=None):
+        """
+        Multiplie le zoom de la caméra par `factor`.
+
+        Paramètres
+        ----------
+        factor : float
+            Facteur appliqué au zoom courant.
+        anchor : tuple[int, int], optionnel
+            Point de l'écran qui reste fixe (le centre par défaut).
+        """
+        self.camera.set_zoom(self.camera.zoom * factor, anchor)
+        self.needs_redraw = True
+
+    def target_with_skill(self, unit, skill):
+        """
+        Passe en mode ciblage : les cases ciblables sont surlignées en jaune
+        et le curseur devient rouge.
+
+        Paramètres
+        ----------
+        unit : Unit
+            L'unité qui utilise la compétence.
+        skill : Skill
+            La compétence utilisée.
+        """
+        self.skill = skill
+        self.targetable_cells = self.engine.get_targetable_cells(unit, skill)
+        self.cursor = (unit.x, unit.y, (255, 0, 0))  # Rouge
+        self.needs_redraw = True
+
+    def handle_enemy_turn(self):
+        """Joue le tour des ennemis dans le moteur."""
+        self.engine.end_turn()
+        with self.profiler.phase("enemy_turn"):
+            if self.controller is not None:
+                self.controller.play_turn(self.engine)
+            else:
+                self.engine.handle_enemy_turn()
+        self.engine.end_turn()
+        self.needs_redraw = True
+
+    def update(self, dt):
+        """
+        Fait avancer les animations de `dt` millisecondes.
+
+        Paramètres
+        ----------
+        dt : int
+            Temps écoulé depuis la dernière image, en millisecondes.
+        """
+        if not self.tweens:
+            return
+        for tween in self.tweens:
+            tween.update(dt)
+        finished = [tween for tween in self.tweens if tween.done]
+        self.tweens = [tween for tween in self.tweens if not tween.done]
+        self.needs_redraw = True
+        for tween in finished:
+            if tween.on_done is not None:
+                tween.on_done()
+        while self.pending_keys and not self.tweens and self.running:
+            self.handle_key(self.pending_keys.pop(0))
+
+    def run(self):
+        """
+        Boucle principale du jeu.
+
+        Sans animation en cours, la boucle dort dans `pygame.event.wait` et ne
+        consomme pas de CPU ; pendant une animation, elle est cadencée à FPS
+        images par seconde. L'écran n'est redessiné que si l'état a changé.
+        """
+        self.start_player_turn()
+        while self.running:
+            if self.tweens:
+                dt = self.clock.tick(FPS)
+                events = pygame.event.get()
+            else:
+                events = [pygame.event.wait()] + pygame.event.get()
+                self.clock.tick()  # Le temps passé à attendre ne compte pas
+                dt = 0
+            self.profiler.begin_frame()
+            with self.profiler.phase("input"):
+                for event in events:
+                    self.handle_event(event)
+            with self.profiler.phase("logic"):
+                self.update(dt)
+            if self.needs_redraw and self.running:
+                self.flip_display()
+            self.profiler.end_frame()
+
+    def draw_accessible_cell(self, x, y):
+        """
+        Dessine une case accessible sur la grille.
+
+        Paramètres
+        ----------
+        x : int
+            Coordonnée x de la case.
+        y : int
+            Coordonnée y de la case.
+        """
+        pygame.draw.rect(
+            self.screen,
+            (173, 216, 230),  # Couleur bleu pâle
+            self.camera.cell_rect(x, y)
+        )
+
+    def move_unit(self, unit, target_x, target_y):
+        """
+        Déplace une unité vers une case cible si elle est accessible, puis
+        lance l'animation ; l'unité suivante est sélectionnée à la fin de celle-ci.
+
+        Paramètres
+        ----------
+        unit : Unit
+            L'unité à déplacer.
+        target_x : int
+            Coordonnée x de la case cible.
+        target_y : int
+            Coordonnée y de la case cible.
+        """
+        path = self.engine.get_reachability(unit).path_to(target_x, target_y)
+        if self.engine.apply(MoveAction(unit, target_x, target_y)):
+            self.animate_move(unit, path, on_done=self.select_next_unit)
+
+    def skill_lines(self, unit):
+        """
+        Retourne les lignes de texte décrivant les compétences d'une unité.
+
+        Paramètres
+        ----------
+        unit : Unit
+            L'unité sélectionnée.
+        """
+        skill_keys = ['A', 'B', 'C']  # Lettres associées aux compétences
+        return [f"{skill_keys[i]}: {skill.name} (Range: {skill.range_min}-{skill.range_max})"
+                for i, skill in enumerate(unit.skills)]
+
+    def draw_text(self, top, text):
+        """
+        Affiche une ligne de texte sur le bord gauche de l'écran.
+
+        Paramètres
+        ----------
+        top : int
+            Ordonnée du haut de la ligne, en pixels.
+        text : str
+            Le texte à afficher.
+        """
+        text_surface = self.text_cache.render(text)
+        self.screen.blit(text_surface, (10, top))
+
+    def selected_unit(self):
+        """Retourne l'unité sélectionnée, ou la première unité du joueur par défaut."""
+        for unit in self.player_units:
+            if unit.is_selected:
+                return unit
+        return self.player_units[0] if self.player_units else None
+
+    def frame_entries(self):
+        """
+        Décrit l'image à afficher, couche par couche.
+
+        Retourne
+        --------
+        list[tuple[tuple, pygame.Rect]]
+            Les entrées (signature, zone) dans l'ordre de dessin : surbrillances,
+            unités, unité animée, cases ciblables, curseur puis texte.
+        """
+        entries = []
+        selected_unit = self.selected_unit()
+        camera = self.camera
+        size = camera.cell_size
+        x0, x1, y0, y1 = camera.visible_cells()
+
+        def visible(x, y):
+            return x0 <= x < x1 and y0 <= y < y1
+
+        # Couche de surbrillance des déplacements (en cache dans le moteur)
+        if selected_unit is not None:
+            for x, y in self.engine.get_accessible_cells(selected_unit):
+                if visible(x, y):
+                    entries.append((("accessible", x, y), camera.cell_rect(x, y)))
+
+        # Couche des unités, barre de vie comprise ; les unités animées sont dessinées à part.
+        # Seules les unités dans la vue sont parcourues (une ligne de plus pour les barres de vie).
+        animated = [tween.unit for tween in self.tweens]
+        fog = self.fog_mask()
+        for unit in self.engine.occupancy.in_area(x0, x1, y0, y1 + 1):
+            if fog is not None and unit.team != self.fog_team and not fog[unit.x, unit.y]:
+                continue
+            if unit not in animated:
+                rect = camera.cell_rect(unit.x, unit.y)
+                entries.append((("unit", unit, unit.x, unit.y, unit.health, unit.is_selected),
+                                pygame.Rect(rect.x, rect.y - 5, size, size + 5)))
+        for tween in self.tweens:
+            x, y = camera.to_screen(*tween.position())
+            entries.append((("moving", x, y), pygame.Rect(x, y, size, size)))
+
+        # Couche de ciblage
+        for x, y in self.targetable_cells:
+            if visible(x, y):
+                entries.append((("target", x, y), camera.cell_rect(x, y)))
+        if self.cursor is not None:
+            x, y, color = self.cursor
+            entries.append((("cursor", x, y, color), camera.cell_rect(x, y)))
+
+        # Couche d'interface : compétences disponibles
+        width = self.screen.get_width()
+        if selected_unit is not None:
+            for line, text in enumerate(self.skill_lines(selected_unit)):
+                entries.append((("text", 10 + line * 25, text), pygame.Rect(0, 10 + line * 25, width, 25)))
+
+        # Affichage des performances quand le profilage est actif
+        if self.profiler.enabled:
+            lines = self.profiler.overlay_lines()
+            top = self.screen.get_height() - 10 - 25 * len(lines)
+            for line, text in enumerate(lines):
+                entries.append((("text", top + line * 25, text), pygame.Rect(0, top + line * 25, width, 25)))
+        return entries
+
+    def draw_entries(self, entries):
+        """
+        Dessine des entrées de l'image décrite par `frame_entries`.
+
+        Les unités sont des sprites de l'atlas : les unités qui se suivent
+        dans l'ordre de dessin sont copiées en un seul appel à `Surface.blits`.
+
+        Paramètres
+        ----------
+        entries : list[tuple]
+            Les signatures des entrées, dans l'ordre de dessin.
+        """
+        sprites = self.sprites
+        batch = []
+        for entry in entries:
+            kind = entry[0]
+            if kind == "unit":
+                batch.extend(sprites.unit_blits(entry[1], self.camera.to_screen(entry[2], entry[3])))
+            elif kind == "moving":
+                batch.append((sprites.moving, (entry[1], entry[2])))
+            else:
+                if batch:
+                    self.screen.blits(batch, doreturn=False)
+                    batch = []
+                self.draw_entry(entry)
+        if batch:
+            self.screen.blits(batch, doreturn=False)
+
+    def draw_entry(self, entry):
+        """
+        Dessine une entrée de l'image qui n'est pas un sprite.
+
+        Paramètres
+        ----------
+        entry : tuple
+            La signature de l'entrée ; son premier élément donne son type.
+        """
+        kind = entry[0]
+        if kind == "accessible":
+            self.draw_accessible_cell(entry[1], entry[2])
+        elif kind == "target":
+            draw_outline(
+                self.screen,
+                (255, 255, 0),  # Jaune
+                self.camera.cell_rect(entry[1], entry[2]),
+                3  # Contour épais
+            )
+        elif kind == "cursor":
+            draw_outline(
+                self.screen,
+                entry[3],
+                self.camera.cell_rect(entry[1], entry[2]),
+                3  # Épaisseur
+            )
+        elif kind == "text":
+            self.draw_text(entry[1], entry[2])
+
+    def fog_mask(self):
+        """Retourne le masque des cases vues par `fog_team`, ou None si le brouillard est désactivé."""
+        if self.fog_team is None:
+            return None
+        return self.engine.team_visibility(self.fog_team)
+
+    def draw_background(self, area):
+        """Dessine le terrain visible dans la zone `area` de l'écran (morceaux en cache), puis le brouillard."""
+        self.chunks.draw(self.screen, self.grid, self.camera, area)
+        fog = self.fog_mask()
+        if fog is not None:
+            self.draw_fog(fog, area)
+
+    def draw_fog(self, fog, area):
+        """
+        Voile les cases hors de vue dans la zone `area` de l'écran.
+
+        Le voile des cases visibles est rendu en une surface, comme le
+        terrain, et gardé tant que ni la vue ni le brouillard ne changent.
+
+        Paramètres
+        ----------
+        fog : numpy.ndarray
+            Masque des cases en vue, indexé par [x, y].
+        area : pygame.Rect
+            La zone de l'écran à dessiner.
+        """
+        camera = self.camera
+        if self._fog_key is None or self._fog_key[0] is not fog or self._fog_key[1] != camera.version:
+            x0, x1, y0, y1 = camera.visible_cells()
+            colors = np.where(fog[x0:x1, y0:y1, None], FOG_COLORKEY, FOG_COLOR).astype(np.uint8)
+            size = camera.cell_size
+            surface = pygame.transform.scale(pygame.surfarray.make_surface(colors),
+                                             ((x1 - x0) * size, (y1 - y0) * size))
+            surface.set_colorkey(FOG_COLORKEY)
+            surface.set_alpha(FOG_ALPHA)
+            self._fog_surface = (surface, camera.to_screen(x0, y0))
+            self._fog_key = (fog, camera.version)
+        surface, position = self._fog_surface
+        clip = self.screen.get_clip()
+        self.screen.set_clip(area)
+        self.screen.blit(surface, position)
+        self.screen.set_clip(clip)
+
+    def flip_display(self):
+        """
+        Met à jour l'affichage du jeu, y compris la grille, les unités et les compétences.
+
+        Le terrain est découpé en morceaux rendus une fois puis gardés en
+        cache ; seuls les morceaux et les unités dans la vue de la caméra
+        sont dessinés, et seules les zones dont le contenu a changé depuis
+        l'image précédente sont redessinées et poussées à l'écran. Un
+        déplacement de la caméra ou un changement du brouillard de guerre
+        redessine toute la fenêtre.
+        """
+        fog = self.fog_mask()
+        view_version = (self.camera.version, self.grid.version)
+        if self.view_version != view_version or self._fog_shown is not fog:
+            self.renderer.invalidate()
+            self.view_version = view_version
+            self._fog_shown = fog
+        with self.profiler.phase("draw:scene"):
+            entries = self.frame_entries()
+        self.renderer.render(entries)
+        self.needs_redraw = False
+
+    def animate_move(self, unit, path, on_done=None):
+        """
+        Lance l'animation du déplacement d'une unité le long de son chemin.
+
+        Paramètres
+        ----------
+        unit : Unit
+            L'unité déplacée, déjà sur sa case d'arrivée.
+        path : list[tuple[int, int]]
+            Le chemin suivi, pris avant le déplacement (voir `ReachabilityMap.path_to`).
+        on_done : callable, optionnel
+            Fonction appelée à la fin de l'animation.
+        """
+        self.tweens.append(MoveTween(
+            unit,
+            path or [(unit.x, unit.y)],
+            on_done=on_done
+        ))
+        self.needs_redraw = True
+
+
+def main():
+
+    # Initialisation de Pygame
+    pygame.init()
+
+    # Instanciation de la fenêtre
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Mon jeu de stratégie")
+
+    # Instanciation du jeu
+    game = Game(screen)
+
+    # Boucle principale du jeu
+    game.run()
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
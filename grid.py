@@ -0,0 +1,159 @@
+from collections import deque
+
+import numpy as np
+
+# Codes de terrain stockés dans Grid.terrain
+TRAVERSABLE = 0
+NON_TRAVERSABLE = 1
+CELL_TYPES = ("traversable", "non_traversable")
+TERRAIN_CODES = {cell_type: code for code, cell_type in enumerate(CELL_TYPES)}
+
+# Codes d'occupation stockés dans Grid.occupancy
+EMPTY = 0
+TEAM_CODES = {'player': 1, 'enemy': 2}
+
+# Nombre de changements de terrain gardés dans Grid.terrain_changes
+TERRAIN_HISTORY = 1024
+
+
+class Grid:
+    """
+    Grille compacte stockée dans des tableaux NumPy `uint8`.
+
+    Chaque couche est indexée par [x, y], comme l'ancienne liste de listes
+    de cases. Une grille 512x512 occupe moins d'un mégaoctet.
+
+    Attributs
+    ---------
+    size : int
+        Taille de la grille (size x size).
+    terrain : numpy.ndarray
+        Code de terrain de chaque case (TRAVERSABLE, NON_TRAVERSABLE).
+    occupancy : numpy.ndarray
+        Équipe qui occupe chaque case (EMPTY ou une valeur de TEAM_CODES).
+    cost : numpy.ndarray
+        Coût de déplacement pour entrer dans chaque case (1 par défaut).
+    version : int
+        Incrémenté à chaque modification du terrain ou des coûts.
+    terrain_changes : collections.deque
+        Dernières cases (x, y) dont le terrain a changé (au plus TERRAIN_HISTORY).
+    terrain_change_count : int
+        Nombre total de changements de terrain, pour savoir lesquels ont été vus.
+
+    Les couches de terrain et de coût peuvent être partagées entre copies
+    (voir `copy`) : elles ne doivent être modifiées que par `set_terrain`
+    et `set_cost`.
+    """
+
+    def __init__(self, terrain, cost=None):
+        """
+        Construit une grille à partir d'un tableau de codes de terrain.
+
+        Paramètres
+        ----------
+        terrain : numpy.ndarray
+            Tableau carré de codes de terrain.
+        cost : numpy.ndarray, optionnel
+            Coûts de déplacement. Tous à 1 si absent.
+        """
+        self.terrain = np.ascontiguousarray(terrain, dtype=np.uint8)
+        self.size = self.terrain.shape[0]
+        self.occupancy = np.zeros_like(self.terrain)
+        if cost is None:
+            cost = np.ones_like(self.terrain)
+        self.cost = np.ascontiguousarray(cost, dtype=np.uint8)
+        self.version = 0
+        self.terrain_changes = deque(maxlen=TERRAIN_HISTORY)
+        self.terrain_change_count = 0
+        self._uniform_cost = None
+        self._uniform_cost_version = -1
+        self._shared = False
+
+    @classmethod
+    def from_cell_types(cls, cell_types):
+        """
+        Construit une grille à partir d'une liste de listes de types de cases.
+
+        Paramètres
+        ----------
+        cell_types : list[list[str]]
+            Types des cases ("traversable", "non_traversable"), indexés par [x][y].
+        """
+        return cls(np.array([[TERRAIN_CODES[cell_type] for cell_type in column]
+                             for column in cell_types], dtype=np.uint8))
+
+    def copy(self):
+        """
+        Retourne une copie de la grille.
+
+        La couche d'occupation est copiée ; le terrain et les coûts, qui
+        changent rarement, sont partagés jusqu'à la première modification
+        de l'une ou l'autre grille (copie à l'écriture).
+        """
+        clone = Grid.__new__(Grid)
+        clone.__dict__.update(self.__dict__)
+        clone.occupancy = self.occupancy.copy()
+        clone.terrain_changes = self.terrain_changes.copy()
+        clone._shared = self._shared = True
+        return clone
+
+    def _unshare(self):
+        """Copie le terrain et les coûts partagés avant une modification."""
+        if self._shared:
+            self.terrain = self.terrain.copy()
+            self.cost = self.cost.copy()
+            self._shared = False
+
+    def in_bounds(self, x, y):
+        """Indique si (x, y) est sur la grille."""
+        return 0 <= x < self.size and 0 <= y < self.size
+
+    def cell_type(self, x, y):
+        """Retourne le type de la case (x, y) sous forme de texte."""
+        return CELL_TYPES[self.terrain[x, y]]
+
+    def is_traversable(self, x, y):
+        """Indique si la case (x, y) peut être traversée."""
+        return self.terrain[x, y] == TRAVERSABLE
+
+    def set_terrain(self, x, y, cell_type):
+        """Change le type de la case (x, y)."""
+        self._unshare()
+        self.terrain[x, y] = TERRAIN_CODES[cell_type]
+        self.terrain_changes.append((x, y))
+        self.terrain_change_count += 1
+        self.version += 1
+
+    def set_cost(self, x, y, cost):
+        """Change le coût de déplacement de la case (x, y)."""
+        self._unshare()
+        self.cost[x, y] = cost
+        self.version += 1
+
+    def has_uniform_cost(self):
+        """Indique si toutes les cases coûtent 1 (un parcours en largeur suffit alors)."""
+        if self._uniform_cost_version != self.version:
+            self._uniform_cost = bool((self.cost == 1).all())
+            self._uniform_cost_version = self.version
+        return self._uniform_cost
+
+    def place(self, x, y, team):
+        """Marque la case (x, y) comme occupée par `team`."""
+        self.occupancy[x, y] = TEAM_CODES[team]
+
+    def clear(self, x, y):
+        """Marque la case (x, y) comme libre."""
+        self.occupancy[x, y] = EMPTY
+
+    def window(self, x, y, radius):
+        """
+        Retourne les bornes du carré de rayon `radius` centré sur (x, y),
+        tronqué aux bords de la grille.
+
+        Retourne
+        --------
+        tuple[int, int, int, int]
+            (x0, x1, y0, y1), utilisables en tranches [x0:x1, y0:y1].
+        """
+        return (max(x - radius, 0), min(x + radius + 1, self.size),
+                max(y - radius, 0), min(y + radius + 1, self.size))
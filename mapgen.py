@@ -0,0 +1,352 @@
+import hashlib
+import os
+import struct
+
+import numpy as np
+
+from grid import *
+
+# Version des algorithmes de génération : la changer invalide le cache des cartes
+MAPGEN_VERSION = 1
+
+# Dossier par défaut du cache des cartes générées
+MAP_CACHE_DIR = "map_cache"
+
+# En-tête d'un fichier de carte : signature, version du format, version des générateurs, taille
+MAP_HEADER = struct.Struct("<4sHHI")
+MAP_MAGIC = b"TMAP"
+MAP_FORMAT_VERSION = 1
+
+# Générateurs de terrain, par nom (voir register_generator)
+GENERATORS = {}
+
+
+def register_generator(name):
+    """
+    Décorateur qui ajoute un algorithme de génération à GENERATORS.
+
+    Un générateur reçoit la taille de la carte, un `numpy.random.Generator`
+    et ses propres paramètres nommés ; il retourne un tableau `uint8` de
+    codes de terrain indexé par [x, y].
+
+    Exemple
+    -------
+        @register_generator("open")
+        def open_field(size, rng):
+            return np.zeros((size, size), dtype=np.uint8)
+    """
+    def register(function):
+        GENERATORS[name] = function
+        return function
+    return register
+
+
+@register_generator("scatter")
+def scatter(size, rng, density=0.2):
+    """Murs tirés indépendamment, avec une probabilité `density` par case."""
+    return (rng.random((size, size)) <= density).astype(np.uint8)
+
+
+@register_generator("noise")
+def noise(size, rng, density=0.3, scale=16, octaves=3):
+    """
+    Murs regroupés en massifs, tirés d'un bruit de valeur lissé.
+
+    Paramètres
+    ----------
+    density : float
+        Proportion de cases non traversables.
+    scale : int
+        Taille des plus grands massifs, en cases.
+    octaves : int
+        Nombre de couches de bruit superposées, de plus en plus fines.
+    """
+    field = np.zeros((size, size))
+    for octave in range(octaves):
+        step = max(scale >> octave, 1)
+        lattice = rng.random((size // step + 2, size // step + 2))
+        position = np.arange(size) / step
+        index = position.astype(np.int64)
+        t = position - index
+        t = t * t * (3 - 2 * t)  # Lissage des transitions entre points du réseau
+        rows = lattice[index] * (1 - t)[:, None] + lattice[index + 1] * t[:, None]
+        field += (rows[:, index] * (1 - t) + rows[:, index + 1] * t) * 0.5 ** octave
+    return (field > np.quantile(field, 1 - density)).astype(np.uint8)
+
+
+@register_generator("cellular")
+def cellular(size, rng, density=0.45, steps=4):
+    """
+    Grottes obtenues par un automate cellulaire.
+
+    Une case devient un mur si au moins cinq de ses huit voisines en sont,
+    et le reste si au moins quatre en sont ; le bord compte comme un mur.
+
+    Paramètres
+    ----------
+    density : float
+        Proportion de murs du tirage initial.
+    steps : int
+        Nombre d'itérations de l'automate.
+    """
+    walls = rng.random((size, size)) < density
+    for _ in range(steps):
+        padded = np.pad(walls, 1, constant_values=True).astype(np.uint8)
+        count = sum(padded[1 + dx:1 + dx + size, 1 + dy:1 + dy + size]
+                    for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy)
+        walls = (count >= 5) | (walls & (count >= 4))
+    return walls.astype(np.uint8)
+
+
+@register_generator("rooms")
+def rooms(size, rng, min_room=3, max_room=12, count=None):
+    """
+    Salles rectangulaires reliées par des couloirs, sur un fond de murs.
+
+    Paramètres
+    ----------
+    min_room, max_room : int
+        Côtés minimal et maximal d'une salle.
+    count : int, optionnel
+        Nombre de salles ; par défaut, de quoi couvrir environ un quart de la carte.
+    """
+    terrain = np.full((size, size), NON_TRAVERSABLE, dtype=np.uint8)
+    max_room = max(min(max_room, size), 1)
+    min_room = min(min_room, max_room)
+    if count is None:
+        count = max(2, size * size // (4 * max_room * max_room))
+    centers = []
+    for _ in range(count):
+        width, height = rng.integers(min_room, max_room + 1, 2).tolist()
+        x = int(rng.integers(0, size - width + 1))
+        y = int(rng.integers(0, size - height + 1))
+        terrain[x:x + width, y:y + height] = TRAVERSABLE
+        centers.append((x + width // 2, y + height // 2))
+    centers.sort()
+    for start, end in zip(centers, centers[1:]):
+        carve_corridor(terrain, start, end)
+    return terrain
+
+
+def carve_corridor(terrain, start, end):
+    """Rend traversable un couloir en L de `start` à `end` (horizontal puis vertical)."""
+    (x0, y0), (x1, y1) = start, end
+    terrain[min(x0, x1):max(x0, x1) + 1, y0] = TRAVERSABLE
+    terrain[x1, min(y0, y1):max(y0, y1) + 1] = TRAVERSABLE
+
+
+def label_regions(terrain):
+    """
+    Numérote les zones connexes (4-voisinage) de cases traversables.
+
+    Union-find vectorisé : à chaque passe, la racine de plus grand indice de
+    chaque paire de voisines est rattachée à la plus petite, puis les chemins
+    sont compressés par sauts de pointeurs. Le nombre de passes croît avec le
+    logarithme de la taille des zones, pas avec leur diamètre.
+
+    Paramètres
+    ----------
+    terrain : numpy.ndarray
+        Codes de terrain, indexés par [x, y].
+
+    Retourne
+    --------
+    numpy.ndarray
+        Tableau int64 indexé par [x, y] : le plus petit indice à plat des
+        cases de la zone, ou -1 pour les murs.
+    """
+    size = terrain.shape[0]
+    passable = terrain == TRAVERSABLE
+    flat = np.arange(size * size, dtype=np.int64).reshape(size, size)
+    # Paires de cases traversables voisines : (x, y)-(x + 1, y) puis (x, y)-(x, y + 1)
+    along_x = flat[:-1][passable[:-1] & passable[1:]]
+    along_y = flat[:, :-1][passable[:, :-1] & passable[:, 1:]]
+    first = np.concatenate((along_x, along_y))
+    second = np.concatenate((along_x + size, along_y + 1))
+    parent = flat.ravel().copy()
+    while True:
+        a, b = parent[first], parent[second]
+        differ = a != b
+        if not differ.any():
+            break
+        np.minimum.at(parent, np.maximum(a, b)[differ], np.minimum(a, b)[differ])
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+    labels = parent.reshape(size, size)
+    labels[~passable] = -1
+    return labels
+
+
+def ensure_connected(terrain, keep=()):
+    """
+    Rend toutes les cases traversables accessibles les unes depuis les autres.
+
+    La plus grande zone est gardée. Chaque case de `keep` est ouverte et,
+    si elle est hors de cette zone, reliée à sa case la plus proche par un
+    couloir ; les autres zones sont ensuite murées.
+
+    Paramètres
+    ----------
+    terrain : numpy.ndarray
+        Codes de terrain, modifiés sur place.
+    keep : iterable[tuple[int, int]]
+        Cases qui doivent rester accessibles (ex. : points d'apparition).
+
+    Retourne
+    --------
+    numpy.ndarray
+        Le terrain modifié.
+    """
+    keep = list(keep)
+    for x, y in keep:
+        terrain[x, y] = TRAVERSABLE
+    labels = label_regions(terrain)
+    if not (labels >= 0).any():
+        return terrain
+    main = np.bincount(labels[labels >= 0]).argmax()
+    outside = [(x, y) for x, y in keep if labels[x, y] != main]
+    if outside:
+        cells = np.argwhere(labels == main)
+        for x, y in outside:
+            nearest = cells[np.abs(cells - (x, y)).sum(axis=1).argmin()]
+            carve_corridor(terrain, (x, y), tuple(nearest.tolist()))
+        labels = label_regions(terrain)
+        main = labels[outside[0]]
+    terrain[labels != main] = NON_TRAVERSABLE
+    return terrain
+
+
+def generate_terrain(size, seed=None, algorithm="scatter", spawns=(), **params):
+    """
+    Génère un terrain connexe.
+
+    Paramètres
+    ----------
+    size : int
+        Taille de la carte.
+    seed : int, optionnel
+        Graine du tirage : une même graine donne toujours la même carte.
+    algorithm : str
+        Nom du générateur dans GENERATORS.
+    spawns : iterable[tuple[int, int]]
+        Cases qui doivent rester traversables et accessibles.
+    **params
+        Paramètres du générateur.
+
+    Retourne
+    --------
+    numpy.ndarray
+        Codes de terrain `uint8` indexés par [x, y].
+
+    Lève
+    ----
+    ValueError
+        Si l'algorithme est inconnu.
+    """
+    if algorithm not in GENERATORS:
+        raise ValueError(f"Générateur inconnu : {algorithm!r} (disponibles : {', '.join(GENERATORS)})")
+    rng = np.random.default_rng(seed)
+    terrain = np.ascontiguousarray(GENERATORS[algorithm](size, rng, **params), dtype=np.uint8)
+    return ensure_connected(terrain, spawns)
+
+
+def map_key(size, seed, algorithm, spawns=(), **params):
+    """Retourne la clé de cache d'une carte : tous les paramètres qui la déterminent."""
+    description = repr((MAPGEN_VERSION, size, seed, algorithm, tuple(spawns), sorted(params.items())))
+    digest = hashlib.blake2b(description.encode(), digest_size=8).hexdigest()
+    return f"{algorithm}-{size}-{seed}-{digest}"
+
+
+class MapCache:
+    """
+    Cache sur disque des terrains générés.
+
+    Chaque carte est un fichier binaire : un en-tête MAP_HEADER suivi des
+    codes de terrain, un octet par case dans l'ordre de Grid.terrain. Le
+    chargement projette le fichier en mémoire (copie à l'écriture) : une
+    grande carte est disponible immédiatement et ses pages ne sont lues
+    qu'à l'usage.
+
+    Attributs
+    ---------
+    directory : str
+        Dossier des fichiers de cartes.
+    hits, misses : int
+        Statistiques cumulées du cache.
+    """
+
+    def __init__(self, directory=MAP_CACHE_DIR):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key):
+        """Retourne le chemin du fichier de la carte `key`."""
+        return os.path.join(self.directory, key + ".map")
+
+    def load(self, key):
+        """
+        Charge le terrain de la carte `key`.
+
+        Retourne
+        --------
+        numpy.memmap | None
+            Le terrain projeté en mémoire, ou None si la carte est absente
+            ou écrite par une autre version.
+        """
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                header = f.read(MAP_HEADER.size)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        if len(header) != MAP_HEADER.size:
+            self.misses += 1
+            return None
+        magic, format_version, mapgen_version, size = MAP_HEADER.unpack(header)
+        if ((magic, format_version, mapgen_version) != (MAP_MAGIC, MAP_FORMAT_VERSION, MAPGEN_VERSION)
+                or os.path.getsize(path) != MAP_HEADER.size + size * size):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return np.memmap(path, dtype=np.uint8, mode="c", offset=MAP_HEADER.size, shape=(size, size))
+
+    def store(self, key, terrain):
+        """Écrit le terrain de la carte `key` (remplacement atomique du fichier)."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(MAP_HEADER.pack(MAP_MAGIC, MAP_FORMAT_VERSION, MAPGEN_VERSION, terrain.shape[0]))
+            f.write(np.ascontiguousarray(terrain, dtype=np.uint8).tobytes())
+        os.replace(temporary, path)
+
+
+def generate_map(size, seed=None, algorithm="scatter", spawns=(), cache=None, **params):
+    """
+    Retourne une grille générée, lue dans le cache si elle y est déjà.
+
+    Paramètres
+    ----------
+    size, seed, algorithm, spawns, **params
+        Voir `generate_terrain`.
+    cache : MapCache, optionnel
+        Cache des cartes. Les cartes sans graine ne sont pas mises en cache.
+
+    Retourne
+    --------
+    Grid
+        La grille générée.
+    """
+    if cache is None or seed is None:
+        return Grid(generate_terrain(size, seed, algorithm, spawns, **params))
+    key = map_key(size, seed, algorithm, spawns, **params)
+    terrain = cache.load(key)
+    if terrain is None:
+        terrain = generate_terrain(size, seed, algorithm, spawns, **params)
+        cache.store(key, terrain)
+    return Grid(terrain)
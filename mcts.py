@@ -0,0 +1,374 @@
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from engine import *
+from savegame import *
+
+# Distance (en cases) au-delà de laquelle un ennemi n'est pas concerné par le combat ce tour-ci
+ENGAGE_MARGIN = 3
+
+
+class _Node:
+    """Nœud de l'arbre de recherche : statistiques d'un choix et de ses suites."""
+
+    __slots__ = ("children", "untried", "visits", "value")
+
+    def __init__(self):
+        self.children = {}
+        self.untried = None
+        self.visits = 0
+        self.value = 0.0
+
+
+def candidate_actions(engine, unit):
+    """
+    Retourne les options d'une unité pour son tour.
+
+    Une option est un tuple d'entiers (x, y, effet) : la case où se placer
+    puis, après ce déplacement, rien (None), une attaque au corps à corps
+    ("attack", cible) ou la compétence la plus puissante à portée d'une
+    cible en vue ("skill", compétence, x, y). Les unités sont désignées par leur
+    numéro de ligne, valable dans toute copie du moteur.
+    """
+    skill_ids = engine.units.skill_ids[unit.index]
+    skills = sorted(zip(skill_ids, skill_set(skill_ids)), key=lambda pair: -pair[1].power)
+    reach = max([skill.range_max for _, skill in skills] + [1])
+    options = []
+    for x, y in engine.get_accessible_cells(unit):
+        options.append((x, y, None))
+        for target in engine.units_within(x, y, reach):
+            if target.team == unit.team:
+                continue
+            dx, dy = target.x - x, target.y - y
+            if max(abs(dx), abs(dy)) <= 1:
+                options.append((x, y, ("attack", target.index)))
+            for skill_id, skill in skills:
+                if (in_range(skill.range_min, skill.range_max, dx, dy, skill.metric)
+                        and engine.visibility.line_of_sight(x, y, target.x, target.y)):
+                    options.append((x, y, ("skill", skill_id, target.x, target.y)))
+                    break
+    return options
+
+
+def option_actions(engine, unit, option):
+    """Retourne les actions du moteur qui réalisent une option de `candidate_actions`."""
+    x, y, effect = option
+    actions = []
+    if (x, y) != (unit.x, unit.y):
+        actions.append(MoveAction(unit, x, y))
+    if effect is not None:
+        if effect[0] == "attack":
+            actions.append(AttackAction(unit, engine.units.handle(effect[1])))
+        else:
+            _, skill_id, target_x, target_y = effect
+            actions.append(SkillAction(unit, SKILLS[skill_id], target_x, target_y))
+    return actions
+
+
+def evaluate(engine):
+    """
+    Évalue une position du point de vue des ennemis.
+
+    Retourne
+    --------
+    float
+        1 pour une victoire des ennemis, 0 pour une défaite, sinon leur part
+        de la santé totale restante.
+    """
+    winner = engine.winner()
+    if winner is not None:
+        return 1.0 if winner == 'enemy' else 0.0
+    health = engine.units.health
+    enemy = int(health[engine.units.alive_indices('enemy')].clip(0).sum())
+    player = int(health[engine.units.alive_indices('player')].clip(0).sum())
+    return enemy / (enemy + player) if enemy + player else 0.5
+
+
+def player_policy(engine, unit, rng):
+    """Politique du joueur pendant les simulations : tirer sur la cible la plus faible, sinon bouger au hasard."""
+    for skill in sorted(unit.skills, key=lambda skill: -skill.power):
+        targets = [other for other in engine.units_within(unit.x, unit.y, skill.range_max)
+                   if other.team != unit.team and engine.can_target(unit, skill, other.x, other.y)]
+        if targets:
+            target = min(targets, key=lambda other: other.health)
+            return [SkillAction(unit, skill, target.x, target.y)]
+    cells = engine.get_accessible_cells(unit)
+    return [MoveAction(unit, *rng.choice(cells))]
+
+
+def play_enemies(engine, enemies):
+    """Fait jouer `enemies` (dans l'ordre) avec l'IA par défaut du moteur."""
+    field = engine.flow_field()
+    players_left = len(engine.player_units)
+    for enemy in enemies:
+        if not engine.player_units:
+            return
+        if enemy not in engine.occupancy:
+            continue
+        if len(engine.player_units) != players_left:
+            field = engine.flow_field()
+            players_left = len(engine.player_units)
+        for action in engine.plan_enemy(enemy, field):
+            engine.apply(action)
+
+
+def play_players(engine, rng):
+    """Fait jouer toutes les unités du joueur avec `player_policy`."""
+    for unit in list(engine.player_units):
+        if not engine.enemy_units:
+            return
+        if unit in engine.occupancy:
+            for action in player_policy(engine, unit, rng):
+                engine.apply(action)
+
+
+def search(engine, order, deadline, seed=None, max_depth=2, rollout_turns=2, exploration=1.4,
+           table_size=1 << 14):
+    """
+    Recherche arborescente Monte-Carlo (UCT) pour la première unité de `order`.
+
+    Les niveaux de l'arbre sont les unités de `order`, dans l'ordre où elles
+    jouent ; au-delà de `max_depth` niveaux, le tour est fini par l'IA par
+    défaut, puis `rollout_turns` tours complets sont simulés avant
+    l'évaluation. Chaque itération est défaite avec la pile d'annulation du
+    moteur, qui revient exactement à son état de départ.
+
+    La valeur des simulations est rangée dans une table de transposition,
+    par hachage de Zobrist de la position à la fin du tour courant : deux
+    suites d'options qui aboutissent à la même position (l'IA par défaut
+    finissant le tour de la même façon) partagent une seule simulation.
+
+    Paramètres
+    ----------
+    engine : Engine
+        Le moteur ; il est modifié pendant la recherche et restauré ensuite.
+    order : list[int]
+        Numéros de lignes des unités qui jouent ce tour, la première étant
+        celle dont on cherche le coup.
+    deadline : float
+        Heure (`time.time()`) à laquelle s'arrêter.
+    seed : int, optionnel
+        Graine des simulations.
+    max_depth : int
+        Nombre de niveaux de l'arbre.
+    rollout_turns : int
+        Nombre de tours simulés après le tour courant.
+    exploration : float
+        Constante d'exploration de UCB1.
+    table_size : int
+        Nombre d'emplacements de la table de transposition.
+
+    Retourne
+    --------
+    tuple[dict[tuple, tuple[int, float]], int, tuple[int, int]]
+        Visites et valeur cumulée de chaque option de la racine, nombre
+        d'itérations, succès et échecs de la table de transposition.
+    """
+    rng = random.Random(seed)
+    engine.enable_undo()
+    units = [engine.units.handle(index) for index in order]
+    root = _Node()
+    table = TranspositionTable(table_size)
+    iterations = 0
+    while time.time() < deadline:
+        checkpoint = engine.checkpoint()
+        node, path, level = root, [root], 0
+        while len(path) <= max_depth and engine.winner() is None:
+            while level < len(units) and units[level] not in engine.occupancy:
+                level += 1
+            if level == len(units):
+                break
+            unit = units[level]
+            if node.untried is None:
+                node.untried = candidate_actions(engine, unit)
+                rng.shuffle(node.untried)
+            if node.untried:
+                option = node.untried.pop()
+                for action in option_actions(engine, unit, option):
+                    engine.apply(action)
+                child = node.children[option] = _Node()
+            elif node.children:
+                log_visits = math.log(node.visits)
+                option, child = max(node.children.items(), key=lambda item: (
+                    item[1].value / max(item[1].visits, 1)
+                    + exploration * math.sqrt(log_visits / max(item[1].visits, 1))))
+                for action in option_actions(engine, unit, option):
+                    engine.apply(action)
+            else:
+                break
+            path.append(child)
+            node = child
+            level += 1
+            if child.visits == 0:
+                break  # Nœud tout juste ajouté : on passe à la simulation
+
+        play_enemies(engine, units[level:])
+        # Fin du tour : seul point où deux suites d'options peuvent se rejoindre
+        key = engine.zobrist
+        value = table.get(key)
+        if value is None:
+            for _ in range(rollout_turns):
+                if engine.winner() is not None:
+                    break
+                play_players(engine, rng)
+                play_enemies(engine, list(engine.enemy_units))
+            value = evaluate(engine)
+            table.store(key, value, rollout_turns)
+        for visited in path:
+            visited.visits += 1
+            visited.value += value
+        engine.rollback(checkpoint)
+        iterations += 1
+    engine.undo_stack = None
+    stats = {option: (child.visits, child.value) for option, child in root.children.items()}
+    return stats, iterations, (table.hits, table.misses)
+
+
+def _search_snapshot(snapshot, order, deadline, seed, *params):
+    """Recherche lancée dans un processus du pool, à partir d'une sauvegarde du moteur."""
+    return search(load_snapshot(snapshot), order, deadline, seed, *params)
+
+
+class MCTSController:
+    """
+    IA des ennemis par recherche arborescente Monte-Carlo.
+
+    Chaque ennemi au contact choisit, dans un budget de temps, entre tous
+    ses déplacements suivis ou non d'une attaque ou d'une compétence. La
+    recherche est parallélisée à la racine : chaque processus du pool part
+    de la même sauvegarde, cherche jusqu'à l'échéance commune, et les
+    visites des options sont additionnées. Les ennemis loin des unités du
+    joueur jouent avec l'IA par défaut du moteur.
+
+    Attributs
+    ---------
+    time_budget : float
+        Durée maximale d'un tour des ennemis, en secondes.
+    workers : int
+        Nombre de processus de recherche ; 0 pour chercher dans le processus courant.
+    max_depth, rollout_turns, exploration, table_size
+        Paramètres de `search`.
+    searches, iterations : int
+        Nombre de recherches lancées et d'itérations cumulées.
+    table_hits, table_misses : int
+        Succès et échecs cumulés des tables de transposition, pour en régler la taille.
+    """
+
+    def __init__(self, time_budget=1.0, workers=None, max_depth=2, rollout_turns=2, exploration=1.4,
+                 seed=None, min_search_time=0.005, table_size=1 << 14):
+        """
+        Paramètres
+        ----------
+        time_budget : float
+            Durée maximale d'un tour des ennemis, en secondes.
+        workers : int, optionnel
+            Nombre de processus ; un par cœur par défaut, 0 pour ne pas en créer.
+        max_depth, rollout_turns, exploration, table_size
+            Paramètres de `search`.
+        seed : int, optionnel
+            Graine des simulations.
+        min_search_time : float
+            En dessous de ce temps par ennemi, l'IA par défaut est utilisée.
+        """
+        self.time_budget = time_budget
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_depth = max_depth
+        self.rollout_turns = rollout_turns
+        self.exploration = exploration
+        self.table_size = table_size
+        self.min_search_time = min_search_time
+        self.rng = random.Random(seed)
+        self.searches = 0
+        self.iterations = 0
+        self.table_hits = 0
+        self.table_misses = 0
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        """Arrête les processus de recherche."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def play_turn(self, engine):
+        """Joue le tour des ennemis dans `engine`, en au plus `time_budget` secondes (hors IA par défaut)."""
+        deadline = time.time() + self.time_budget
+        field = engine.flow_field()
+        players_left = len(engine.player_units)
+        order = list(engine.enemy_units)
+        engaged = [enemy for enemy in order if self.is_engaged(engine, enemy, field)]
+        for position, enemy in enumerate(order):
+            if not engine.player_units:
+                return
+            if enemy not in engine.occupancy:
+                continue
+            if len(engine.player_units) != players_left:
+                field = engine.flow_field()
+                players_left = len(engine.player_units)
+            actions = None
+            if enemy in engaged:
+                remaining = len(engaged) - engaged.index(enemy)
+                budget = (deadline - time.time()) / remaining
+                if budget >= self.min_search_time:
+                    actions = self.choose(engine, [unit.index for unit in order[position:]], budget)
+            if actions is None:
+                actions = engine.plan_enemy(enemy, field)
+            for action in actions:
+                engine.apply(action)
+
+    def is_engaged(self, engine, enemy, field):
+        """Indique si un ennemi peut atteindre une unité du joueur ce tour-ci."""
+        reach = max([skill.range_max for skill in enemy.skills] + [1])
+        return field[enemy.x, enemy.y] <= reach + ENGAGE_MARGIN
+
+    def choose(self, engine, order, budget):
+        """
+        Cherche les actions de l'unité `order[0]` pendant `budget` secondes.
+
+        Retourne
+        --------
+        list | None
+            Les actions de l'option la plus visitée, ou None si aucune
+            recherche n'a abouti à temps.
+        """
+        deadline = time.time() + budget
+        params = (self.max_depth, self.rollout_turns, self.exploration, self.table_size)
+        if self.workers == 0:
+            results = [search(engine.clone(), order, deadline, self.rng.getrandbits(32), *params)]
+        else:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.workers)
+            snapshot = dump_snapshot(engine)
+            futures = [self._executor.submit(_search_snapshot, snapshot, order, deadline,
+                                             self.rng.getrandbits(32), *params)
+                       for _ in range(self.workers)]
+            # Les résultats en retard sont abandonnés : le tour doit tenir dans son budget
+            done, late = wait(futures, timeout=max(deadline - time.time(), 0) + 0.05 * budget)
+            for future in late:
+                future.cancel()
+            results = [future.result() for future in done]
+
+        totals = {}
+        for stats, iterations, (hits, misses) in results:
+            self.iterations += iterations
+            self.table_hits += hits
+            self.table_misses += misses
+            for option, (visits, value) in stats.items():
+                total = totals.setdefault(option, [0, 0.0])
+                total[0] += visits
+                total[1] += value
+        self.searches += 1
+        if not totals:
+            return None
+        option = max(totals, key=lambda key: (totals[key][0], totals[key][1]))
+        return option_actions(engine, engine.units.handle(order[0]), option)
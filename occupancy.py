@@ -0,0 +1,192 @@
+import numpy as np
+
+from targeting import *
+
+# Valeur des cases libres dans OccupancyIndex.slots
+NO_UNIT = -1
+
+
+class OccupancyIndex:
+    """
+    Index spatial des unités : qui est sur quelle case.
+
+    Un tableau dense donne, pour chaque case, le numéro de l'unité qui
+    l'occupe ; la recherche d'une unité sur une case est en O(1) et la
+    recherche dans un rayon ne parcourt que les cases du rayon. L'index
+    tient aussi à jour la couche d'occupation de la grille.
+
+    Attributs
+    ---------
+    grid : Grid
+        La grille dont la couche `occupancy` est mise à jour.
+    slots : numpy.ndarray
+        Numéro de l'unité sur chaque case (NO_UNIT si libre), indexé par [x, y].
+    units : list[Unit | None]
+        Les unités, par numéro ; None pour les numéros libérés.
+    rows : numpy.ndarray
+        Numéro de ligne dans la table des unités, par numéro d'unité ; sert à
+        passer des cases aux colonnes de la table sans boucle Python.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.slots = np.full((grid.size, grid.size), NO_UNIT, dtype=np.int32)
+        self.units = []
+        self.rows = np.zeros(0, dtype=np.int64)
+        self._slot_of = {}
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    def __contains__(self, unit):
+        return unit in self._slot_of
+
+    def at(self, x, y):
+        """Retourne l'unité sur la case (x, y), ou None."""
+        slot = self.slots[x, y]
+        return None if slot == NO_UNIT else self.units[slot]
+
+    def is_free(self, x, y):
+        """Indique si aucune unité n'occupe la case (x, y)."""
+        return self.slots[x, y] == NO_UNIT
+
+    def add(self, unit):
+        """
+        Ajoute une unité à l'index.
+
+        Lève
+        ----
+        ValueError
+            Si la case de l'unité est déjà occupée.
+        """
+        if not self.is_free(unit.x, unit.y):
+            raise ValueError(f"La case ({unit.x}, {unit.y}) est déjà occupée")
+        slot = len(self.units)
+        self.units.append(unit)
+        self.rows = np.append(self.rows, unit.index)
+        self._slot_of[unit] = slot
+        self.slots[unit.x, unit.y] = slot
+        self.grid.place(unit.x, unit.y, unit.team)
+
+    def copy(self, grid, table):
+        """
+        Retourne une copie de l'index pour une copie du moteur.
+
+        Paramètres
+        ----------
+        grid : Grid
+            La copie de la grille, dont la couche `occupancy` est déjà copiée.
+        table : UnitTable
+            La copie de la table ; les unités de la copie sont ses poignées.
+        """
+        clone = OccupancyIndex.__new__(OccupancyIndex)
+        clone.grid = grid
+        clone.slots = self.slots.copy()
+        clone.units = [None if unit is None else table.handle(unit.index) for unit in self.units]
+        clone.rows = self.rows  # Jamais modifié sur place : partagé
+        clone._slot_of = {unit: slot for slot, unit in enumerate(clone.units) if unit is not None}
+        return clone
+
+    def restore(self, unit, slot):
+        """Remet une unité retirée par `remove` à son ancien numéro (pour une annulation)."""
+        self.units[slot] = unit
+        self._slot_of[unit] = slot
+        self.slots[unit.x, unit.y] = slot
+        self.grid.place(unit.x, unit.y, unit.team)
+
+    def slot_of(self, unit):
+        """Retourne le numéro d'une unité dans l'index."""
+        return self._slot_of[unit]
+
+    def add_many(self, units, xs, ys, codes):
+        """
+        Ajoute plusieurs unités à l'index en une opération vectorielle.
+
+        Paramètres
+        ----------
+        units : list[Unit]
+            Les unités à ajouter.
+        xs, ys : numpy.ndarray
+            Leurs positions.
+        codes : numpy.ndarray
+            Leurs codes d'équipe dans la grille (valeurs de TEAM_CODES).
+
+        Lève
+        ----
+        ValueError
+            Si une case est déjà occupée ou demandée deux fois.
+        """
+        xs, ys = np.asarray(xs), np.asarray(ys)
+        taken = self.slots[xs, ys] != NO_UNIT
+        if taken.any() or len(np.unique(xs * self.grid.size + ys)) < len(units):
+            raise ValueError("Plusieurs unités sur une même case")
+        first = len(self.units)
+        self.units.extend(units)
+        self.rows = np.concatenate([self.rows, np.array([unit.index for unit in units], dtype=np.int64)])
+        self._slot_of.update(zip(units, range(first, first + len(units))))
+        self.slots[xs, ys] = np.arange(first, first + len(units))
+        self.grid.occupancy[xs, ys] = codes
+
+    def remove(self, unit):
+        """Retire une unité de l'index (par exemple à sa mort)."""
+        slot = self._slot_of.pop(unit)
+        self.units[slot] = None
+        self.slots[unit.x, unit.y] = NO_UNIT
+        self.grid.clear(unit.x, unit.y)
+
+    def move(self, unit, x, y):
+        """
+        Déplace une unité vers la case (x, y) et met l'index à jour.
+
+        Lève
+        ----
+        ValueError
+            Si la case d'arrivée est occupée par une autre unité.
+        """
+        if (x, y) == (unit.x, unit.y):
+            return
+        if not self.is_free(x, y):
+            raise ValueError(f"La case ({x}, {y}) est déjà occupée")
+        slot = self._slot_of[unit]
+        self.slots[unit.x, unit.y] = NO_UNIT
+        self.grid.clear(unit.x, unit.y)
+        unit.x = x
+        unit.y = y
+        self.slots[x, y] = slot
+        self.grid.place(x, y, unit.team)
+
+    def within(self, x, y, radius, metric="chebyshev"):
+        """
+        Retourne les unités à une distance au plus `radius` de (x, y).
+
+        Paramètres
+        ----------
+        x, y : int
+            Le centre de la recherche.
+        radius : int
+            Le rayon de recherche.
+        metric : str
+            Distance utilisée ("manhattan", "chebyshev" ou "euclidean").
+
+        Retourne
+        --------
+        list[Unit]
+            Les unités trouvées, triées par x puis par y.
+        """
+        x0, x1, y0, y1 = self.grid.window(x, y, radius)
+        window = self.slots[x0:x1, y0:y1]
+        mask = stencil(0, radius, metric)[x0 - x + radius:x1 - x + radius,
+                                          y0 - y + radius:y1 - y + radius]
+        found = window[mask & (window != NO_UNIT)]
+        return [self.units[slot] for slot in found.tolist()]
+
+    def in_area(self, x0, x1, y0, y1):
+        """
+        Retourne les unités dans le rectangle de cases [x0:x1, y0:y1].
+
+        Le coût ne dépend que de la taille du rectangle, pas du nombre
+        d'unités sur la grille.
+        """
+        window = self.slots[x0:x1, y0:y1]
+        found = window[window != NO_UNIT]
+        return [self.units[slot] for slot in found.tolist()]
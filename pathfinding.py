@@ -0,0 +1,277 @@
+import heapq
+from collections import deque
+
+import numpy as np
+
+from grid import *
+
+# Déplacements autorisés : les quatre voisins directs (pas de diagonale)
+NEIGHBOR_OFFSETS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+# Distance des cases que les sources ne peuvent pas atteindre
+UNREACHABLE = np.iinfo(np.int32).max
+
+# Jusqu'à ce nombre de cases, `distance_map` parcourt la grille case par case plutôt qu'en NumPy
+SMALL_GRID_CELLS = 1024
+
+
+class ReachabilityMap:
+    """
+    Cases atteignables depuis une case de départ avec un budget de déplacement.
+
+    Attributs
+    ---------
+    start : tuple[int, int]
+        La case de départ.
+    budget : int
+        Le budget de déplacement.
+    cost : dict[tuple[int, int], int]
+        Coût minimal pour atteindre chaque case atteignable.
+    previous : dict[tuple[int, int], tuple[int, int] | None]
+        Prédécesseur de chaque case sur un chemin de coût minimal.
+    cells : list[tuple[int, int]]
+        Les cases atteignables, dans l'ordre de découverte.
+    """
+
+    def __init__(self, start, budget, cost, previous):
+        self.start = start
+        self.budget = budget
+        self.cost = cost
+        self.previous = previous
+        self.cells = list(cost)
+
+    def __contains__(self, cell):
+        return cell in self.cost
+
+    def path_to(self, x, y):
+        """
+        Retourne le chemin de la case de départ jusqu'à (x, y).
+
+        Retourne
+        --------
+        list[tuple[int, int]]
+            Les cases du chemin, départ et arrivée compris, ou une liste vide
+            si (x, y) n'est pas atteignable.
+        """
+        if (x, y) not in self.previous:
+            return []
+        path = []
+        cell = (x, y)
+        while cell is not None:
+            path.append(cell)
+            cell = self.previous[cell]
+        path.reverse()
+        return path
+
+
+def reachable_cells(grid, start, budget):
+    """
+    Calcule les cases atteignables depuis `start` sans traverser de mur ni d'unité.
+
+    Utilise un parcours en largeur si tous les coûts valent 1, l'algorithme
+    de Dijkstra sinon.
+
+    Paramètres
+    ----------
+    grid : Grid
+        La grille (terrain, occupation et coûts).
+    start : tuple[int, int]
+        La case de départ, normalement occupée par l'unité qui se déplace.
+    budget : int
+        Le coût total maximal du déplacement.
+
+    Retourne
+    --------
+    ReachabilityMap
+        Les cases atteignables et leurs prédécesseurs.
+    """
+    size = grid.size
+    terrain = grid.terrain
+    occupancy = grid.occupancy
+    cost = {start: 0}
+    previous = {start: None}
+
+    if grid.has_uniform_cost():
+        # Cases libres de la fenêtre du budget, en listes Python (plus rapides à lire une à une)
+        x0, x1, y0, y1 = grid.window(start[0], start[1], budget)
+        free = ((terrain[x0:x1, y0:y1] == TRAVERSABLE) & (occupancy[x0:x1, y0:y1] == EMPTY)).tolist()
+        frontier = deque([start])
+        while frontier:
+            cell = frontier.popleft()
+            next_cost = cost[cell] + 1
+            if next_cost > budget:
+                continue
+            x, y = cell
+            for dx, dy in NEIGHBOR_OFFSETS:
+                nx, ny = x + dx, y + dy
+                if (x0 <= nx < x1 and y0 <= ny < y1 and (nx, ny) not in cost
+                        and free[nx - x0][ny - y0]):
+                    cost[(nx, ny)] = next_cost
+                    previous[(nx, ny)] = cell
+                    frontier.append((nx, ny))
+        return ReachabilityMap(start, budget, cost, previous)
+
+    step_cost = grid.cost
+    heap = [(0, start)]
+    while heap:
+        current, cell = heapq.heappop(heap)
+        if current > cost[cell]:
+            continue
+        x, y = cell
+        for dx, dy in NEIGHBOR_OFFSETS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < size and 0 <= ny < size):
+                continue
+            if terrain[nx, ny] != TRAVERSABLE or occupancy[nx, ny] != EMPTY:
+                continue
+            next_cost = current + int(step_cost[nx, ny])
+            if next_cost <= budget and next_cost < cost.get((nx, ny), budget + 1):
+                cost[(nx, ny)] = next_cost
+                previous[(nx, ny)] = cell
+                heapq.heappush(heap, (next_cost, (nx, ny)))
+    return ReachabilityMap(start, budget, cost, previous)
+
+
+def distance_map(grid, sources, targets=None):
+    """
+    Calcule la distance de chaque case à la source la plus proche (Dijkstra multi-sources).
+
+    Les murs bloquent le passage, les unités non : la carte ne dépend que du
+    terrain et peut être partagée par toutes les unités qui la descendent.
+    Avec des coûts uniformes, le parcours en largeur avance par fronts entiers
+    en opérations NumPy (case par case sur les petites grilles, où le coût
+    fixe de NumPy domine) ; sinon on utilise une file de priorité.
+
+    Avec `targets`, le calcul s'arrête dès que toutes ces cases ont leur
+    distance : les cases plus lointaines restent à UNREACHABLE. Une unité qui
+    descend la carte ne regarde que des cases plus proches que la sienne,
+    qui sont toutes calculées.
+
+    Paramètres
+    ----------
+    grid : Grid
+        La grille (terrain et coûts).
+    sources : list[tuple[int, int]]
+        Les cases de distance nulle.
+    targets : list[tuple[int, int]], optionnel
+        Les cases dont la distance est demandée ; toute la carte si absent.
+
+    Retourne
+    --------
+    numpy.ndarray
+        Tableau int32 indexé par [x, y], UNREACHABLE pour les cases inaccessibles.
+    """
+    size = grid.size
+    if not sources:
+        return np.full((size, size), UNREACHABLE, dtype=np.int32)
+    # Grille bordée de murs : les voisins d'une case sont à ±1 et ±width, sans test de bord
+    width = size + 2
+    passable = np.zeros((width, width), dtype=bool)
+    passable[1:-1, 1:-1] = grid.terrain == TRAVERSABLE
+    passable = passable.ravel()
+    distance = np.full(width * width, UNREACHABLE, dtype=np.int32)
+    frontier = np.unique(np.array([(x + 1) * width + y + 1 for x, y in sources], dtype=np.int64))
+    distance[frontier] = 0
+    if targets is not None:
+        targets = np.unique(np.array([(x + 1) * width + y + 1 for x, y in targets], dtype=np.int64))
+        targets = targets[distance[targets] == UNREACHABLE]
+
+    if grid.has_uniform_cost() and size * size <= SMALL_GRID_CELLS:
+        distance = _small_distance_map(width, passable.tolist(), frontier.tolist(), targets)
+    elif grid.has_uniform_cost():
+        unvisited = passable.copy()
+        unvisited[frontier] = False
+        neighbors = np.array([width, -width, 1, -1], dtype=np.int64)
+        last = np.empty(width * width, dtype=np.int64)
+        step = 0
+        while frontier.size and (targets is None or targets.size):
+            step += 1
+            candidates = (frontier[:, None] + neighbors).ravel()
+            candidates = candidates[unvisited[candidates]]
+            # Dédoublonnage en temps linéaire : on garde la dernière occurrence de chaque case
+            positions = np.arange(len(candidates))
+            last[candidates] = positions
+            frontier = candidates[last[candidates] == positions]
+            unvisited[frontier] = False
+            distance[frontier] = step
+            if targets is not None:
+                targets = targets[distance[targets] == UNREACHABLE]
+    else:
+        # Coûts variables : Dijkstra sur des listes Python, plus rapides à indexer une à une
+        step_cost = np.zeros((width, width), dtype=np.int64)
+        step_cost[1:-1, 1:-1] = grid.cost
+        passable = passable.tolist()
+        step_cost = step_cost.ravel().tolist()
+        best = distance.tolist()
+        pending = None if targets is None else set(targets.tolist())
+        heap = [(0, cell) for cell in frontier.tolist()]
+        while heap:
+            current, cell = heapq.heappop(heap)
+            if current > best[cell]:
+                continue
+            if pending is not None:
+                pending.discard(cell)
+                if not pending:
+                    # Les cases encore dans la file n'ont qu'une distance provisoire
+                    for cost, other in heap:
+                        if cost == best[other] and cost > current:
+                            best[other] = UNREACHABLE
+                    break
+            for neighbor in (cell + width, cell - width, cell + 1, cell - 1):
+                if passable[neighbor]:
+                    next_cost = current + step_cost[neighbor]
+                    if next_cost < best[neighbor]:
+                        best[neighbor] = next_cost
+                        heapq.heappush(heap, (next_cost, neighbor))
+        distance = np.array(best, dtype=np.int32)
+    return distance.reshape(width, width)[1:-1, 1:-1].copy()
+
+
+def _small_distance_map(width, passable, sources, targets):
+    """Parcours en largeur case par case de `distance_map`, pour les petites grilles à coûts uniformes."""
+    distance = [UNREACHABLE] * (width * width)
+    for cell in sources:
+        distance[cell] = 0
+    pending = -1 if targets is None else len(targets)
+    wanted = set() if targets is None else set(targets.tolist())
+    frontier = deque(sources)
+    while frontier and pending:
+        cell = frontier.popleft()
+        next_distance = distance[cell] + 1
+        for neighbor in (cell + width, cell - width, cell + 1, cell - 1):
+            if passable[neighbor] and distance[neighbor] == UNREACHABLE:
+                distance[neighbor] = next_distance
+                frontier.append(neighbor)
+                if neighbor in wanted:
+                    pending -= 1
+    return np.array(distance, dtype=np.int32)
+
+
+def downhill_step(grid, distance, x, y):
+    """
+    Retourne la case voisine libre la plus proche des sources selon `distance`.
+
+    Paramètres
+    ----------
+    grid : Grid
+        La grille (terrain et occupation).
+    distance : numpy.ndarray
+        Carte de distances calculée par `distance_map`.
+    x, y : int
+        La case actuelle.
+
+    Retourne
+    --------
+    tuple[int, int] | None
+        La case suivante, ou None si aucune case voisine libre n'est plus proche.
+    """
+    size = grid.size
+    best = None
+    best_distance = distance[x, y]
+    for dx, dy in NEIGHBOR_OFFSETS:
+        nx, ny = x + dx, y + dy
+        if (0 <= nx < size and 0 <= ny < size and distance[nx, ny] < best_distance
+                and grid.occupancy[nx, ny] == EMPTY):
+            best = (nx, ny)
+            best_distance = distance[nx, ny]
+    return best
@@ -0,0 +1,170 @@
+import json
+import time
+from collections import deque
+
+
+class _NullPhase:
+    """Contexte vide renvoyé par un profileur désactivé."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    """Contexte qui chronomètre une phase et l'enregistre dans le profileur."""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter_ns() - self.start)
+        return False
+
+
+class Profiler:
+    """
+    Instrumentation optionnelle de la boucle de jeu, phase par phase.
+
+    Désactivé, `phase` renvoie un contexte vide partagé : le coût se limite
+    à un appel de méthode. Activé, chaque phase est chronométrée, cumulée
+    dans l'image courante et gardée pour l'export au format Chrome Trace
+    (chrome://tracing, Perfetto).
+
+    Attributs
+    ---------
+    enabled : bool
+        Si les phases sont mesurées.
+    frames : collections.deque[dict]
+        Les dernières images : durée totale et durée de chaque phase (ms).
+    events : collections.deque[tuple[str, int, int]]
+        Les dernières phases mesurées : (nom, début, durée) en nanosecondes.
+    counters : dict[str, int]
+        Compteurs de l'image courante (appels de dessin, zones poussées...).
+    caches : dict[str, callable]
+        Fonctions qui renvoient (succès, échecs) pour chaque cache suivi.
+    """
+
+    def __init__(self, enabled=False, max_frames=120, max_events=100000):
+        self.enabled = enabled
+        self.frames = deque(maxlen=max_frames)
+        self.events = deque(maxlen=max_events)
+        self.counters = {}
+        self.caches = {}
+        self._phases = {}
+        self._frame_start = None
+
+    def phase(self, name):
+        """
+        Retourne un contexte qui mesure la phase `name`.
+
+        Exemple
+        -------
+            with profiler.phase("logic"):
+                game.update(dt)
+        """
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def record(self, name, start, duration):
+        """Enregistre une phase mesurée (temps en nanosecondes)."""
+        self.events.append((name, start, duration))
+        self._phases[name] = self._phases.get(name, 0) + duration
+
+    def count(self, name, amount=1):
+        """Ajoute `amount` au compteur `name` de l'image courante."""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def track_cache(self, name, stats):
+        """
+        Suit le taux de succès d'un cache.
+
+        Paramètres
+        ----------
+        name : str
+            Nom affiché du cache.
+        stats : callable
+            Fonction sans argument qui renvoie (succès, échecs) cumulés.
+        """
+        self.caches[name] = stats
+
+    def begin_frame(self):
+        """Commence une nouvelle image."""
+        if self.enabled:
+            self._phases = {}
+            self.counters = {}
+            self._frame_start = time.perf_counter_ns()
+
+    def end_frame(self):
+        """Termine l'image courante et l'ajoute à l'historique."""
+        if not self.enabled or self._frame_start is None:
+            return
+        duration = time.perf_counter_ns() - self._frame_start
+        self.record("frame", self._frame_start, duration)
+        frame = {name: value / 1e6 for name, value in self._phases.items()}
+        frame.update(self.counters)
+        self.frames.append(frame)
+        self._frame_start = None
+
+    def cache_hit_rates(self):
+        """Retourne le taux de succès (entre 0 et 1, ou None) de chaque cache suivi."""
+        rates = {}
+        for name, stats in self.caches.items():
+            hits, misses = stats()
+            rates[name] = hits / (hits + misses) if hits + misses else None
+        return rates
+
+    def overlay_lines(self):
+        """
+        Retourne les lignes de texte de l'affichage de performances.
+
+        Retourne
+        --------
+        list[str]
+            Durée de la dernière image et moyenne, compteurs, taux de succès des caches.
+        """
+        if not self.frames:
+            return ["profil : en attente"]
+        last = self.frames[-1]
+        average = sum(frame["frame"] for frame in self.frames) / len(self.frames)
+        lines = [f"image {last['frame']:.2f} ms (moy. {average:.2f} ms)"]
+        counters = [f"{name} {value}" for name, value in last.items()
+                    if isinstance(value, int)]
+        if counters:
+            lines.append(", ".join(counters))
+        rates = [f"{name} {'-' if rate is None else f'{rate:.0%}'}"
+                 for name, rate in self.cache_hit_rates().items()]
+        if rates:
+            lines.append("cache " + ", ".join(rates))
+        return lines
+
+    def export_chrome_trace(self, path):
+        """
+        Écrit les phases mesurées au format Chrome Trace (JSON).
+
+        Paramètres
+        ----------
+        path : str
+            Chemin du fichier à écrire.
+        """
+        events = [{"name": name, "ph": "X", "ts": start / 1000, "dur": duration / 1000,
+                   "pid": 0, "tid": 0}
+                  for name, start, duration in self.events]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,163 @@
+import numpy as np
+import pygame
+
+from grid import *
+from profiler import *
+from unit import *
+
+# Couleur de chaque code de terrain, dans l'ordre de grid.CELL_TYPES
+TERRAIN_COLORS = np.array([
+    (144, 238, 144),  # Vert clair : traversable
+    (220, 20, 60),  # Rouge foncé : non traversable
+], dtype=np.uint8)
+
+# Au-delà de ce nombre de zones modifiées, on pousse leur union en une seule fois
+MAX_DIRTY_RECTS = 64
+
+
+def render_terrain(grid, cell_size=CELL_SIZE, window=None):
+    """
+    Dessine le terrain (ou une partie) dans une surface hors écran.
+
+    Les couleurs sont calculées en une opération NumPy puis agrandies par
+    pygame, sans un appel de dessin par case.
+
+    Paramètres
+    ----------
+    grid : Grid
+        La grille à dessiner.
+    cell_size : int
+        Taille d'une case en pixels.
+    window : tuple[int, int, int, int], optionnel
+        Les cases (x0, x1, y0, y1) à dessiner ; toute la grille par défaut.
+
+    Retourne
+    --------
+    pygame.Surface
+        Une surface de cell_size pixels par case dessinée.
+    """
+    x0, x1, y0, y1 = window if window is not None else (0, grid.size, 0, grid.size)
+    colors = TERRAIN_COLORS[grid.terrain[x0:x1, y0:y1]]
+    surface = pygame.surfarray.make_surface(colors)
+    return pygame.transform.scale(surface, ((x1 - x0) * cell_size, (y1 - y0) * cell_size))
+
+
+def draw_outline(surface, color, rect, width):
+    """
+    Dessine le contour d'un rectangle avec quatre rectangles pleins.
+
+    Contrairement à `pygame.draw.rect(..., width)`, qui trace le contour de
+    l'intersection entre le rectangle et la zone de découpe, le résultat ne
+    dépend pas de la zone de découpe de la surface.
+
+    Paramètres
+    ----------
+    surface : pygame.Surface
+        La surface sur laquelle dessiner.
+    color : tuple[int, int, int]
+        Couleur du contour.
+    rect : tuple[int, int, int, int]
+        Le rectangle (x, y, largeur, hauteur).
+    width : int
+        Épaisseur du contour.
+    """
+    x, y, w, h = rect
+    surface.fill(color, (x, y, w, width))
+    surface.fill(color, (x, y + h - width, w, width))
+    surface.fill(color, (x, y, width, h))
+    surface.fill(color, (x + w - width, y, width, h))
+
+
+class DirtyRectRenderer:
+    """
+    Compose une image par couches et ne pousse à l'écran que ce qui a changé.
+
+    Chaque image est décrite par une liste d'entrées (signature, rect) dans
+    l'ordre de dessin. Une signature est un tuple hashable qui décrit
+    entièrement ce qui est dessiné ; si elle est identique d'une image à
+    l'autre, l'entrée n'est ni redessinée ni poussée.
+
+    Attributs
+    ---------
+    screen : pygame.Surface
+        La surface de la fenêtre.
+    draw_entries : callable
+        Fonction appelée avec la liste (dans l'ordre de dessin) des signatures
+        des entrées à redessiner dans une zone.
+    background : callable | None
+        Fonction appelée avec une zone de l'écran pour y redessiner le fond
+        statique (terrain) sous les entrées.
+    profiler : Profiler
+        Mesure les passes de dessin et compte les appels.
+    """
+
+    def __init__(self, screen, draw_entries, profiler=None):
+        self.screen = screen
+        self.draw_entries = draw_entries
+        self.profiler = profiler if profiler is not None else Profiler()
+        self.background = None
+        self.previous = {}
+        self.full_redraw = True
+
+    def set_background(self, background):
+        """
+        Remplace le fond statique ; l'image suivante sera entièrement redessinée.
+
+        Paramètres
+        ----------
+        background : callable | None
+            Fonction `background(area)` qui dessine le fond dans la zone
+            `area` de l'écran (la zone de découpe est déjà posée).
+        """
+        self.background = background
+        self.full_redraw = True
+
+    def invalidate(self):
+        """Force un redessin complet à la prochaine image."""
+        self.full_redraw = True
+
+    def render(self, entries):
+        """
+        Dessine une image et pousse les zones modifiées avec `pygame.display.update`.
+
+        Paramètres
+        ----------
+        entries : list[tuple[tuple, pygame.Rect]]
+            Les entrées de l'image, dans l'ordre de dessin.
+
+        Retourne
+        --------
+        list[pygame.Rect]
+            Les zones poussées à l'écran (vide si rien n'a changé).
+        """
+        current = dict(entries)
+        if self.full_redraw:
+            dirty = [self.screen.get_rect()]
+            self.full_redraw = False
+        else:
+            dirty = [rect for signature, rect in self.previous.items() if signature not in current]
+            dirty += [rect for signature, rect in current.items() if signature not in self.previous]
+            if len(dirty) > MAX_DIRTY_RECTS:
+                dirty = [dirty[0].unionall(dirty[1:])]
+
+        if dirty:
+            signatures = list(current)
+            rects = list(current.values())
+            draw_calls = 0
+            with self.profiler.phase("draw:layers"):
+                for area in dirty:
+                    self.screen.set_clip(area)
+                    self.screen.fill(BLACK, area)
+                    if self.background is not None:
+                        self.background(area)
+                    indices = area.collidelistall(rects)
+                    self.draw_entries([signatures[index] for index in indices])
+                    draw_calls += len(indices)
+                self.screen.set_clip(None)
+            with self.profiler.phase("display_update"):
+                pygame.display.update(dirty)
+            self.profiler.count("draw_calls", draw_calls)
+            self.profiler.count("dirty_rects", len(dirty))
+
+        self.previous = current
+        return dirty
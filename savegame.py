@@ -0,0 +1,301 @@
+import struct
+
+import numpy as np
+
+from engine import *
+
+# Sauvegarde : en-tête (signature, version du format, taille de la grille, nombre d'unités)
+SNAPSHOT_HEADER = struct.Struct("<4sHII")
+SNAPSHOT_MAGIC = b"TSNP"
+SNAPSHOT_VERSION = 1
+
+# État du générateur aléatoire du moteur (voir random.Random.getstate)
+RNG_STATE = struct.Struct("<625I?d")
+
+# Nombre maximal de compétences par unité dans un enregistrement
+MAX_SKILLS = 4
+
+# Une unité : x, y, santé, santé maximale, attaque, équipe, en jeu, compétences (-1 si aucune)
+UNIT_RECORD = struct.Struct(f"<5i2B{MAX_SKILLS}b")
+UNIT_DTYPE = np.dtype([("x", "<i4"), ("y", "<i4"), ("health", "<i4"), ("max_health", "<i4"),
+                       ("attack_power", "<i4"), ("team", "u1"), ("alive", "u1"),
+                       ("skills", "i1", (MAX_SKILLS,))])
+
+# Journal : en-tête (signature, version du format, longueur de la sauvegarde initiale)
+LOG_HEADER = struct.Struct("<4sHI")
+LOG_MAGIC = b"TLOG"
+LOG_VERSION = 1
+
+# Une action : type, compétence, unité, puis (x, y) ou (cible, 0)
+ACTION_RECORD = struct.Struct("<BBxxIii")
+ACTION_DTYPE = np.dtype([("kind", "u1"), ("skill", "u1"), ("pad", "V2"), ("unit", "<u4"),
+                         ("a", "<i4"), ("b", "<i4")])
+MOVE, SKILL, ATTACK = range(3)
+
+# Nombre d'actions lues d'un coup pendant une relecture
+REPLAY_CHUNK = 4096
+
+def dump_snapshot(engine):
+    """
+    Sérialise l'état du moteur.
+
+    Le format est fait pour être lu vite : un en-tête, l'état du
+    générateur aléatoire, le terrain et les coûts en octets bruts (un par
+    case, dans l'ordre de Grid.terrain), puis un enregistrement de taille
+    fixe UNIT_RECORD par ligne de la table des unités, mortes comprises,
+    pour que le numéro de ligne reste l'identifiant d'une unité.
+
+    Retourne
+    --------
+    bytes
+        La sauvegarde.
+    """
+    grid, table = engine.grid, engine.units
+    count = table.count
+    records = np.zeros(count, dtype=UNIT_DTYPE)
+    for name in ("x", "y", "health", "max_health", "attack_power", "team", "alive"):
+        records[name] = getattr(table, name)[:count]
+    # Les unités partagent en général quelques jeux de compétences : un passage par jeu distinct
+    kinds = {}
+    which = np.array([kinds.setdefault(skill_ids, len(kinds)) for skill_ids in table.skill_ids], dtype=np.int64)
+    padded = np.full((max(len(kinds), 1), MAX_SKILLS), -1, dtype=np.int8)
+    for skill_ids, kind in kinds.items():
+        padded[kind, :len(skill_ids)] = skill_ids
+    records["skills"] = padded[which] if count else padded[:0]
+    _, state, gauss_next = engine.rng.getstate()
+    return b"".join((
+        SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, grid.size, count),
+        RNG_STATE.pack(*state, gauss_next is not None, gauss_next or 0.0),
+        grid.terrain.tobytes(),
+        grid.cost.tobytes(),
+        records.tobytes(),
+    ))
+
+
+def load_snapshot(data):
+    """
+    Reconstruit un moteur à partir d'une sauvegarde de `dump_snapshot`.
+
+    Paramètres
+    ----------
+    data : bytes | memoryview
+        La sauvegarde.
+
+    Retourne
+    --------
+    Engine
+        Le moteur, dans l'état sauvegardé.
+
+    Lève
+    ----
+    ValueError
+        Si les données ne sont pas une sauvegarde de cette version.
+    """
+    data = memoryview(data)
+    magic, version, size, count = SNAPSHOT_HEADER.unpack_from(data)
+    if (magic, version) != (SNAPSHOT_MAGIC, SNAPSHOT_VERSION):
+        raise ValueError(f"Sauvegarde non reconnue (signature {magic!r}, version {version})")
+    offset = SNAPSHOT_HEADER.size
+    rng_state = RNG_STATE.unpack_from(data, offset)
+    offset += RNG_STATE.size
+    cells = size * size
+    terrain = np.frombuffer(data, np.uint8, cells, offset).reshape(size, size)
+    cost = np.frombuffer(data, np.uint8, cells, offset + cells).reshape(size, size)
+    records = np.frombuffer(data, UNIT_DTYPE, count, offset + 2 * cells)
+
+    table = UnitTable(max(count, 16))
+    table.count = count
+    for name in ("x", "y", "health", "max_health", "attack_power", "team", "alive"):
+        getattr(table, name)[:count] = records[name]
+    # Chaque ligne de compétences est vue comme un seul entier pour dédoublonner vite
+    packed = np.ascontiguousarray(records["skills"]).view(f"<i{MAX_SKILLS}").ravel()
+    kinds, which = np.unique(packed, return_inverse=True)
+    kinds = [tuple(skill for skill in skills if skill >= 0)
+             for skills in kinds.view(np.int8).reshape(-1, MAX_SKILLS).tolist()]
+    table.skill_ids = [kinds[kind] for kind in which.ravel().tolist()]
+    table.handles = [None] * count
+
+    engine = Engine(grid=Grid(terrain.copy(), cost.copy()), units=table)
+    engine.rng.setstate((3, rng_state[:625], rng_state[626] if rng_state[625] else None))
+    return engine
+
+
+def save_game(engine, path):
+    """Écrit la sauvegarde du moteur dans le fichier `path`."""
+    with open(path, "wb") as f:
+        f.write(dump_snapshot(engine))
+
+
+def load_game(path):
+    """Retourne le moteur sauvegardé dans le fichier `path`."""
+    with open(path, "rb") as f:
+        return load_snapshot(f.read())
+
+
+def encode_action(action):
+    """
+    Retourne l'enregistrement ACTION_RECORD d'une action.
+
+    Les unités sont désignées par leur numéro de ligne dans la table du moteur.
+    """
+    if isinstance(action, MoveAction):
+        return ACTION_RECORD.pack(MOVE, 0, action.unit.index, action.x, action.y)
+    if isinstance(action, SkillAction):
+        return ACTION_RECORD.pack(SKILL, SKILLS.index(action.skill), action.unit.index, action.x, action.y)
+    if isinstance(action, AttackAction):
+        return ACTION_RECORD.pack(ATTACK, 0, action.unit.index, action.target.index, 0)
+    raise TypeError(f"Action non journalisable : {action!r}")
+
+
+def decode_action(engine, kind, skill, unit, a, b):
+    """
+    Retourne l'action d'un enregistrement, avec les unités du moteur `engine`.
+
+    Lève
+    ----
+    ValueError
+        Si le type d'action, la compétence ou un numéro d'unité n'existe pas
+        (les enregistrements peuvent venir d'un client du serveur).
+    """
+    count = engine.units.count
+    if not 0 <= unit < count:
+        raise ValueError(f"Unité inconnue : {unit}")
+    handle = engine.units.handle(unit)
+    if kind == MOVE:
+        return MoveAction(handle, a, b)
+    if kind == SKILL:
+        if not 0 <= skill < len(SKILLS):
+            raise ValueError(f"Compétence inconnue : {skill}")
+        return SkillAction(handle, SKILLS[skill], a, b)
+    if kind == ATTACK:
+        if not 0 <= a < count:
+            raise ValueError(f"Unité cible inconnue : {a}")
+        return AttackAction(handle, engine.units.handle(a))
+    raise ValueError(f"Type d'action inconnu : {kind}")
+
+
+class ActionLog:
+    """
+    Journal binaire des actions d'une partie, en ajout seul.
+
+    Le fichier commence par un en-tête et la sauvegarde de l'état initial,
+    suivis d'un enregistrement ACTION_RECORD de taille fixe par action
+    passée à `Engine.apply` (joueur et ennemis). Il peut être lu pendant
+    l'écriture ; un dernier enregistrement incomplet est ignoré à la relecture.
+
+    Attributs
+    ---------
+    engine : Engine
+        Le moteur journalisé.
+    stream : io.BufferedIOBase
+        Le flux binaire où sont écrites les actions.
+    count : int
+        Nombre d'actions écrites.
+    """
+
+    def __init__(self, engine, stream):
+        """
+        Commence le journal de `engine` dans `stream`.
+
+        Paramètres
+        ----------
+        engine : Engine
+            Le moteur à journaliser ; son état courant est l'état initial du journal.
+        stream : io.BufferedIOBase
+            Un flux binaire ouvert en écriture.
+        """
+        self.engine = engine
+        self.stream = stream
+        self.count = 0
+        snapshot = dump_snapshot(engine)
+        stream.write(LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, len(snapshot)))
+        stream.write(snapshot)
+        engine.log = self
+
+    @classmethod
+    def open(cls, engine, path):
+        """Commence le journal de `engine` dans le fichier `path`."""
+        return cls(engine, open(path, "wb"))
+
+    def append(self, action):
+        """Ajoute une action à la fin du journal."""
+        self.stream.write(encode_action(action))
+        self.count += 1
+
+    def flush(self):
+        """Pousse les actions en attente vers le fichier."""
+        self.stream.flush()
+
+    def close(self):
+        """Termine le journal : le moteur n'est plus journalisé."""
+        if self.engine.log is self:
+            self.engine.log = None
+        self.stream.close()
+
+
+def read_log_header(stream):
+    """
+    Lit le début d'un journal et retourne le moteur dans son état initial.
+
+    Lève
+    ----
+    ValueError
+        Si le flux n'est pas un journal de cette version.
+    """
+    magic, version, length = LOG_HEADER.unpack(stream.read(LOG_HEADER.size))
+    if (magic, version) != (LOG_MAGIC, LOG_VERSION):
+        raise ValueError(f"Journal non reconnu (signature {magic!r}, version {version})")
+    return load_snapshot(stream.read(length))
+
+
+def iter_records(stream):
+    """
+    Parcourt les enregistrements d'actions d'un flux, par blocs.
+
+    Retourne
+    --------
+    iterator[tuple[int, int, int, int, int]]
+        (type, compétence, unité, a, b) pour chaque action complète.
+    """
+    size = ACTION_DTYPE.itemsize
+    pending = b""
+    while True:
+        chunk = stream.read(REPLAY_CHUNK * size)
+        if not chunk:
+            return
+        data = pending + chunk
+        whole = len(data) // size * size
+        records = np.frombuffer(data, ACTION_DTYPE, whole // size)
+        yield from zip(records["kind"].tolist(), records["skill"].tolist(), records["unit"].tolist(),
+                       records["a"].tolist(), records["b"].tolist())
+        pending = data[whole:]
+
+
+def replay(stream, limit=None):
+    """
+    Rejoue un journal dans un nouveau moteur, sans affichage ni IA.
+
+    Les actions des ennemis étant journalisées, la relecture n'a qu'à les
+    réappliquer : elle est déterministe et va aussi vite que le moteur.
+
+    Paramètres
+    ----------
+    stream : io.BufferedIOBase | str
+        Le journal, ou le chemin de son fichier.
+    limit : int, optionnel
+        Nombre maximal d'actions à rejouer (pour s'arrêter avant un incident).
+
+    Retourne
+    --------
+    Engine
+        Le moteur après les actions rejouées.
+    """
+    if isinstance(stream, str):
+        with open(stream, "rb") as f:
+            return replay(f, limit)
+    engine = read_log_header(stream)
+    for count, record in enumerate(iter_records(stream)):
+        if limit is not None and count >= limit:
+            break
+        engine.apply(decode_action(engine, *record))
+    return engine
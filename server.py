@@ -0,0 +1,722 @@
+"""
+Serveur local de parties : de nombreuses parties simultanées dans un seul processus asyncio.
+
+Chaque client rejoint une partie (qu'il crée ou qu'il regarde), envoie les
+actions de ses unités, et reçoit après chaque pas de la partie les seules
+différences d'état : unités modifiées et cases de terrain changées. Une
+sauvegarde complète n'est envoyée qu'à l'arrivée, ou à un client trop
+lent qui a dû sauter des différences.
+
+Protocole
+---------
+Des trames binaires FRAME_HEADER (type, longueur) suivies de leur contenu :
+
+    JOIN       client -> serveur  JOIN_REQUEST
+    WELCOME    serveur -> client  WELCOME_HEADER puis une sauvegarde (voir savegame)
+    ACTION     client -> serveur  ACTION_RECORD (voir savegame)
+    END_TURN   client -> serveur  vide
+    DELTA      serveur -> client  DELTA_HEADER puis UNIT_DELTA_DTYPE et TERRAIN_DELTA_DTYPE
+    RESYNC     serveur -> client  DELTA_HEADER puis une sauvegarde
+    GAME_OVER  serveur -> client  le gagnant ('player', 'enemy' ou 'draw') en UTF-8
+    ERROR      serveur -> client  un message en UTF-8
+
+Exemples
+--------
+    python server.py --port 8765
+    python server.py --selftest --clients 300
+"""
+import argparse
+import asyncio
+import random
+import struct
+import sys
+import time
+
+import numpy as np
+
+from engine import *
+from mcts import *
+from savegame import *
+from tournament import make_controller
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+
+# Trame : type et longueur du contenu
+FRAME_HEADER = struct.Struct("<BI")
+JOIN, WELCOME, ACTION, END_TURN, DELTA, RESYNC, GAME_OVER, ERROR = range(8)
+
+# Taille maximale du contenu d'une trame reçue par le serveur
+MAX_FRAME = 1 << 16
+
+# Demande d'une partie : numéro (-1 pour en créer une), graine, taille, spectateur
+JOIN_REQUEST = struct.Struct("<iIH?")
+NEW_GAME = -1
+
+# Tailles de carte acceptées à la création d'une partie (la taille demandée y est ramenée)
+MIN_MAP_SIZE = 8
+MAX_MAP_SIZE = 512
+
+# Accueil : numéro de la partie, pas, tour
+WELCOME_HEADER = struct.Struct("<III")
+
+# Différences : pas, tour, équipe qui a la main (0 joueur, 1 ennemis), nombre d'unités et de cases
+DELTA_HEADER = struct.Struct("<IIBII")
+# Les coordonnées tiennent sur 16 bits, ce que garantit MAX_MAP_SIZE
+UNIT_DELTA_DTYPE = np.dtype([("index", "<u4"), ("x", "<u2"), ("y", "<u2"), ("health", "<i4"), ("alive", "u1")])
+TERRAIN_DELTA_DTYPE = np.dtype([("x", "<u2"), ("y", "<u2"), ("code", "u1")])
+
+# Colonnes de la table des unités comparées d'un pas à l'autre
+DELTA_COLUMNS = ("x", "y", "health", "alive")
+
+# Actions en attente par partie : au-delà, la lecture du client est suspendue
+MAX_PENDING_ACTIONS = 64
+
+# Trames en attente par client : au-delà, ses différences sont remplacées par une sauvegarde
+MAX_PENDING_FRAMES = 32
+
+# Nombre maximal d'actions traitées par pas de partie
+MAX_ACTIONS_PER_TICK = 32
+
+# Délai laissé à un client pour recevoir ses dernières trames avant la fermeture, en secondes
+CLOSE_TIMEOUT = 1.0
+
+# Au-delà de ce délai sans action du joueur, en secondes, la partie est abandonnée
+IDLE_TIMEOUT = 300.0
+
+
+def encode_frame(kind, payload=b""):
+    """Retourne la trame de type `kind`."""
+    return FRAME_HEADER.pack(kind, len(payload)) + payload
+
+
+async def read_frame(reader, max_size=None):
+    """
+    Lit une trame.
+
+    Retourne
+    --------
+    tuple[int, bytes]
+        Le type et le contenu de la trame.
+
+    Lève
+    ----
+    asyncio.IncompleteReadError
+        Si la connexion est fermée.
+    ValueError
+        Si la trame dépasse `max_size` octets.
+    """
+    kind, length = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    if max_size is not None and length > max_size:
+        raise ValueError(f"Trame trop longue ({length} octets)")
+    return kind, await reader.readexactly(length)
+
+
+class Subscriber:
+    """
+    Un client abonné à une partie, avec sa file de trames à envoyer.
+
+    La partie ne se bloque jamais sur un client : elle dépose ses trames
+    dans une file bornée, vidée par une tâche propre au client qui attend
+    que la connexion les absorbe. Quand la file est pleine, le client est
+    marqué en retard et ses trames en attente sont abandonnées ; la partie
+    lui envoie ensuite une sauvegarde complète.
+
+    Attributs
+    ---------
+    writer : asyncio.StreamWriter
+        La connexion du client.
+    spectator : bool
+        True si le client ne fait que regarder.
+    behind : bool
+        True si des différences ont été abandonnées depuis la dernière sauvegarde.
+    frames_sent, bytes_sent, resyncs : int
+        Statistiques cumulées.
+    """
+
+    def __init__(self, writer, spectator=False, max_pending=MAX_PENDING_FRAMES):
+        self.writer = writer
+        self.spectator = spectator
+        self.behind = False
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.resyncs = 0
+        self._queue = asyncio.Queue(max_pending)
+        self._task = asyncio.create_task(self._pump())
+
+    def send(self, frame):
+        """
+        Dépose une trame à envoyer.
+
+        Retourne
+        --------
+        bool
+            False si la file était pleine : les trames en attente sont
+            abandonnées et le client est marqué en retard.
+        """
+        try:
+            self._queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self.behind = True
+            return False
+
+    async def _pump(self):
+        try:
+            while True:
+                frame = await self._queue.get()
+                if frame is None:
+                    break
+                self.writer.write(frame)
+                await self.writer.drain()
+                self.frames_sent += 1
+                self.bytes_sent += len(frame)
+        except ConnectionError:
+            pass
+        finally:
+            self.writer.close()
+
+    def hang_up(self):
+        """Demande la fermeture de la connexion une fois les trames en attente envoyées."""
+        try:
+            self._queue.put_nowait(None)
+        except asyncio.QueueFull:
+            self._task.cancel()
+
+    async def close(self):
+        """Envoie les trames en attente (au plus CLOSE_TIMEOUT secondes) puis ferme la connexion."""
+        self.hang_up()
+        await asyncio.wait([self._task], timeout=CLOSE_TIMEOUT)
+        if not self._task.done():
+            self._task.cancel()
+            await asyncio.wait([self._task])
+
+
+class Match:
+    """
+    Une partie hébergée par le serveur.
+
+    La partie avance par pas, dans sa propre tâche : elle dort tant
+    qu'aucune action n'arrive, puis traite les actions en attente (au plus
+    MAX_ACTIONS_PER_TICK), fait jouer les ennemis si le joueur a fini son
+    tour, et diffuse une seule trame de différences à tous ses clients.
+    Deux pas sont séparés d'au moins `tick_interval` secondes, ce qui
+    regroupe les actions qui arrivent en rafale. Le tour des ennemis est
+    calculé dans un fil à part, pour ne pas bloquer les autres parties.
+
+    La partie est abandonnée (sa tâche annulée) quand son dernier joueur se
+    déconnecte ou qu'aucune action n'arrive pendant `idle_timeout`
+    secondes ; à la fin, ses spectateurs sont déconnectés.
+
+    Attributs
+    ---------
+    game_id : int
+        Numéro de la partie.
+    engine : Engine
+        Le moteur, qui fait autorité.
+    controller : object
+        L'IA des ennemis (voir tournament.make_controller).
+    actions : asyncio.Queue
+        Actions reçues du joueur, et END_TURN pour finir son tour.
+    subscribers : list[Subscriber]
+        Les clients qui reçoivent les différences.
+    tick, turn : int
+        Nombre de pas et de tours joués.
+    winner : str | None
+        'player', 'enemy' ou 'draw' quand la partie est finie.
+    """
+
+    def __init__(self, game_id, engine, controller, tick_interval=0.02, max_turns=200, idle_timeout=IDLE_TIMEOUT):
+        self.game_id = game_id
+        self.engine = engine
+        self.controller = controller
+        self.tick_interval = tick_interval
+        self.max_turns = max_turns
+        self.idle_timeout = idle_timeout
+        self.actions = asyncio.Queue(MAX_PENDING_ACTIONS)
+        self.subscribers = []
+        self.tick = 0
+        self.turn = 0
+        self.winner = None
+        self.errors = 0
+        self._sent = {name: getattr(engine.units, name)[:engine.units.count].copy() for name in DELTA_COLUMNS}
+        self._terrain_seen = engine.grid.terrain_change_count
+        self._task = None
+
+    def start(self):
+        """Lance la tâche de la partie."""
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    def welcome(self):
+        """Retourne la trame d'accueil : l'état complet de la partie."""
+        return encode_frame(WELCOME, WELCOME_HEADER.pack(self.game_id, self.tick, self.turn)
+                            + dump_snapshot(self.engine))
+
+    def subscribe(self, subscriber):
+        """Ajoute un client ; il reçoit l'état complet puis les différences."""
+        subscriber.send(self.welcome())
+        self.subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber):
+        """Retire un client ; la partie est abandonnée s'il ne reste plus aucun joueur."""
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+        if self._task is not None and all(other.spectator for other in self.subscribers):
+            self._task.cancel()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while self.winner is None:
+                batch = [await asyncio.wait_for(self.actions.get(), self.idle_timeout)]
+                started = loop.time()
+                while len(batch) < MAX_ACTIONS_PER_TICK and not self.actions.empty():
+                    batch.append(self.actions.get_nowait())
+                await self.step(batch)
+                self.broadcast()
+                await asyncio.sleep(max(started + self.tick_interval - loop.time(), 0))
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            if self.winner is not None:
+                frame = encode_frame(GAME_OVER, self.winner.encode())
+            else:
+                frame = encode_frame(ERROR, "Partie abandonnée".encode())
+            for subscriber in self.subscribers:
+                subscriber.send(frame)
+                subscriber.hang_up()
+
+    async def step(self, batch):
+        """
+        Joue un pas : applique les actions du joueur, puis le tour des ennemis s'il a fini le sien.
+
+        Paramètres
+        ----------
+        batch : list[tuple | None]
+            Les enregistrements d'actions reçus (voir savegame.decode_action),
+            None pour une fin de tour.
+        """
+        engine = self.engine
+        self.tick += 1
+        for record in batch:
+            if engine.winner() is not None:
+                break
+            if record is None:
+                engine.end_turn()
+                await self.play_enemy_turn()
+                engine.end_turn()
+                self.turn += 1
+                continue
+            try:
+                action = decode_action(engine, *record)
+            except ValueError:
+                self.errors += 1
+                continue
+            if not self.is_allowed(action) or not engine.apply(action):
+                self.errors += 1
+        self.winner = engine.winner()
+        if self.winner is None and self.turn >= self.max_turns:
+            self.winner = 'draw'
+
+    def is_allowed(self, action):
+        """
+        Indique si un client peut demander l'action : elle doit porter sur une
+        unité du joueur en jeu et, pour une attaque, viser un ennemi en jeu.
+        """
+        engine = self.engine
+        if action.unit.team != 'player' or action.unit not in engine.occupancy:
+            return False
+        if isinstance(action, AttackAction):
+            return action.target.team == 'enemy' and action.target in engine.occupancy
+        return True
+
+    async def play_enemy_turn(self):
+        """
+        Fait jouer les ennemis sur une copie du moteur, dans un fil à part,
+        puis reprend l'état des unités qui ont changé.
+
+        Pendant la recherche, le moteur de la partie n'est pas modifié : les
+        clients qui arrivent reçoivent un état cohérent.
+        """
+        engine = self.engine
+        clone = engine.clone()
+        await asyncio.get_running_loop().run_in_executor(None, self.controller.play_turn, clone)
+        count = engine.units.count
+        changed = np.zeros(count, dtype=bool)
+        for name in DELTA_COLUMNS:
+            changed |= getattr(clone.units, name)[:count] != getattr(engine.units, name)[:count]
+        rows = np.flatnonzero(changed)
+        engine.apply_unit_states(rows.tolist(), *(getattr(clone.units, name)[rows].tolist() for name in DELTA_COLUMNS))
+
+    def delta(self):
+        """
+        Retourne le contenu de la trame de différences depuis le pas précédent.
+
+        Retourne
+        --------
+        bytes | None
+            Le contenu, ou None si les différences ne peuvent pas être
+            décrites (nombre d'unités changé, trop de changements de terrain) ;
+            une sauvegarde complète est alors nécessaire.
+        """
+        table, grid = self.engine.units, self.engine.grid
+        count = table.count
+        if count != len(self._sent["x"]):
+            return None
+        changed = np.zeros(count, dtype=bool)
+        for name in DELTA_COLUMNS:
+            column = getattr(table, name)[:count]
+            changed |= column != self._sent[name]
+            self._sent[name][:] = column
+        rows = np.flatnonzero(changed)
+        units = np.zeros(len(rows), dtype=UNIT_DELTA_DTYPE)
+        units["index"] = rows
+        for name in DELTA_COLUMNS:
+            units[name] = getattr(table, name)[rows]
+        pending = grid.terrain_change_count - self._terrain_seen
+        self._terrain_seen = grid.terrain_change_count
+        if pending > len(grid.terrain_changes):
+            return None
+        cells = list(grid.terrain_changes)[len(grid.terrain_changes) - pending:]
+        terrain = np.zeros(len(cells), dtype=TERRAIN_DELTA_DTYPE)
+        if cells:
+            terrain["x"], terrain["y"] = zip(*cells)
+            terrain["code"] = grid.terrain[terrain["x"], terrain["y"]]
+        side = 0 if self.engine.side == 'player' else 1
+        return DELTA_HEADER.pack(self.tick, self.turn, side, len(units), len(terrain)) + units.tobytes() + terrain.tobytes()
+
+    def resync_frame(self):
+        """Retourne la trame de sauvegarde complète qui remplace les différences manquées."""
+        side = 0 if self.engine.side == 'player' else 1
+        return encode_frame(RESYNC, DELTA_HEADER.pack(self.tick, self.turn, side, 0, 0) + dump_snapshot(self.engine))
+
+    def broadcast(self):
+        """Envoie les différences du pas à tous les clients, et une sauvegarde aux clients en retard."""
+        payload = self.delta()
+        frame = encode_frame(DELTA, payload) if payload is not None else None
+        resync = None
+        for subscriber in self.subscribers:
+            if frame is not None and not subscriber.behind and subscriber.send(frame):
+                continue
+            resync = resync or self.resync_frame()
+            subscriber.behind = False
+            subscriber.resyncs += 1
+            if not subscriber.send(resync):
+                subscriber.behind = True
+
+
+class MatchServer:
+    """
+    Héberge les parties et les connexions de leurs clients.
+
+    Attributs
+    ---------
+    matches : dict[int, Match]
+        Les parties en cours, par numéro.
+    enemy : str
+        Nom de l'IA des ennemis (voir tournament.CONTROLLERS).
+    enemy_options : dict
+        Paramètres de cette IA.
+    tick_interval : float
+        Durée minimale d'un pas de partie, en secondes.
+    max_turns : int
+        Au-delà, la partie est nulle.
+    finished : int
+        Nombre de parties terminées.
+    abandoned : int
+        Nombre de parties abandonnées par leurs joueurs.
+    """
+
+    def __init__(self, enemy="default", enemy_options=None, tick_interval=0.02, max_turns=200):
+        self.enemy = enemy
+        self.enemy_options = enemy_options or {}
+        self.tick_interval = tick_interval
+        self.max_turns = max_turns
+        self.matches = {}
+        self.finished = 0
+        self.abandoned = 0
+        self._next_id = 0
+        self._server = None
+        self._connections = {}
+
+    async def start(self, host=SERVER_HOST, port=SERVER_PORT):
+        """Commence à écouter ; retourne le serveur asyncio (port 0 pour un port libre)."""
+        self._server = await asyncio.start_server(self.handle_client, host, port)
+        return self._server
+
+    @property
+    def port(self):
+        """Le port d'écoute."""
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """Arrête d'écouter et ferme les connexions des clients."""
+        self._server.close()
+        for writer in self._connections.values():
+            writer.close()
+        if self._connections:
+            await asyncio.wait(list(self._connections))
+        await self._server.wait_closed()
+
+    def create_match(self, seed, size):
+        """Crée et lance une partie ; la taille est ramenée entre MIN_MAP_SIZE et MAX_MAP_SIZE."""
+        game_id = self._next_id
+        self._next_id += 1
+        engine = Engine(min(max(size, MIN_MAP_SIZE), MAX_MAP_SIZE), seed=seed)
+        controller = make_controller(self.enemy, 'enemy', seed, self.enemy_options)
+        match = self.matches[game_id] = Match(game_id, engine, controller, self.tick_interval, self.max_turns)
+        match.start().add_done_callback(lambda _: self._finish(game_id))
+        return match
+
+    def _finish(self, game_id):
+        match = self.matches.pop(game_id, None)
+        if match is not None and match.winner is not None:
+            self.finished += 1
+        else:
+            self.abandoned += 1
+
+    async def handle_client(self, reader, writer):
+        """
+        Sert un client : une trame JOIN, puis ses actions jusqu'à la déconnexion.
+
+        La lecture attend qu'il y ait de la place dans la file d'actions de
+        la partie : un client trop rapide est freiné par TCP.
+        """
+        subscriber = match = None
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            kind, payload = await read_frame(reader, MAX_FRAME)
+            if kind != JOIN or len(payload) != JOIN_REQUEST.size:
+                writer.write(encode_frame(ERROR, b"JOIN attendu"))
+                return
+            game_id, seed, size, spectator = JOIN_REQUEST.unpack(payload)
+            if game_id == NEW_GAME and not spectator:
+                match = self.create_match(seed, size)
+            else:
+                match = self.matches.get(game_id)
+            if match is None:
+                writer.write(encode_frame(ERROR, f"Partie inconnue : {game_id}".encode()))
+                return
+            subscriber = Subscriber(writer, spectator)
+            match.subscribe(subscriber)
+            while match.winner is None:
+                kind, payload = await read_frame(reader, MAX_FRAME)
+                if subscriber.spectator:
+                    continue
+                if kind == ACTION and len(payload) == ACTION_RECORD.size:
+                    await match.actions.put(ACTION_RECORD.unpack(payload))
+                elif kind == END_TURN:
+                    await match.actions.put(None)
+                else:
+                    subscriber.send(encode_frame(ERROR, f"Trame inattendue : {kind}".encode()))
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            if subscriber is None:
+                writer.close()
+            else:
+                if match is not None:
+                    match.unsubscribe(subscriber)
+                await subscriber.close()
+            del self._connections[task]
+
+
+class MatchClient:
+    """
+    Client d'une partie du serveur, avec une copie locale du moteur.
+
+    La copie est construite à partir de la sauvegarde d'accueil puis tenue
+    à jour par les différences reçues ; elle sert à choisir les actions et
+    à afficher la partie, le serveur restant seul juge des règles.
+
+    Attributs
+    ---------
+    engine : Engine | None
+        La copie locale du moteur, après `join`.
+    game_id : int
+        Numéro de la partie.
+    tick, turn : int
+        Pas et tour de la dernière trame reçue.
+    side : str
+        L'équipe qui a la main.
+    winner : str | None
+        Le gagnant, quand la partie est finie.
+    bytes_received, deltas, delta_bytes, resyncs : int
+        Statistiques cumulées.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.engine = None
+        self.game_id = None
+        self.tick = self.turn = 0
+        self.side = 'player'
+        self.winner = None
+        self.bytes_received = 0
+        self.deltas = 0
+        self.delta_bytes = 0
+        self.resyncs = 0
+
+    @classmethod
+    async def connect(cls, host=SERVER_HOST, port=SERVER_PORT):
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def join(self, game_id=NEW_GAME, seed=0, size=16, spectator=False):
+        """
+        Rejoint (ou crée) une partie et retourne la copie locale du moteur.
+
+        Lève
+        ----
+        ConnectionError
+            Si le serveur refuse la demande.
+        """
+        self.writer.write(encode_frame(JOIN, JOIN_REQUEST.pack(game_id, seed, size, spectator)))
+        await self.writer.drain()
+        kind, payload = await self._read()
+        if kind != WELCOME:
+            raise ConnectionError(payload.decode(errors="replace"))
+        self.game_id, self.tick, self.turn = WELCOME_HEADER.unpack_from(payload)
+        self.engine = load_snapshot(memoryview(payload)[WELCOME_HEADER.size:])
+        return self.engine
+
+    async def send_actions(self, actions, end_turn=True):
+        """Envoie des actions du joueur, suivies d'une fin de tour par défaut."""
+        frames = [encode_frame(ACTION, encode_action(action)) for action in actions]
+        if end_turn:
+            frames.append(encode_frame(END_TURN))
+        self.writer.write(b"".join(frames))
+        await self.writer.drain()
+
+    async def receive(self):
+        """
+        Attend la trame suivante du serveur et l'applique à la copie locale.
+
+        Retourne
+        --------
+        int
+            Le type de la trame (DELTA, RESYNC, GAME_OVER ou ERROR).
+        """
+        kind, payload = await self._read()
+        if kind == DELTA:
+            self.apply_delta(payload)
+            self.deltas += 1
+            self.delta_bytes += FRAME_HEADER.size + len(payload)
+        elif kind == RESYNC:
+            self._read_delta_header(payload)
+            self.engine = load_snapshot(memoryview(payload)[DELTA_HEADER.size:])
+            self.resyncs += 1
+        elif kind == GAME_OVER:
+            self.winner = payload.decode()
+        return kind
+
+    def apply_delta(self, payload):
+        """Applique le contenu d'une trame DELTA à la copie locale du moteur."""
+        units, cells = self._read_delta_header(payload)
+        offset = DELTA_HEADER.size
+        records = np.frombuffer(payload, UNIT_DELTA_DTYPE, units, offset)
+        terrain = np.frombuffer(payload, TERRAIN_DELTA_DTYPE, cells, offset + records.nbytes)
+        for x, y, code in zip(terrain["x"].tolist(), terrain["y"].tolist(), terrain["code"].tolist()):
+            self.engine.grid.set_terrain(x, y, CELL_TYPES[code])
+        self.engine.apply_unit_states(records["index"].tolist(), records["x"].tolist(), records["y"].tolist(),
+                                      records["health"].tolist(), records["alive"].astype(bool).tolist())
+
+    def _read_delta_header(self, payload):
+        self.tick, self.turn, side, units, cells = DELTA_HEADER.unpack_from(payload)
+        self.side = TEAMS[side]
+        return units, cells
+
+    async def _read(self):
+        kind, payload = await read_frame(self.reader)
+        self.bytes_received += FRAME_HEADER.size + len(payload)
+        return kind, payload
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def play_bot(port, seed, size=16, host=SERVER_HOST):
+    """
+    Client de test : crée une partie et la joue jusqu'au bout avec la politique de `mcts`.
+
+    Chaque tour, les actions de toutes les unités du joueur sont choisies
+    sur la copie locale et envoyées d'un coup avec la fin du tour ; le
+    client attend ensuite les différences du tour suivant.
+
+    Retourne
+    --------
+    MatchClient
+        Le client, partie finie.
+    """
+    rng = random.Random(seed)
+    client = await MatchClient.connect(host, port)
+    try:
+        engine = await client.join(seed=seed, size=size)
+        while client.winner is None:
+            actions = []
+            for unit in engine.player_units:
+                actions.extend(player_policy(engine, unit, rng))
+            turn = client.turn
+            await client.send_actions(actions)
+            while client.winner is None and client.turn == turn:
+                await client.receive()
+            engine = client.engine
+    finally:
+        await client.close()
+    return client
+
+
+async def selftest(clients, size, tick_interval, enemy):
+    """Lance un serveur et `clients` clients de test sur la machine locale, et affiche les statistiques."""
+    server = MatchServer(enemy, tick_interval=tick_interval)
+    await server.start(SERVER_HOST, 0)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(play_bot(server.port, seed, size) for seed in range(clients)))
+    elapsed = time.perf_counter() - start
+    await server.close()
+    received = sum(client.delta_bytes for client in results)
+    deltas = sum(client.deltas for client in results)
+    winners = {team: sum(client.winner == team for client in results) for team in ('player', 'enemy', 'draw')}
+    snapshot = len(dump_snapshot(Engine(min(max(size, MIN_MAP_SIZE), MAX_MAP_SIZE), seed=0)))
+    print(f"{clients} parties en {elapsed:.2f} s ({clients / elapsed:.1f} parties/s) : {winners}")
+    print(f"{deltas} différences, {received / max(deltas, 1):.0f} octets par trame en moyenne "
+          f"(sauvegarde complète : {snapshot} octets), {sum(client.resyncs for client in results)} resynchronisations")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--enemy", default="default", help="IA des ennemis (voir tournament.py)")
+    parser.add_argument("--tick", type=float, default=0.02, help="durée minimale d'un pas de partie, en secondes")
+    parser.add_argument("--selftest", action="store_true", help="jouer des parties avec des clients de test locaux")
+    parser.add_argument("--clients", type=int, default=100, help="nombre de clients de test")
+    parser.add_argument("--size", type=int, default=16, help="taille des cartes des clients de test")
+    args = parser.parse_args(argv)
+
+    if args.selftest:
+        asyncio.run(selftest(args.clients, args.size, args.tick, args.enemy))
+        return
+
+    async def serve():
+        server = await MatchServer(args.enemy, tick_interval=args.tick).start(args.host, args.port)
+        print(f"Serveur de parties sur {args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import pygame
+
+from unit import *
+
+# Nombre de niveaux des barres de vie pré-rendues
+HEALTH_LEVELS = 16
+
+# Couleur transparente des sprites
+COLORKEY = (255, 0, 255)
+
+
+class SpriteAtlas:
+    """
+    Sprites des unités dessinés une seule fois.
+
+    Chaque combinaison (équipe, sélection) a son sprite ; les barres de vie
+    sont arrondies à HEALTH_LEVELS niveaux, chacun pré-rendu. Dessiner une
+    unité revient alors à deux copies de surface, que l'on peut regrouper
+    dans un seul appel à `Surface.blits`.
+
+    Attributs
+    ---------
+    cell_size : int
+        Taille d'une case en pixels.
+    bodies : dict[tuple[str, bool], pygame.Surface]
+        Sprite de chaque (équipe, sélection).
+    moving : pygame.Surface
+        Sprite d'une unité en cours d'animation.
+    health_bars : list[pygame.Surface]
+        Barre de vie de chaque niveau, de 0 à HEALTH_LEVELS.
+    """
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.bodies = {}
+        for team, color in (('player', BLUE), ('enemy', RED)):
+            for selected in (False, True):
+                self.bodies[(team, selected)] = self._body(color, GREEN if selected else None)
+        self.moving = self._body((0, 255, 0), None)  # Vert clair pour l'unité en déplacement
+        self.health_bars = [self._health_bar(level) for level in range(HEALTH_LEVELS + 1)]
+
+    def _finish(self, surface):
+        """Convertit une surface au format de l'écran, si une fenêtre est ouverte."""
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        return surface
+
+    def _body(self, color, background):
+        """Dessine le disque d'une unité, sur un fond plein ou transparent."""
+        size = self.cell_size
+        surface = pygame.Surface((size, size))
+        if background is None:
+            surface.fill(COLORKEY)
+            surface.set_colorkey(COLORKEY)
+        else:
+            surface.fill(background)
+        pygame.draw.circle(surface, color, (size // 2, size // 2), size // 3)
+        surface = self._finish(surface)
+        if background is None:
+            surface.set_colorkey(COLORKEY)
+        return surface
+
+    def _health_bar(self, level):
+        """Dessine la barre de vie remplie à level / HEALTH_LEVELS."""
+        surface = pygame.Surface((self.cell_size, 5))
+        surface.fill((255, 0, 0))  # Rouge
+        surface.fill((0, 255, 0), (0, 0, round(self.cell_size * level / HEALTH_LEVELS), 5))  # Vert
+        return self._finish(surface)
+
+    def health_level(self, health, max_health):
+        """Retourne le niveau de barre de vie ; une unité en vie a au moins un niveau."""
+        if health <= 0:
+            return 0
+        level = round(HEALTH_LEVELS * min(health, max_health) / max_health)
+        return max(level, 1)
+
+    def unit_blits(self, unit, position):
+        """
+        Retourne les copies de surface qui dessinent une unité et sa barre de vie.
+
+        Paramètres
+        ----------
+        unit : Unit
+            L'unité à dessiner.
+        position : tuple[int, int]
+            Coin haut gauche de sa case à l'écran, en pixels.
+
+        Retourne
+        --------
+        list[tuple[pygame.Surface, tuple[int, int]]]
+            Paires (surface, position) pour `Surface.blits`.
+        """
+        x, y = position
+        bar = self.health_bars[self.health_level(unit.health, unit.max_health)]
+        return [(self.bodies[(unit.team, unit.is_selected)], (x, y)), (bar, (x, y - 5))]
@@ -0,0 +1,161 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Distances disponibles pour les portées de compétences
+METRICS = ("manhattan", "chebyshev", "euclidean")
+
+# Formes des zones d'effet : la case visée, un disque autour d'elle, une ligne ou un cône depuis l'unité
+SHAPES = ("single", "radius", "line", "cone")
+
+# Demi-angle d'ouverture des cônes, en degrés
+CONE_HALF_ANGLE = 45
+
+
+@lru_cache(maxsize=None)
+def stencil(range_min, range_max, metric="manhattan"):
+    """
+    Retourne le masque des décalages à portée, centré sur l'unité.
+
+    Le masque est calculé une seule fois par (range_min, range_max, metric)
+    puis partagé ; il ne doit pas être modifié.
+
+    Paramètres
+    ----------
+    range_min : int
+        Portée minimale.
+    range_max : int
+        Portée maximale.
+    metric : str
+        Distance utilisée ("manhattan", "chebyshev" ou "euclidean").
+
+    Retourne
+    --------
+    numpy.ndarray
+        Masque booléen de forme (2 * range_max + 1, 2 * range_max + 1),
+        indexé par [dx + range_max, dy + range_max].
+    """
+    d = np.arange(-range_max, range_max + 1)
+    dx, dy = np.meshgrid(d, d, indexing="ij")
+    if metric == "manhattan":
+        distance = np.abs(dx) + np.abs(dy)
+    elif metric == "chebyshev":
+        distance = np.maximum(np.abs(dx), np.abs(dy))
+    elif metric == "euclidean":
+        distance = np.sqrt(dx * dx + dy * dy)
+    else:
+        raise ValueError(f"Distance inconnue : {metric}")
+    mask = (range_min <= distance) & (distance <= range_max)
+    mask.setflags(write=False)
+    return mask
+
+
+@lru_cache(maxsize=None)
+def offsets(range_min, range_max, metric="manhattan"):
+    """
+    Retourne les décalages (dx, dy) à portée, triés par dx puis par dy.
+
+    Retourne
+    --------
+    numpy.ndarray
+        Tableau int64 de forme (n, 2), partagé et en lecture seule.
+    """
+    result = np.argwhere(stencil(range_min, range_max, metric)) - range_max
+    result.setflags(write=False)
+    return result
+
+
+def in_range(range_min, range_max, dx, dy, metric="manhattan"):
+    """Indique si le décalage (dx, dy) est à portée."""
+    if abs(dx) > range_max or abs(dy) > range_max:
+        return False
+    return bool(stencil(range_min, range_max, metric)[dx + range_max, dy + range_max])
+
+
+def targets_in_range(size, x, y, range_min, range_max, metric="manhattan"):
+    """
+    Retourne les cases à portée de (x, y) qui sont sur la grille.
+
+    Les décalages en cache sont translatés puis filtrés en une opération
+    vectorielle.
+
+    Paramètres
+    ----------
+    size : int
+        Taille de la grille.
+    x, y : int
+        La case de l'unité.
+    range_min, range_max : int
+        Portées minimale et maximale.
+    metric : str
+        Distance utilisée.
+
+    Retourne
+    --------
+    numpy.ndarray
+        Tableau de forme (n, 2) des coordonnées (x, y) ciblables.
+    """
+    cells = offsets(range_min, range_max, metric) + (x, y)
+    if (x - range_max >= 0 and y - range_max >= 0
+            and x + range_max < size and y + range_max < size):
+        return cells
+    inside = ((cells >= 0) & (cells < size)).all(axis=1)
+    return cells[inside]
+
+
+@lru_cache(maxsize=4096)
+def footprint(shape, area, dx, dy):
+    """
+    Retourne la zone d'effet d'une compétence, en décalages depuis son centre.
+
+    Le centre est la case visée pour "single" et "radius", la case de
+    l'unité pour "line" et "cone" ; (dx, dy) donne alors la direction.
+    Chaque case a une distance au point d'impact, qui règle l'atténuation :
+    la distance au centre pour un disque, à la première case devant
+    l'unité pour une ligne ou un cône.
+
+    Paramètres
+    ----------
+    shape : str
+        Forme de la zone (voir SHAPES).
+    area : int
+        Rayon du disque, ou longueur de la ligne ou du cône, en cases.
+    dx, dy : int
+        Décalage de la case visée depuis l'unité.
+
+    Retourne
+    --------
+    tuple[numpy.ndarray, numpy.ndarray]
+        Les décalages (n, 2) et leurs distances au point d'impact,
+        partagés et en lecture seule.
+
+    Lève
+    ----
+    ValueError
+        Si la forme est inconnue.
+    """
+    if shape == "single":
+        cells = np.zeros((1, 2), dtype=np.int64)
+        distance = np.zeros(1)
+    elif shape == "radius":
+        cells = offsets(0, area, "euclidean")
+        distance = np.sqrt((cells * cells).sum(axis=1))
+    elif shape in ("line", "cone") and dx == dy == 0:
+        cells = np.zeros((0, 2), dtype=np.int64)
+        distance = np.zeros(0)
+    elif shape == "line":
+        steps = np.arange(1, area + 1)
+        length = max(abs(dx), abs(dy))
+        cells = np.rint(np.outer(steps, (dx, dy)) / length).astype(np.int64)
+        distance = np.sqrt((cells * cells).sum(axis=1)) - 1
+    elif shape == "cone":
+        cells = offsets(1, area, "euclidean")
+        norm = np.sqrt((cells * cells).sum(axis=1))
+        cosine = (cells @ (dx, dy)) / (norm * np.hypot(dx, dy))
+        inside = cosine >= np.cos(np.radians(CONE_HALF_ANGLE)) - 1e-9
+        cells, distance = cells[inside], norm[inside] - 1
+    else:
+        raise ValueError(f"Forme de zone inconnue : {shape}")
+    cells.setflags(write=False)
+    distance.setflags(write=False)
+    return cells, distance
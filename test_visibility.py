@@ -0,0 +1,30 @@
+import random
+
+import pytest
+
+from engine import *
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_line_of_sight_is_symmetric(seed):
+    engine = Engine(32, seed=seed)
+    free = [tuple(cell) for cell in np.argwhere(engine.grid.terrain == TRAVERSABLE).tolist()]
+    rng = random.Random(seed)
+    for _ in range(100):
+        (ax, ay), (bx, by) = rng.sample(free, 2)
+        assert engine.visibility.line_of_sight(ax, ay, bx, by) == engine.visibility.line_of_sight(bx, by, ax, ay)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_field_of_view_is_symmetric(seed):
+    engine = Engine(24, seed=seed)
+    terrain = engine.grid.terrain
+    free = [tuple(cell) for cell in np.argwhere(terrain == TRAVERSABLE).tolist()]
+    seen = {}
+    for x, y in free:
+        x0, y0, mask = shadowcast(terrain, x, y)
+        seen[x, y] = {(x0 + i, y0 + j) for i, j in np.argwhere(mask).tolist()}
+    for a in free:
+        for b in seen[a]:
+            if b in seen:
+                assert a in seen[b]
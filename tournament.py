@@ -0,0 +1,441 @@
+"""
+Joue en lot des parties sans affichage entre deux IA, sur plusieurs cœurs.
+
+Sert à régler les caractéristiques des unités (santé, attaque) et des
+compétences (puissance, portées) : chaque partie est tirée de sa graine,
+jouée dans un processus du pool, et son résultat écrit au fil de l'eau en
+CSV ou en JSON (un objet par ligne). Le débit, en parties par seconde, est
+affiché pendant le tournoi.
+
+Exemples
+--------
+    python tournament.py --matches 20000 --output resultats.csv
+    python tournament.py --matches 500 --enemy mcts --enemy-option time_budget=0.05 --output mcts.jsonl
+    python tournament.py --player-health 12 --skill Rifle.power=4 --skill Rifle.range_max=6 --output reglage.csv
+"""
+import argparse
+import ast
+import csv
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from engine import *
+from mcts import *
+
+# IA utilisables dans un tournoi, par nom (voir register_controller)
+CONTROLLERS = {}
+
+# Colonnes d'un résultat de partie
+RESULT_FIELDS = ("match", "seed", "winner", "turns", "player_units", "enemy_units",
+                 "player_health", "enemy_health", "seconds")
+
+# Lots de parties en attente par processus : assez pour qu'aucun ne reste sans travail
+BATCHES_PER_WORKER = 4
+
+
+def register_controller(name, teams=TEAMS):
+    """
+    Décorateur qui ajoute une IA à CONTROLLERS.
+
+    Une IA est une fabrique (souvent une classe) appelée pour chaque partie
+    avec l'équipe à jouer, une graine et les options de la ligne de
+    commande ; elle retourne un objet dont la méthode `play_turn(engine)`
+    joue tout le tour de cette équipe, et qui peut avoir une méthode `close()`.
+
+    Paramètres
+    ----------
+    name : str
+        Nom de l'IA sur la ligne de commande.
+    teams : tuple[str, ...]
+        Équipes que l'IA sait jouer.
+    """
+    def register(factory):
+        CONTROLLERS[name] = (factory, teams)
+        return factory
+    return register
+
+
+def make_controller(name, team, seed=None, options=None):
+    """
+    Retourne l'IA `name` pour l'équipe `team`.
+
+    Lève
+    ----
+    ValueError
+        Si l'IA est inconnue ou ne sait pas jouer cette équipe.
+    """
+    if name not in CONTROLLERS:
+        raise ValueError(f"IA inconnue : {name!r} (disponibles : {', '.join(CONTROLLERS)})")
+    factory, teams = CONTROLLERS[name]
+    if team not in teams:
+        raise ValueError(f"L'IA {name!r} ne sait pas jouer l'équipe {team!r}")
+    return factory(team, seed, **(options or {}))
+
+
+def team_units(engine, team):
+    """Retourne la liste des unités de l'équipe `team`."""
+    return engine.player_units if team == 'player' else engine.enemy_units
+
+
+@register_controller("hunter")
+class HunterController:
+    """
+    IA gloutonne, pour l'une ou l'autre équipe.
+
+    Chaque unité tire avec sa compétence la plus puissante sur l'adversaire
+    le plus faible en vue et à portée ; sinon elle se rapproche des
+    adversaires en descendant la carte des distances aussi loin que son
+    déplacement le permet, puis tire ou attaque au contact si elle le peut.
+    """
+
+    def __init__(self, team, seed=None):
+        self.team = team
+
+    def play_turn(self, engine):
+        field, opponents_left = None, None
+        for unit in list(team_units(engine, self.team)):
+            opponents = engine.opponents(unit)
+            if not opponents:
+                return
+            if unit not in engine.occupancy:
+                continue
+            actions = self.strike(engine, unit)
+            if not actions:
+                if field is None or len(opponents) != opponents_left:
+                    field = distance_map(engine.grid, [(other.x, other.y) for other in opponents],
+                                         [(other.x, other.y) for other in team_units(engine, self.team)])
+                    opponents_left = len(opponents)
+                x, y = min(engine.get_accessible_cells(unit), key=lambda cell: field[cell])
+                if (x, y) != (unit.x, unit.y):
+                    engine.apply(MoveAction(unit, x, y))
+                actions = self.strike(engine, unit)
+            for action in actions:
+                engine.apply(action)
+
+    def strike(self, engine, unit):
+        """Retourne l'attaque de l'unité depuis sa case (une action au plus)."""
+        for skill in sorted(unit.skills, key=lambda skill: -skill.power):
+            targets = [other for other in engine.units_within(unit.x, unit.y, skill.range_max)
+                       if other.team != unit.team and engine.can_target(unit, skill, other.x, other.y)]
+            if targets:
+                target = min(targets, key=lambda other: other.health)
+                return [SkillAction(unit, skill, target.x, target.y)]
+        targets = [other for other in engine.units_within(unit.x, unit.y, 1) if other.team != unit.team]
+        if targets:
+            return [AttackAction(unit, min(targets, key=lambda other: other.health))]
+        return []
+
+
+@register_controller("policy")
+class PolicyController:
+    """IA des simulations de `mcts` : tirer sur la cible la plus faible, sinon bouger au hasard."""
+
+    def __init__(self, team, seed=None):
+        self.team = team
+        self.rng = random.Random(seed)
+
+    def play_turn(self, engine):
+        for unit in list(team_units(engine, self.team)):
+            if not engine.opponents(unit):
+                return
+            if unit in engine.occupancy:
+                for action in player_policy(engine, unit, self.rng):
+                    engine.apply(action)
+
+
+@register_controller("idle")
+class IdleController:
+    """IA qui ne fait rien, comme point de comparaison."""
+
+    def __init__(self, team, seed=None):
+        self.team = team
+
+    def play_turn(self, engine):
+        pass
+
+
+@register_controller("default", teams=('enemy',))
+class DefaultController:
+    """IA par défaut des ennemis (voir `Engine.handle_enemy_turn`)."""
+
+    def __init__(self, team, seed=None):
+        self.team = team
+
+    def play_turn(self, engine):
+        engine.handle_enemy_turn()
+
+
+@register_controller("mcts", teams=('enemy',))
+def mcts_controller(team, seed=None, **options):
+    """Recherche Monte-Carlo des ennemis, dans le processus de la partie (les parties occupent déjà les cœurs)."""
+    options.setdefault("workers", 0)
+    options.setdefault("time_budget", 0.1)
+    return MCTSController(seed=seed, **options)
+
+
+def play_match(scenario, match):
+    """
+    Joue une partie d'un tournoi.
+
+    Les unités du joueur apparaissent dans le quart gauche de la carte,
+    celles des ennemis dans le quart droit ; la carte, les positions et les
+    IA sont tirées de la graine `scenario["seed"] + match`.
+
+    Paramètres
+    ----------
+    scenario : dict
+        Paramètres du tournoi (voir `main`).
+    match : int
+        Numéro de la partie.
+
+    Retourne
+    --------
+    dict
+        Le résultat, avec les clés de RESULT_FIELDS ; le gagnant est
+        "draw" si la limite de tours est atteinte.
+    """
+    start = time.perf_counter()
+    seed = scenario["seed"] + match
+    rng = random.Random(seed)
+    size = scenario["size"]
+    band = max(size // 4, 1)
+    spawns = {
+        'player': rng.sample([(x, y) for x in range(band) for y in range(size)], scenario["players"]),
+        'enemy': rng.sample([(x, y) for x in range(size - band, size) for y in range(size)], scenario["enemies"]),
+    }
+    units = {team: [Unit(x, y, scenario[f"{team}_health"], scenario[f"{team}_attack"], team)
+                    for x, y in spawns[team]] for team in TEAMS}
+    grid = generate_map(size, seed, scenario["algorithm"], spawns=spawns['player'] + spawns['enemy'])
+    engine = Engine(grid=grid, player_units=units['player'], enemy_units=units['enemy'], seed=seed)
+    controllers = [make_controller(scenario[team], team, rng.getrandbits(32), scenario[f"{team}_options"])
+                   for team in TEAMS]
+    turns = 0
+    try:
+        while engine.winner() is None and turns < scenario["max_turns"]:
+            turns += 1
+            for controller in controllers:
+                controller.play_turn(engine)
+                engine.end_turn()
+                if engine.winner() is not None:
+                    break
+    finally:
+        for controller in controllers:
+            if hasattr(controller, "close"):
+                controller.close()
+    health = engine.units.health
+    return {
+        "match": match,
+        "seed": seed,
+        "winner": engine.winner() or "draw",
+        "turns": turns,
+        "player_units": len(engine.player_units),
+        "enemy_units": len(engine.enemy_units),
+        "player_health": int(health[engine.units.alive_indices('player')].clip(0).sum()),
+        "enemy_health": int(health[engine.units.alive_indices('enemy')].clip(0).sum()),
+        "seconds": round(time.perf_counter() - start, 6),
+    }
+
+
+def play_batch(scenario, matches):
+    """Joue un lot de parties ; un lot par tâche amortit les échanges entre processus."""
+    return [play_match(scenario, match) for match in matches]
+
+
+def _init_worker(skills):
+    """Applique les réglages des compétences dans un processus du tournoi."""
+    for name, fields in skills.items():
+        redefine_skill(name, **fields)
+
+
+def run_tournament(scenario, matches, workers=None, batch_size=None, skills=None):
+    """
+    Joue `matches` parties et retourne leurs résultats au fur et à mesure.
+
+    Les parties sont réparties par lots sur un pool de processus ; le nombre
+    de lots en attente est borné, si bien que la mémoire ne dépend pas du
+    nombre de parties. Les résultats arrivent dans l'ordre où les lots se
+    terminent.
+
+    Paramètres
+    ----------
+    scenario : dict
+        Paramètres des parties (voir `play_match`).
+    matches : int
+        Nombre de parties.
+    workers : int, optionnel
+        Nombre de processus ; un par cœur par défaut, 0 pour jouer dans le
+        processus courant (les réglages des compétences y restent alors appliqués).
+    batch_size : int, optionnel
+        Nombre de parties par tâche ; choisi d'après le nombre de parties par défaut.
+    skills : dict[str, dict], optionnel
+        Réglages des compétences par nom (voir `redefine_skill`).
+
+    Retourne
+    --------
+    iterator[dict]
+        Les résultats de `play_match`.
+    """
+    skills = skills or {}
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    if batch_size is None:
+        batch_size = min(max(matches // (max(workers, 1) * BATCHES_PER_WORKER * 8), 1), 64)
+    batches = (range(first, min(first + batch_size, matches)) for first in range(0, matches, batch_size))
+    if workers == 0:
+        _init_worker(skills)
+        for batch in batches:
+            yield from play_batch(scenario, batch)
+        return
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(skills,)) as executor:
+        pending = set()
+        for batch in batches:
+            pending.add(executor.submit(play_batch, scenario, batch))
+            if len(pending) >= workers * BATCHES_PER_WORKER:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+
+class ResultWriter:
+    """
+    Écrit les résultats des parties au fil de l'eau.
+
+    Attributs
+    ---------
+    stream : io.TextIOBase
+        Le flux de sortie.
+    format : str
+        "csv" (une ligne d'en-tête, puis une ligne par partie) ou "json"
+        (un objet JSON par ligne).
+    """
+
+    def __init__(self, stream, format="csv"):
+        self.stream = stream
+        self.format = format
+        if format == "csv":
+            self._csv = csv.DictWriter(stream, RESULT_FIELDS, lineterminator="\n")
+            self._csv.writeheader()
+
+    def write(self, result):
+        """Ajoute le résultat d'une partie."""
+        if self.format == "csv":
+            self._csv.writerow(result)
+        else:
+            self.stream.write(json.dumps(result) + "\n")
+
+    def flush(self):
+        self.stream.flush()
+
+
+def parse_assignment(text):
+    """
+    Lit une option de la forme `nom=valeur` ; la valeur est un littéral Python, ou du texte.
+
+    Retourne
+    --------
+    tuple[str, object]
+    """
+    name, separator, value = text.partition("=")
+    if not separator or not name:
+        raise argparse.ArgumentTypeError(f"option attendue sous la forme nom=valeur : {text!r}")
+    try:
+        return name, ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return name, value
+
+
+def parse_skill(text):
+    """Lit un réglage de compétence de la forme `Compétence.champ=valeur`."""
+    name, value = parse_assignment(text)
+    skill, separator, field = name.partition(".")
+    if not separator:
+        raise argparse.ArgumentTypeError(f"réglage attendu sous la forme Compétence.champ=valeur : {text!r}")
+    return skill, field, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=1000)
+    parser.add_argument("--workers", type=int, help="processus (un par cœur par défaut, 0 pour aucun)")
+    parser.add_argument("--batch", type=int, help="parties par tâche")
+    parser.add_argument("--seed", type=int, default=0, help="graine de la première partie")
+    parser.add_argument("--size", type=int, default=16)
+    parser.add_argument("--algorithm", default="scatter", choices=sorted(GENERATORS))
+    parser.add_argument("--max-turns", type=int, default=100, help="au-delà, la partie est nulle")
+    for team, count, health, attack, controller in (('player', "--players", 10, 2, "hunter"),
+                                                    ('enemy', "--enemies", 8, 1, "default")):
+        parser.add_argument(f"--{team}", default=controller, choices=sorted(CONTROLLERS), help="IA de l'équipe")
+        parser.add_argument(f"--{team}-option", type=parse_assignment, action="append", default=[],
+                            metavar="NOM=VALEUR", help="paramètre de l'IA (répétable)")
+        parser.add_argument(count, type=int, default=4, help="nombre d'unités de l'équipe")
+        parser.add_argument(f"--{team}-health", type=int, default=health)
+        parser.add_argument(f"--{team}-attack", type=int, default=attack)
+    parser.add_argument("--skill", type=parse_skill, action="append", default=[],
+                        metavar="NOM.CHAMP=VALEUR", help="réglage d'une compétence (répétable)")
+    parser.add_argument("--output", default="-", help="fichier des résultats (sortie standard par défaut)")
+    parser.add_argument("--format", choices=("csv", "json"),
+                        help="format des résultats ; d'après l'extension du fichier par défaut")
+    parser.add_argument("--progress", type=float, default=2.0, help="secondes entre deux points d'avancement")
+    args = parser.parse_args(argv)
+
+    scenario = {
+        "seed": args.seed, "size": args.size, "algorithm": args.algorithm, "max_turns": args.max_turns,
+        "players": args.players, "enemies": args.enemies,
+    }
+    for team in TEAMS:
+        scenario[team] = getattr(args, team)
+        scenario[f"{team}_options"] = dict(getattr(args, f"{team}_option"))
+        scenario[f"{team}_health"] = getattr(args, f"{team}_health")
+        scenario[f"{team}_attack"] = getattr(args, f"{team}_attack")
+        try:
+            make_controller(scenario[team], team, options=scenario[f"{team}_options"])  # Erreurs avant le pool
+        except (ValueError, TypeError) as error:
+            parser.error(str(error))
+    if max(args.players, args.enemies) > max(args.size // 4, 1) * args.size:
+        parser.error("trop d'unités pour la zone d'apparition (un quart de la carte par équipe)")
+    skills = {}
+    for skill, field, value in args.skill:
+        skills.setdefault(skill, {})[field] = value
+    try:
+        for skill, fields in skills.items():
+            redefine_skill(skill, **fields)
+    except ValueError as error:
+        parser.error(str(error))
+
+    output_format = args.format or ("json" if args.output.endswith((".json", ".jsonl")) else "csv")
+    stream = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    writer = ResultWriter(stream, output_format)
+    winners = Counter()
+    turns = 0
+    start = last_report = time.perf_counter()
+    try:
+        for count, result in enumerate(run_tournament(scenario, args.matches, args.workers, args.batch, skills), 1):
+            writer.write(result)
+            winners[result["winner"]] += 1
+            turns += result["turns"]
+            now = time.perf_counter()
+            if now - last_report >= args.progress:
+                writer.flush()
+                print(f"{count}/{args.matches} parties, {count / (now - start):.1f} parties/s", file=sys.stderr)
+                last_report = now
+    finally:
+        writer.flush()
+        if stream is not sys.stdout:
+            stream.close()
+    elapsed = time.perf_counter() - start
+    played = sum(winners.values())
+    print(f"{played} parties en {elapsed:.1f} s ({played / elapsed:.1f} parties/s) : "
+          f"joueur {winners['player']}, ennemis {winners['enemy']}, nulles {winners['draw']}, "
+          f"{turns / max(played, 1):.1f} tours en moyenne", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,130 +1,432 @@
-import pygame
-import random
-
-# Constantes
-GRID_SIZE = 8
-CELL_SIZE = 60
-WIDTH = GRID_SIZE * CELL_SIZE
-HEIGHT = GRID_SIZE * CELL_SIZE
-FPS = 30
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-RED = (255, 0, 0)
-BLUE = (0, 0, 255)
-GREEN = (0, 255, 0)
-
-
-class Unit:
-    """
-    Classe pour représenter une unité.
-
-    ...
-    Attributs
-    ---------
-    x : int
-        La position x de l'unité sur la grille.
-    y : int
-        La position y de l'unité sur la grille.
-    health : int
-        La santé de l'unité.
-    attack_power : int
-        La puissance d'attaque de l'unité.
-    team : str
-        L'équipe de l'unité ('player' ou 'enemy').
-    is_selected : bool
-        Si l'unité est sélectionnée ou non.
-
-    Méthodes
-    --------
-    move(dx, dy)
-        Déplace l'unité de dx, dy.
-    attack(target)
-        Attaque une unité cible.
-    draw(screen)
-        Dessine l'unité sur la grille.
-    """
-
-    def __init__(self, x, y, health, attack_power, team):
-        """
-        Construit une unité avec une position, une santé, une puissance d'attaque et une équipe.
-
-        Paramètres
-        ----------
-        x : int
-            La position x de l'unité sur la grille.
-        y : int
-            La position y de l'unité sur la grille.
-        health : int
-            La santé de l'unité.
-        attack_power : int
-            La puissance d'attaque de l'unité.
-        team : str
-            L'équipe de l'unité ('player' ou 'enemy').
-        """
-        self.x = x
-        self.y = y
-        self.health = health
-        self.attack_power = attack_power
-        self.team = team  # 'player' ou 'enemy'
-        self.is_selected = False
-        self.skills = [
-            Skill("Pistol", 1, 3, "damage", 3),
-            Skill("Rifle", 2, 5, "damage", 5),
-            Skill("Grenade", 3, 7, "damage", 4)
-        ]
-
-    def move(self, dx, dy):
-        """Déplace l'unité de dx, dy."""
-        if 0 <= self.x + dx < GRID_SIZE and 0 <= self.y + dy < GRID_SIZE:
-            self.x += dx
-            self.y += dy
-
-    def attack(self, target):
-        """Attaque une unité cible."""
-        if abs(self.x - target.x) <= 1 and abs(self.y - target.y) <= 1:
-            target.health -= self.attack_power
-
-    def draw_health_bar(self, screen):
-        """
-        Dessine une barre de vie au-dessus de l'unité.
-        """
-        health_ratio = self.health / 10  # Suppose que la santé max est 10
-        pygame.draw.rect(screen, (255, 0, 0), (self.x * CELL_SIZE, self.y * CELL_SIZE - 5, CELL_SIZE, 5))  # Rouge
-        pygame.draw.rect(screen, (0, 255, 0),
-                         (self.x * CELL_SIZE, self.y * CELL_SIZE - 5, CELL_SIZE * health_ratio, 5))  # Vert
-
-    def draw(self, screen):
-        """
-        Dessine l'unité sur l'écran.
-        """
-        color = BLUE if self.team == 'player' else RED
-        if self.is_selected:
-            pygame.draw.rect(screen, GREEN, (self.x * CELL_SIZE, self.y * CELL_SIZE, CELL_SIZE, CELL_SIZE))
-        pygame.draw.circle(screen, color, (self.x * CELL_SIZE + CELL_SIZE // 2, self.y * CELL_SIZE + CELL_SIZE // 2),
-                           CELL_SIZE // 3)
-        self.draw_health_bar(screen)
-
-class Skill:
-    """
-    Classe pour représenter une compétence.
-
-    Attributs
-    ---------
-    name : str
-        Nom de la compétence (ex. : "Pistol", "Rifle").
-    range_min : int
-        Portée minimale de la compétence.
-    range_max : int
-        Portée maximale de la compétence.
-    effect : str
-        Type d'effet de la compétence (ex. : "damage", "heal").
-    power : int
-        Puissance de l'effet (ex. : dégâts infligés).
-    """
-
-    def __init__(self, name, range_min, range_max, effect, power):
-        self.name = name
-        self.range_min = range_min
-        self.range_max = range_max
-        self.effect = effect
-        self.power = power
+import numpy as np
+
+from targeting import *
+
+# Constantes
+GRID_SIZE = 8
+CELL_SIZE = 60
+# Taille de la fenêtre ; la carte peut être plus grande (voir camera.Camera)
+WIDTH = 480
+HEIGHT = 480
+FPS = 30
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+BLUE = (0, 0, 255)
+GREEN = (0, 255, 0)
+
+# Équipes, dans l'ordre de leur code dans UnitTable.team
+TEAMS = ('player', 'enemy')
+TEAM_IDS = {team: code for code, team in enumerate(TEAMS)}
+
+# Effets des compétences : signe de la variation de santé. Les soins ne touchent
+# que l'équipe de l'unité, les dégâts que ses adversaires.
+EFFECTS = {"damage": -1, "heal": 1}
+
+
+class Unit:
+    """
+    Classe pour représenter une unité.
+
+    Une unité est une poignée légère vers une ligne d'une `UnitTable` :
+    ses données sont stockées en colonnes dans la table, l'objet ne garde
+    que la table, le numéro de ligne et l'état de sélection (propre à l'affichage).
+    Les déplacements et les attaques passent par le moteur (`Engine.apply`),
+    qui tient à jour l'index des cases, le hachage et les morts.
+
+    ...
+    Attributs
+    ---------
+    x : int
+        La position x de l'unité sur la grille.
+    y : int
+        La position y de l'unité sur la grille.
+    health : int
+        La santé de l'unité.
+    max_health : int
+        La santé initiale de l'unité.
+    attack_power : int
+        La puissance d'attaque de l'unité.
+    team : str
+        L'équipe de l'unité ('player' ou 'enemy').
+    skills : tuple[Skill, ...]
+        Les compétences de l'unité, partagées avec les autres unités.
+    is_selected : bool
+        Si l'unité est sélectionnée ou non.
+    """
+
+    __slots__ = ("table", "index", "is_selected")
+
+    def __init__(self, x, y, health, attack_power, team, skill_ids=None, table=None):
+        """
+        Construit une unité avec une position, une santé, une puissance d'attaque et une équipe.
+
+        Paramètres
+        ----------
+        x : int
+            La position x de l'unité sur la grille.
+        y : int
+            La position y de l'unité sur la grille.
+        health : int
+            La santé de l'unité.
+        attack_power : int
+            La puissance d'attaque de l'unité.
+        team : str
+            L'équipe de l'unité ('player' ou 'enemy').
+        skill_ids : tuple[int, ...], optionnel
+            Numéros des compétences dans SKILLS. Pistolet, fusil et grenade par défaut.
+        table : UnitTable, optionnel
+            La table où stocker l'unité. Une table d'une ligne est créée si absente ;
+            le moteur recopie ensuite l'unité dans sa propre table.
+        """
+        if table is None:
+            table = UnitTable(1)
+        self.table = table
+        self.index = table.add(x, y, health, attack_power, team, skill_ids)
+        self.is_selected = False
+        table.handles[self.index] = self
+
+    @classmethod
+    def from_table(cls, table, index):
+        """Crée la poignée d'une ligne existante de `table` (voir UnitTable.handle)."""
+        unit = cls.__new__(cls)
+        unit.table = table
+        unit.index = index
+        unit.is_selected = False
+        return unit
+
+    @property
+    def x(self):
+        return self.table.x.item(self.index)
+
+    @x.setter
+    def x(self, value):
+        self.table.x[self.index] = value
+
+    @property
+    def y(self):
+        return self.table.y.item(self.index)
+
+    @y.setter
+    def y(self, value):
+        self.table.y[self.index] = value
+
+    @property
+    def health(self):
+        return self.table.health.item(self.index)
+
+    @health.setter
+    def health(self, value):
+        self.table.health[self.index] = value
+
+    @property
+    def max_health(self):
+        return self.table.max_health.item(self.index)
+
+    @property
+    def attack_power(self):
+        return self.table.attack_power.item(self.index)
+
+    @attack_power.setter
+    def attack_power(self, value):
+        self.table.attack_power[self.index] = value
+
+    @property
+    def team(self):
+        return TEAMS[self.table.team.item(self.index)]
+
+    @property
+    def alive(self):
+        return bool(self.table.alive[self.index])
+
+    @property
+    def skills(self):
+        return skill_set(self.table.skill_ids[self.index])
+
+
+class UnitTable:
+    """
+    Stockage des unités en colonnes (un tableau NumPy par attribut).
+
+    Les lignes ne sont jamais réutilisées : une unité morte garde sa ligne
+    avec `alive` à False, si bien que le numéro d'une unité reste valable
+    toute la partie. Les colonnes sont réallouées quand la capacité est
+    dépassée : il faut donc relire `table.x` plutôt que de garder une vue.
+
+    Attributs
+    ---------
+    count : int
+        Nombre de lignes utilisées.
+    x, y : numpy.ndarray
+        Positions (int32).
+    health, max_health, attack_power : numpy.ndarray
+        Santé, santé initiale et puissance d'attaque (int32).
+    team : numpy.ndarray
+        Code de l'équipe (uint8, voir TEAMS).
+    alive : numpy.ndarray
+        Si l'unité est encore en jeu (bool).
+    skill_ids : list[tuple[int, ...]]
+        Numéros des compétences de chaque unité dans SKILLS.
+    handles : list[Unit | None]
+        Poignée de chaque ligne, créée à la demande.
+    """
+
+    COLUMNS = (("x", np.int32), ("y", np.int32), ("health", np.int32), ("max_health", np.int32),
+               ("attack_power", np.int32), ("team", np.uint8), ("alive", np.bool_))
+
+    def __init__(self, capacity=16):
+        self.count = 0
+        for name, dtype in self.COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        self.skill_ids = []
+        self.handles = []
+
+    def __len__(self):
+        return self.count
+
+    def _reserve(self, extra):
+        """Agrandit les colonnes pour pouvoir ajouter `extra` lignes."""
+        needed = self.count + extra
+        capacity = len(self.x)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity = max(2 * capacity, 16)
+        for name, dtype in self.COLUMNS:
+            column = np.zeros(capacity, dtype=dtype)
+            column[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, column)
+
+    def add(self, x, y, health, attack_power, team, skill_ids=None):
+        """
+        Ajoute une unité et retourne son numéro de ligne.
+
+        Paramètres
+        ----------
+        x, y : int
+            Position de l'unité.
+        health : int
+            Santé (et santé maximale) de l'unité.
+        attack_power : int
+            Puissance d'attaque de l'unité.
+        team : str
+            L'équipe de l'unité ('player' ou 'enemy').
+        skill_ids : tuple[int, ...], optionnel
+            Numéros des compétences dans SKILLS.
+        """
+        self._reserve(1)
+        index = self.count
+        self.x[index] = x
+        self.y[index] = y
+        self.health[index] = health
+        self.max_health[index] = health
+        self.attack_power[index] = attack_power
+        self.team[index] = TEAM_IDS[team]
+        self.alive[index] = True
+        self.skill_ids.append(DEFAULT_SKILL_IDS if skill_ids is None else tuple(skill_ids))
+        self.handles.append(None)
+        self.count += 1
+        return index
+
+    def add_many(self, xs, ys, health, attack_power, team, skill_ids=None):
+        """
+        Ajoute plusieurs unités d'une même équipe en une opération vectorielle.
+
+        Les poignées ne sont pas créées ; utiliser `handle` pour les obtenir.
+
+        Retourne
+        --------
+        numpy.ndarray
+            Les numéros des lignes ajoutées.
+        """
+        xs = np.asarray(xs)
+        n = len(xs)
+        self._reserve(n)
+        rows = np.arange(self.count, self.count + n)
+        self.x[rows] = xs
+        self.y[rows] = ys
+        self.health[rows] = health
+        self.max_health[rows] = health
+        self.attack_power[rows] = attack_power
+        self.team[rows] = TEAM_IDS[team]
+        self.alive[rows] = True
+        self.skill_ids.extend([DEFAULT_SKILL_IDS if skill_ids is None else tuple(skill_ids)] * n)
+        self.handles.extend([None] * n)
+        self.count += n
+        return rows
+
+    def adopt(self, unit):
+        """
+        Recopie une unité venant d'une autre table et fait pointer sa poignée ici.
+
+        Retourne
+        --------
+        int
+            Le nouveau numéro de ligne de l'unité.
+        """
+        source, row = unit.table, unit.index
+        index = self.add(source.x.item(row), source.y.item(row), source.health.item(row),
+                         source.attack_power.item(row), TEAMS[source.team.item(row)],
+                         source.skill_ids[row])
+        self.max_health[index] = source.max_health[row]
+        self.alive[index] = source.alive[row]
+        unit.table = self
+        unit.index = index
+        self.handles[index] = unit
+        return index
+
+    def copy(self):
+        """Retourne une copie indépendante de la table, sans poignées (créées à la demande)."""
+        clone = UnitTable.__new__(UnitTable)
+        clone.count = self.count
+        for name, _ in self.COLUMNS:
+            setattr(clone, name, getattr(self, name).copy())
+        clone.skill_ids = list(self.skill_ids)
+        clone.handles = [None] * self.count
+        return clone
+
+    def handle(self, index):
+        """Retourne la poignée (unique) de la ligne `index`."""
+        unit = self.handles[index]
+        if unit is None:
+            unit = Unit.from_table(self, index)
+            self.handles[index] = unit
+        return unit
+
+    def alive_indices(self, team=None):
+        """
+        Retourne les numéros des unités en jeu, éventuellement d'une seule équipe.
+
+        Retourne
+        --------
+        numpy.ndarray
+            Numéros de lignes, par ordre croissant.
+        """
+        mask = self.alive[:self.count]
+        if team is not None:
+            mask = mask & (self.team[:self.count] == TEAM_IDS[team])
+        return np.flatnonzero(mask)
+
+
+class Skill:
+    """
+    Classe pour représenter une compétence.
+
+    Les compétences sont des définitions immuables partagées par toutes
+    les unités, qui les référencent par leur numéro dans SKILLS.
+
+    Attributs
+    ---------
+    name : str
+        Nom de la compétence (ex. : "Pistol", "Rifle").
+    range_min : int
+        Portée minimale de la compétence.
+    range_max : int
+        Portée maximale de la compétence.
+    effect : str
+        Type d'effet de la compétence (ex. : "damage", "heal").
+    power : int
+        Puissance de l'effet (ex. : dégâts infligés).
+    metric : str
+        Distance utilisée pour la portée ("manhattan", "chebyshev", "euclidean").
+    shape : str
+        Forme de la zone d'effet (voir targeting.SHAPES).
+    area : int
+        Rayon du disque, ou longueur de la ligne ou du cône, en cases.
+    falloff : float
+        Part de la puissance perdue par case d'éloignement du point d'impact.
+    """
+
+    __slots__ = ("name", "range_min", "range_max", "effect", "power", "metric", "shape", "area", "falloff")
+
+    def __init__(self, name, range_min, range_max, effect, power, metric="manhattan", shape="single", area=0,
+                 falloff=0.0):
+        """
+        Lève
+        ----
+        ValueError
+            Si l'effet, la distance ou la forme est inconnu.
+        """
+        if effect not in EFFECTS:
+            raise ValueError(f"Effet inconnu : {effect!r} (disponibles : {', '.join(EFFECTS)})")
+        if metric not in METRICS:
+            raise ValueError(f"Distance inconnue : {metric!r}")
+        if shape not in SHAPES:
+            raise ValueError(f"Forme de zone inconnue : {shape!r}")
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "range_min", range_min)
+        object.__setattr__(self, "range_max", range_max)
+        object.__setattr__(self, "effect", effect)
+        object.__setattr__(self, "power", power)
+        object.__setattr__(self, "metric", metric)
+        object.__setattr__(self, "shape", shape)
+        object.__setattr__(self, "area", area)
+        object.__setattr__(self, "falloff", falloff)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Une compétence est immuable")
+
+    def __repr__(self):
+        return (f"Skill({self.name!r}, {self.range_min}, {self.range_max}, {self.effect!r}, {self.power}, "
+                f"shape={self.shape!r}, area={self.area}, falloff={self.falloff})")
+
+
+# Définitions partagées des compétences, référencées par leur numéro (voir redefine_skill)
+SKILLS = [
+    Skill("Pistol", 1, 3, "damage", 3),
+    Skill("Rifle", 2, 5, "damage", 5),
+    Skill("Grenade", 3, 7, "damage", 4, shape="radius", area=1, falloff=0.5),
+    Skill("Medkit", 0, 1, "heal", 4),
+    Skill("Flamethrower", 1, 3, "damage", 3, shape="cone", area=3, falloff=0.25),
+    Skill("Railgun", 2, 6, "damage", 4, shape="line", area=8, falloff=0.1),
+]
+DEFAULT_SKILL_IDS = (0, 1, 2)
+
+_skill_sets = {}
+
+
+def skill_set(skill_ids):
+    """Retourne le tuple (partagé) des compétences correspondant à `skill_ids`."""
+    skills = _skill_sets.get(skill_ids)
+    if skills is None:
+        skills = _skill_sets[skill_ids] = tuple(SKILLS[i] for i in skill_ids)
+    return skills
+
+
+def redefine_skill(name, **fields):
+    """
+    Remplace la définition d'une compétence, pour toutes les unités.
+
+    Sert à régler les compétences, par exemple dans les processus d'un
+    tournoi ; à appeler avant de construire les moteurs. Les unités gardent
+    le numéro de la compétence et voient la nouvelle définition.
+
+    Paramètres
+    ----------
+    name : str
+        Nom de la compétence (ex. : "Rifle").
+    **fields
+        Nouvelles valeurs (range_min, range_max, effect, power, metric,
+        shape, area, falloff).
+
+    Retourne
+    --------
+    Skill
+        La nouvelle définition.
+
+    Lève
+    ----
+    ValueError
+        Si la compétence ou l'un des champs est inconnu.
+    """
+    for index, skill in enumerate(SKILLS):
+        if skill.name == name:
+            values = {field: getattr(skill, field) for field in Skill.__slots__}
+            unknown = (set(fields) - set(values)) | ({"name"} & set(fields))
+            if unknown:
+                raise ValueError(f"Champs de compétence inconnus : {', '.join(sorted(unknown))}")
+            values.update(fields)
+            SKILLS[index] = Skill(**values)
+            _skill_sets.clear()
+            return SKILLS[index]
+    raise ValueError(f"Compétence inconnue : {name!r}")
@@ -0,0 +1,239 @@
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+from grid import *
+
+# Rayon de vision d'une unité, en cases (brouillard de guerre ; les lignes de vue n'ont pas de limite)
+VIEW_RADIUS = 8
+
+# Les quatre quadrants, en multiplicateurs (profondeur, colonne) -> (dx, dy)
+QUADRANTS = ((0, 1, -1, 0), (0, 1, 1, 0), (1, 0, 0, 1), (-1, 0, 0, 1))
+
+
+def shadowcast(terrain, x, y, radius=VIEW_RADIUS):
+    """
+    Calcule le champ de vision depuis la case (x, y) par projection d'ombres symétrique.
+
+    Chaque quadrant est parcouru ligne par ligne en s'éloignant de l'origine ;
+    un mur ferme l'intervalle de pentes visible au-delà, et les lignes
+    suivantes ne visitent que les intervalles encore ouverts. Une case libre
+    n'est visible que si son centre est dans l'intervalle : la vue est alors
+    symétrique (A voit B si et seulement si B voit A), ce qu'exigent les
+    règles de ciblage. Les murs eux-mêmes sont visibles, le bord de la
+    grille est opaque. Les pentes sont des fractions entières
+    (numérateur, dénominateur), comparées sans arrondi.
+
+    Paramètres
+    ----------
+    terrain : numpy.ndarray
+        Codes de terrain, indexés par [x, y].
+    x, y : int
+        L'origine.
+    radius : int
+        Rayon de vision (distance euclidienne).
+
+    Retourne
+    --------
+    tuple[int, int, numpy.ndarray]
+        (x0, y0, mask) : le masque booléen des cases visibles dans la fenêtre
+        de la grille qui commence en (x0, y0).
+    """
+    size = terrain.shape[0]
+    x0, y0 = max(x - radius, 0), max(y - radius, 0)
+    x1, y1 = min(x + radius + 1, size), min(y + radius + 1, size)
+    opaque = (terrain[x0:x1, y0:y1] != TRAVERSABLE).tolist()
+    visible = np.zeros((x1 - x0, y1 - y0), dtype=bool)
+    visible[x - x0, y - y0] = True
+    lit = []
+    width, height = x1 - x0, y1 - y0
+    ox, oy = x - x0, y - y0
+    radius_sq = radius * radius
+
+    for dx_depth, dx_col, dy_depth, dy_col in QUADRANTS:
+        # Lignes à parcourir : (profondeur, pente de début, pente de fin)
+        rows = [(1, -1, 1, 1, 1)]
+        while rows:
+            depth, start_num, start_den, end_num, end_den = rows.pop()
+            # Colonnes dont le centre est dans l'intervalle, arrondies vers l'intérieur à mi-case
+            first = (2 * depth * start_num + start_den) // (2 * start_den)
+            last = -((end_den - 2 * depth * end_num) // (2 * end_den))
+            previous_wall = None
+            for col in range(first, last + 1):
+                cx, cy = ox + depth * dx_depth + col * dx_col, oy + depth * dy_depth + col * dy_col
+                inside = 0 <= cx < width and 0 <= cy < height
+                wall = not inside or opaque[cx][cy]
+                if inside and (wall or (col * start_den >= depth * start_num
+                                        and col * end_den <= depth * end_num)):
+                    if (cx - ox) ** 2 + (cy - oy) ** 2 <= radius_sq:
+                        lit.append((cx, cy))
+                if previous_wall is True and not wall:
+                    start_num, start_den = 2 * col - 1, 2 * depth
+                elif previous_wall is False and wall and depth < radius:
+                    rows.append((depth + 1, start_num, start_den, 2 * col - 1, 2 * depth))
+                previous_wall = wall
+            if previous_wall is False and depth < radius:
+                rows.append((depth + 1, start_num, start_den, end_num, end_den))
+
+    if lit:
+        xs, ys = zip(*lit)
+        visible[list(xs), list(ys)] = True
+    return x0, y0, visible
+
+
+class VisibilityCache:
+    """
+    Champs de vision en cache, et brouillard de guerre des équipes.
+
+    Le champ de vision ne dépend que de la case d'origine, du rayon et du
+    terrain : il est gardé par case et par rayon (LRU), si bien qu'une unité
+    ne le recalcule que lorsqu'elle arrive sur une case pas encore vue.
+    Quand le terrain change, seuls les champs qui contiennent une case
+    modifiée sont oubliés (voir `Grid.terrain_changes`).
+
+    Les lignes de vue (`line_of_sight`, `cells_in_sight`) ne sont pas
+    limitées par le rayon de vision : elles utilisent un champ assez grand
+    pour la case la plus lointaine demandée, et jamais plus petit que
+    `radius`, pour partager les champs du brouillard dans le cas courant.
+
+    Attributs
+    ---------
+    grid : Grid
+        La grille observée.
+    radius : int
+        Rayon de vision.
+    max_entries : int
+        Nombre maximal de champs gardés.
+    generation : int
+        Incrémenté quand des champs sont oubliés après un changement de terrain.
+    hits, misses : int
+        Statistiques cumulées du cache.
+    """
+
+    def __init__(self, grid, radius=VIEW_RADIUS, max_entries=4096):
+        self.grid = grid
+        self.radius = radius
+        self.max_entries = max_entries
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._fields = OrderedDict()
+        self._changes_seen = grid.terrain_change_count
+        self._teams = {}
+
+    def copy(self, grid):
+        """Retourne une copie du cache pour une copie de la grille (les champs sont partagés)."""
+        clone = VisibilityCache(grid, self.radius, self.max_entries)
+        clone.generation = self.generation
+        clone._fields = OrderedDict(self._fields)
+        clone._changes_seen = self._changes_seen
+        clone._teams = dict(self._teams)
+        return clone
+
+    def sync(self):
+        """Oublie les champs qui contiennent une case dont le terrain a changé."""
+        grid = self.grid
+        pending = grid.terrain_change_count - self._changes_seen
+        if not pending:
+            return
+        self._changes_seen = grid.terrain_change_count
+        self.generation += 1
+        if pending > len(grid.terrain_changes):
+            self._fields.clear()  # Trop de changements pour les connaître tous
+            return
+        changes = list(grid.terrain_changes)[-pending:]
+        stale = [key for key, (x0, y0, mask) in self._fields.items()
+                 if any(0 <= x - x0 < mask.shape[0] and 0 <= y - y0 < mask.shape[1] and mask[x - x0, y - y0]
+                        for x, y in changes)]
+        for key in stale:
+            del self._fields[key]
+
+    def field(self, x, y, radius=None):
+        """
+        Retourne le champ de vision depuis la case (x, y).
+
+        Paramètres
+        ----------
+        x, y : int
+            L'origine.
+        radius : int, optionnel
+            Rayon du champ ; le rayon de vision s'il est absent ou plus grand.
+
+        Retourne
+        --------
+        tuple[int, int, numpy.ndarray]
+            Voir `shadowcast` ; le masque est partagé et ne doit pas être modifié.
+        """
+        self.sync()
+        radius = self.radius if radius is None else max(radius, self.radius)
+        key = (x, y, radius)
+        field = self._fields.get(key)
+        if field is not None:
+            self._fields.move_to_end(key)
+            self.hits += 1
+            return field
+        self.misses += 1
+        field = self._fields[key] = shadowcast(self.grid.terrain, x, y, radius)
+        while len(self._fields) > self.max_entries:
+            self._fields.popitem(last=False)
+        return field
+
+    def is_visible(self, x, y, target_x, target_y, radius=None):
+        """Indique si la case (target_x, target_y) est visible depuis (x, y) (voir `field`)."""
+        x0, y0, mask = self.field(x, y, radius)
+        dx, dy = target_x - x0, target_y - y0
+        return 0 <= dx < mask.shape[0] and 0 <= dy < mask.shape[1] and bool(mask[dx, dy])
+
+    def visible_cells(self, x, y, xs, ys, radius=None):
+        """Retourne le masque des cases (xs, ys) visibles depuis (x, y) (version vectorielle)."""
+        x0, y0, mask = self.field(x, y, radius)
+        dx, dy = np.asarray(xs) - x0, np.asarray(ys) - y0
+        inside = (dx >= 0) & (dx < mask.shape[0]) & (dy >= 0) & (dy < mask.shape[1])
+        result = np.zeros(len(dx), dtype=bool)
+        result[inside] = mask[dx[inside], dy[inside]]
+        return result
+
+    def line_of_sight(self, x, y, target_x, target_y):
+        """Indique si aucun mur ne sépare (x, y) de (target_x, target_y), à toute distance."""
+        return self.is_visible(x, y, target_x, target_y, math.ceil(math.hypot(target_x - x, target_y - y)))
+
+    def cells_in_sight(self, x, y, xs, ys):
+        """Retourne le masque des cases (xs, ys) en ligne de vue de (x, y), à toute distance."""
+        dx, dy = np.asarray(xs) - x, np.asarray(ys) - y
+        if not len(dx):
+            return np.zeros(0, dtype=bool)
+        radius = math.ceil(math.sqrt((dx * dx + dy * dy).max()))
+        return self.visible_cells(x, y, xs, ys, radius)
+
+    def team_mask(self, team, units):
+        """
+        Retourne le masque des cases vues par au moins une unité d'une équipe.
+
+        Les champs des unités sont réunis par un ou binaire. Le résultat est
+        gardé tant que les unités n'ont pas bougé et que le terrain vu n'a
+        pas changé.
+
+        Paramètres
+        ----------
+        team : str
+            Nom de l'équipe (clé du cache).
+        units : list[Unit]
+            Les unités de l'équipe.
+
+        Retourne
+        --------
+        numpy.ndarray
+            Masque booléen indexé par [x, y] ; partagé, il ne doit pas être modifié.
+        """
+        self.sync()
+        key = (self.generation, tuple((unit.x, unit.y) for unit in units))
+        cached = self._teams.get(team)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        mask = np.zeros((self.grid.size, self.grid.size), dtype=bool)
+        for unit in units:
+            x0, y0, field = self.field(unit.x, unit.y)
+            mask[x0:x0 + field.shape[0], y0:y0 + field.shape[1]] |= field
+        self._teams[team] = (key, mask)
+        return mask
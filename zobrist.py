@@ -0,0 +1,184 @@
+import numpy as np
+
+from grid import *
+
+# Graine mélangée à toutes les clés
+ZOBRIST_SEED = 0x2545F4914F6CDD1D
+MASK64 = (1 << 64) - 1
+
+# Familles de clés : une case de terrain ou de coût, la position ou la santé d'une unité,
+# l'équipe qui a la main
+TERRAIN, COST, POSITION, HEALTH, SIDE = range(5)
+
+
+def splitmix64(value):
+    """Mélange un entier de 64 bits (fonction de finalisation de SplitMix64)."""
+    z = (value + 0x9E3779B97F4A7C15) & MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+
+def feature_key(kind, a=0, b=0):
+    """
+    Retourne la clé de Zobrist d'une caractéristique de la position.
+
+    Les clés ne sont pas stockées : elles sont recalculées à la demande en
+    mélangeant (famille, a, b), ce qui évite une table par case et par unité.
+
+    Paramètres
+    ----------
+    kind : int
+        Famille de la clé (TERRAIN, COST, POSITION, HEALTH, SIDE).
+    a : int
+        Premier paramètre, sur 28 bits (ex. : numéro de ligne de l'unité).
+    b : int
+        Second paramètre, tronqué à 32 bits (ex. : case ou santé).
+    """
+    return splitmix64(((kind << 60) | (a << 32) | (b & 0xFFFFFFFF)) ^ ZOBRIST_SEED)
+
+
+def feature_keys(kind, a, b):
+    """Version vectorielle de `feature_key` ; retourne un tableau `uint64`."""
+    a = np.asarray(a, dtype=np.uint64)
+    b = np.asarray(b, dtype=np.int64).astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    z = ((np.uint64(kind) << np.uint64(60)) | (a << np.uint64(32)) | b) ^ np.uint64(ZOBRIST_SEED)
+    with np.errstate(over="ignore"):
+        z = z + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def xor_all(keys):
+    """Retourne le ou exclusif de toutes les clés d'un tableau."""
+    return int(np.bitwise_xor.reduce(keys)) if len(keys) else 0
+
+
+def position_key(row, x, y):
+    """Clé de l'unité `row` sur la case (x, y)."""
+    return feature_key(POSITION, row, (x << 16) | y)
+
+
+def health_key(row, health):
+    """Clé de l'unité `row` avec `health` points de vie."""
+    return feature_key(HEALTH, row, health)
+
+
+# Clé ajoutée quand les ennemis ont la main
+SIDE_KEY = feature_key(SIDE)
+
+
+def terrain_hash(grid):
+    """Retourne la part du terrain et des coûts dans le hachage (murs et coûts différents de 1)."""
+    xs, ys = np.nonzero(grid.terrain != TRAVERSABLE)
+    walls = feature_keys(TERRAIN, grid.terrain[xs, ys], (xs << 16) | ys)
+    xs, ys = np.nonzero(grid.cost != 1)
+    costs = feature_keys(COST, grid.cost[xs, ys], (xs << 16) | ys)
+    return xor_all(walls) ^ xor_all(costs)
+
+
+def units_hash(table):
+    """Retourne la part des unités en jeu (position et santé) dans le hachage."""
+    rows = table.alive_indices()
+    x, y = table.x[rows].astype(np.int64), table.y[rows].astype(np.int64)
+    return (xor_all(feature_keys(POSITION, rows, (x << 16) | y))
+            ^ xor_all(feature_keys(HEALTH, rows, table.health[rows])))
+
+
+class TranspositionTable:
+    """
+    Table de transposition de taille fixe, indexée par hachage de Zobrist.
+
+    Chaque hachage a deux emplacements possibles (deux cases voisines). Une
+    entrée remplace celle de même hachage, sinon un emplacement vide, sinon
+    celle des deux qui a la plus faible profondeur restante, si elle n'est
+    pas plus profonde que la nouvelle : les résultats les plus coûteux à
+    recalculer sont gardés.
+
+    Attributs
+    ---------
+    capacity : int
+        Nombre d'emplacements (une puissance de deux).
+    hits, misses : int
+        Recherches réussies et échouées.
+    stores, replacements, rejections : int
+        Entrées écrites, dont celles qui en ont évincé une autre, et entrées refusées.
+    """
+
+    def __init__(self, capacity=1 << 16):
+        self.capacity = 1 << max(capacity - 1, 1).bit_length()
+        self._mask = self.capacity - 1
+        self._keys = [None] * self.capacity
+        self._depths = [0] * self.capacity
+        self._values = [None] * self.capacity
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0
+        self.rejections = 0
+
+    def __len__(self):
+        return self.size
+
+    def get(self, key, default=None):
+        """Retourne la valeur associée au hachage `key`, ou `default`."""
+        slot = key & self._mask
+        if self._keys[slot] == key or self._keys[slot ^ 1] == key:
+            self.hits += 1
+            return self._values[slot if self._keys[slot] == key else slot ^ 1]
+        self.misses += 1
+        return default
+
+    def store(self, key, value, depth=0):
+        """
+        Enregistre une valeur pour le hachage `key`.
+
+        Paramètres
+        ----------
+        key : int
+            Le hachage de la position.
+        value : object
+            La valeur à garder.
+        depth : int
+            Profondeur restante de la recherche qui a produit la valeur.
+
+        Retourne
+        --------
+        bool
+            False si la valeur a été refusée par la politique de remplacement.
+        """
+        first = key & self._mask
+        candidates = (first, first ^ 1)
+        for slot in candidates:
+            if self._keys[slot] == key:
+                break
+        else:
+            empty = [slot for slot in candidates if self._keys[slot] is None]
+            if empty:
+                slot = empty[0]
+                self.size += 1
+            else:
+                slot = min(candidates, key=self._depths.__getitem__)
+                if self._depths[slot] > depth:
+                    self.rejections += 1
+                    return False
+                self.replacements += 1
+        self._keys[slot] = key
+        self._depths[slot] = depth
+        self._values[slot] = value
+        self.stores += 1
+        return True
+
+    def clear(self):
+        """Vide la table (les statistiques sont gardées)."""
+        self._keys = [None] * self.capacity
+        self._values = [None] * self.capacity
+        self._depths = [0] * self.capacity
+        self.size = 0
+
+    def hit_rate(self):
+        """Retourne la proportion de recherches réussies, ou None si aucune."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None